@@ -16,7 +16,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional
 
-import httpx
+import aiohttp
+import numpy as np
 
 logger = logging.getLogger("sentinel.simulator")
 
@@ -52,6 +53,25 @@ _ATTACK_PATHS = [
     "/admin", "/wp-login.php", "/xmlrpc.php",
 ]
 
+# Paths for Slowloris POSTs
+_SLOW_PATHS = ["/", "/api/data", "/upload", "/submit"]
+
+# Eager task execution skips Task scheduling for coroutines that finish
+# without suspending (Python 3.12+ only)
+_EAGER_TASK_FACTORY = getattr(asyncio, "eager_task_factory", None)
+
+# Transport failures counted as simulator errors. Anything else is a bug
+# in the simulator and should surface rather than be tallied.
+_NETWORK_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, OSError)
+
+# Size of the pre-drawn random pools used on the request hot path.
+# Power of two so the request counter can be masked instead of modded.
+_POOL_SIZE = 8192
+_POOL_MASK = _POOL_SIZE - 1
+
+# How long idle simulator connections stay pooled for reuse
+_KEEPALIVE_SEC = 30
+
 
 class AttackScenario(str, Enum):
     HTTP_FLOOD = "http_flood"
@@ -60,7 +80,7 @@ class AttackScenario(str, Enum):
     MIXED = "mixed"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SimulatorConfig:
     """Configuration for an attack simulation."""
     target_url: str = "http://localhost:8000"
@@ -71,7 +91,7 @@ class SimulatorConfig:
     source_ips: int = 10  # simulated unique IPs (via X-Forwarded-For)
 
 
-@dataclass
+@dataclass(slots=True)
 class SimulatorReport:
     """Results from a simulation run."""
     scenario: str
@@ -120,41 +140,149 @@ class AttackSimulator:
             duration_sec=config.duration_sec,
         )
         self._stop = False
-        self._latencies: list[float] = []
-        self._first_block_time: float = 0.0
-        self._start_time: float = 0.0
+        # Running latency total — only the mean is reported
+        self._lat_sum: float = 0.0
+        self._lat_n: int = 0
+        # monotonic_ns() timestamps; 0 = not set
+        self._first_block_ns: int = 0
+        self._start_ns: int = 0
+        self._end_ns: int = 0
         self._ips_used: set[str] = set()
 
+        # Pre-drawn random choices, indexed by a per-request counter
+        self._idx = 0
+        self._ip_pools: dict[int, tuple[str, ...]] = {}
+        self._bot_ua_pool = tuple(random.choices(_BOT_UAS, k=_POOL_SIZE))
+        # Full request URLs, built once instead of per send()
+        base = config.target_url.rstrip("/")
+        self._flood_url_pool = tuple(
+            base + p for p in random.choices(_ATTACK_PATHS[:4], k=_POOL_SIZE)
+        )
+        self._attack_url_pool = tuple(
+            base + p for p in random.choices(_ATTACK_PATHS, k=_POOL_SIZE)
+        )
+        self._slow_urls = tuple(base + p for p in _SLOW_PATHS)
+        self._legit_urls = tuple(base + p for p in _LEGIT_PATHS)
+        # Distributed mix: 60% bot-like UA, 40% real-looking UA
+        self._mixed_ua_pool = tuple(
+            random.choice(_BOT_UAS) if random.random() < 0.6 else random.choice(_REAL_UAS)
+            for _ in range(_POOL_SIZE)
+        )
+        self._accept_lang_pool = tuple(random.random() < 0.3 for _ in range(_POOL_SIZE))
+
+        # Reusable header dicts for attack requests — at most `concurrency`
+        # are checked out at once, so the pool stays that size
+        self._header_pool: list[dict[str, str]] = []
+
     def _record_response(self, status_code: int, latency_ms: float) -> None:
         """Record response stats."""
         self.report.total_requests += 1
-        self._latencies.append(latency_ms)
+        self._lat_sum += latency_ms
+        self._lat_n += 1
 
         if status_code == 200:
             self.report.successful += 1
         elif status_code == 403:
             self.report.blocked += 1
-            if not self._first_block_time:
-                self._first_block_time = time.time()
+            if not self._first_block_ns:
+                self._first_block_ns = time.monotonic_ns()
         elif status_code == 429:
             self.report.rate_limited += 1
-            if not self._first_block_time:
-                self._first_block_time = time.time()
+            if not self._first_block_ns:
+                self._first_block_ns = time.monotonic_ns()
         elif status_code == 503:
             self.report.challenged += 1
         else:
             self.report.errors += 1
 
+    def _record_error(self) -> None:
+        """Record a request that failed before any response arrived."""
+        self.report.total_requests += 1
+        self.report.errors += 1
+
     def _random_ip(self, pool_size: int | None = None) -> str:
-        """Generate a random simulated IP."""
+        """Return the next simulated IP from a pre-generated pool."""
         n = pool_size or self.config.source_ips
-        ip = f"10.{random.randint(0, 255)}.{random.randint(0, min(n, 255))}.{random.randint(1, 254)}"
-        self._ips_used.add(ip)
+        pool = self._ip_pools.get(n)
+        if pool is None:
+            pool = self._ip_pools[n] = self._build_ip_pool(n)
+        ip = pool[self._idx & _POOL_MASK]
+        self._idx += 1
         return ip
 
+    @staticmethod
+    def _build_ip_pool(n: int) -> tuple[str, ...]:
+        """Draw all octets for a pool of 10.x.y.z IPs in one numpy pass."""
+        rng = np.random.default_rng()
+        octets = np.empty((_POOL_SIZE, 3), dtype=np.int64)
+        octets[:, 0] = rng.integers(0, 256, _POOL_SIZE)
+        octets[:, 1] = rng.integers(0, min(n, 255) + 1, _POOL_SIZE)
+        octets[:, 2] = rng.integers(1, 255, _POOL_SIZE)
+        return tuple(f"10.{a}.{b}.{c}" for a, b, c in octets.tolist())
+
+    def _unique_ips(self) -> int:
+        """Count distinct IPs handed out so far (computed off the hot path)."""
+        used = set(self._ips_used)
+        drawn = min(self._idx, _POOL_SIZE)
+        for pool in self._ip_pools.values():
+            used.update(pool[:drawn])
+        return len(used)
+
+    def _acquire_headers(self) -> dict[str, str]:
+        """Check out a header dict; callers overwrite every key they send."""
+        pool = self._header_pool
+        return pool.pop() if pool else {}
+
+    def _release_headers(self, headers: dict[str, str]) -> None:
+        self._header_pool.append(headers)
+
+    def _session(
+        self,
+        timeout: float,
+        limit: int | None = None,
+        keepalive: bool = True,
+    ) -> aiohttp.ClientSession:
+        """
+        Create an aiohttp session sized for the configured concurrency
+        (or an explicit connection ``limit``).
+
+        Idle connections are kept alive for reuse unless ``keepalive`` is
+        False, in which case every request opens a fresh connection.
+
+        Sessions are shared by many simulated clients, so cookies are not
+        persisted — each client sends its own Cookie header (if any).
+        """
+        if keepalive:
+            connector = aiohttp.TCPConnector(
+                limit=limit or self.config.concurrency * 2,
+                keepalive_timeout=_KEEPALIVE_SEC,
+            )
+        else:
+            connector = aiohttp.TCPConnector(
+                limit=limit or self.config.concurrency * 2,
+                force_close=True,
+            )
+        return aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            connector=connector,
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+
     async def run(self) -> SimulatorReport:
         """Run the selected attack scenario."""
-        self._start_time = time.time()
+        loop = asyncio.get_running_loop()
+        prev_factory = loop.get_task_factory()
+        # Python 3.12+: run send() inline until its first suspension point
+        if _EAGER_TASK_FACTORY is not None:
+            loop.set_task_factory(_EAGER_TASK_FACTORY)
+        try:
+            return await self._run()
+        finally:
+            loop.set_task_factory(prev_factory)
+
+    async def _run(self) -> SimulatorReport:
+        self._start_ns = time.monotonic_ns()
+        self._end_ns = self._start_ns + self.config.duration_sec * 1_000_000_000
         logger.info(
             "Starting %s simulation (%ds, %d RPS, %d concurrent)",
             self.config.scenario.value,
@@ -173,14 +301,46 @@ class AttackSimulator:
         runner = runners.get(self.config.scenario, self._http_flood)
         await runner()
 
-        if self._latencies:
-            self.report.avg_latency_ms = sum(self._latencies) / len(self._latencies)
-        if self._first_block_time:
-            self.report.detection_time_sec = self._first_block_time - self._start_time
-        self.report.unique_ips_used = len(self._ips_used)
+        if self._lat_n:
+            self.report.avg_latency_ms = self._lat_sum / self._lat_n
+        if self._first_block_ns:
+            self.report.detection_time_sec = (self._first_block_ns - self._start_ns) / 1e9
+        self.report.unique_ips_used = self._unique_ips()
 
         return self.report
 
+    async def _pace(self, send, rps: int) -> None:
+        """
+        Run send() at a steady rate until the run deadline.
+
+        A fixed pool of ``concurrency`` workers pulls work items from a
+        bounded queue; a leaky-bucket pacer enqueues one item every 1/rps
+        seconds. A full queue blocks the pacer (back-pressure), and missed
+        slots are enqueued immediately without sleeping.
+        """
+        workers = max(1, self.config.concurrency)
+        queue: asyncio.Queue[bool | None] = asyncio.Queue(maxsize=workers * 2)
+
+        async def worker() -> None:
+            while await queue.get() is not None:
+                await send()
+
+        interval_ns = 1_000_000_000 // max(1, rps)
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(workers):
+                tg.create_task(worker())
+
+            next_ns = time.monotonic_ns()
+            while next_ns < self._end_ns:
+                await queue.put(True)
+                next_ns += interval_ns
+                delay_ns = next_ns - time.monotonic_ns()
+                if delay_ns > 0:
+                    await asyncio.sleep(delay_ns / 1e9)
+
+            for _ in range(workers):
+                await queue.put(None)
+
     # ── Scenario 1: HTTP Flood ───────────────────────────
 
     async def _http_flood(self) -> None:
@@ -193,35 +353,33 @@ class AttackSimulator:
           - Same path repeated
           - No cookies, no referer
         """
-        async with httpx.AsyncClient(timeout=5) as client:
-            end_time = time.time() + self.config.duration_sec
-            sem = asyncio.Semaphore(self.config.concurrency)
+        async with self._session(timeout=5) as client:
+            end_ns = self._end_ns
 
             async def send():
-                async with sem:
-                    if time.time() > end_time:
-                        return
-                    ip = self._random_ip()
-                    path = random.choice(_ATTACK_PATHS[:4])
-                    start = time.monotonic()
-                    try:
-                        resp = await client.get(
-                            f"{self.config.target_url}{path}",
-                            headers={
-                                "X-Forwarded-For": ip,
-                                "User-Agent": random.choice(_BOT_UAS),
-                            },
-                        )
-                        latency = (time.monotonic() - start) * 1000
-                        self._record_response(resp.status_code, latency)
-                    except Exception:
-                        self.report.errors += 1
-                        self.report.total_requests += 1
-
-            while time.time() < end_time:
-                tasks = [asyncio.create_task(send()) for _ in range(self.config.rps)]
-                await asyncio.gather(*tasks)
-                await asyncio.sleep(1)
+                start = time.monotonic_ns()
+                if start > end_ns:
+                    return
+                ip = self._random_ip()
+                i = self._idx & _POOL_MASK
+                url = self._flood_url_pool[i]
+                headers = self._acquire_headers()
+                headers["X-Forwarded-For"] = ip
+                headers["User-Agent"] = self._bot_ua_pool[i]
+                try:
+                    async with client.get(
+                        url,
+                        headers=headers,
+                    ) as resp:
+                        status = resp.status
+                except _NETWORK_ERRORS:
+                    self._record_error()
+                else:
+                    self._record_response(status, (time.monotonic_ns() - start) * 1e-6)
+                finally:
+                    self._release_headers(headers)
+
+            await self._pace(send, self.config.rps)
 
     # ── Scenario 2: Slowloris ────────────────────────────
 
@@ -236,48 +394,50 @@ class AttackSimulator:
           - Maintains many concurrent connections
           - Moderate number of IPs
         """
-        end_time = time.time() + self.config.duration_sec
+        end_ns = self._end_ns
         connections = min(self.config.concurrency, 200)
 
-        async def slow_connection(conn_id: int):
+        async def slow_connection(conn_id: int, client: aiohttp.ClientSession):
             """Maintain a single slow connection."""
-            while time.time() < end_time:
+            while time.monotonic_ns() < end_ns:
                 ip = self._random_ip()
-                start = time.monotonic()
+                start = time.monotonic_ns()
                 try:
-                    # Use raw httpx stream to simulate slow sending
-                    async with httpx.AsyncClient(timeout=30) as client:
-                        # Send a POST with trickled content
-                        path = random.choice(["/", "/api/data", "/upload", "/submit"])
-
-                        # First: try a slow POST with minimal body
-                        resp = await client.post(
-                            f"{self.config.target_url}{path}",
-                            headers={
-                                "X-Forwarded-For": ip,
-                                "User-Agent": random.choice(_BOT_UAS),
-                                "Content-Type": "application/x-www-form-urlencoded",
-                                "Content-Length": "10000",  # claim large body
-                            },
-                            content=b"x=1",  # send tiny body vs claimed size
-                        )
-                        latency = (time.monotonic() - start) * 1000
-                        self._record_response(resp.status_code, latency)
-
+                    # Send a POST with trickled content
+                    url = random.choice(self._slow_urls)
+
+                    # First: try a slow POST with minimal body
+                    async with client.post(
+                        url,
+                        headers={
+                            "X-Forwarded-For": ip,
+                            "User-Agent": self._bot_ua_pool[self._idx & _POOL_MASK],
+                            "Content-Type": "application/x-www-form-urlencoded",
+                            "Content-Length": "10000",  # claim large body
+                        },
+                        data=b"x=1",  # send tiny body vs claimed size
+                    ) as resp:
+                        status = resp.status
+                except _NETWORK_ERRORS:
+                    self._record_error()
+                    await asyncio.sleep(1)
+                else:
+                    self._record_response(status, (time.monotonic_ns() - start) * 1e-6)
                     # Slowloris pacing — wait 2-5 seconds between reconnects
                     await asyncio.sleep(random.uniform(2, 5))
 
-                except Exception:
-                    self.report.errors += 1
-                    self.report.total_requests += 1
-                    await asyncio.sleep(1)
-
         logger.info(
             "Slowloris: %d slow connections for %ds",
             connections, self.config.duration_sec,
         )
-        tasks = [asyncio.create_task(slow_connection(i)) for i in range(connections)]
-        await asyncio.gather(*tasks)
+        # One session for all connections. Keep-alive is off so every
+        # slow request holds its own socket and each iteration reconnects
+        async with self._session(timeout=30, keepalive=False) as client:
+            tasks = [
+                asyncio.create_task(slow_connection(i, client))
+                for i in range(connections)
+            ]
+            await asyncio.gather(*tasks)
 
     # ── Scenario 3: Distributed ──────────────────────────
 
@@ -292,53 +452,47 @@ class AttackSimulator:
           - Targets multiple paths
           - Harder to detect: no single IP triggers rate limit
         """
-        async with httpx.AsyncClient(timeout=5) as client:
-            end_time = time.time() + self.config.duration_sec
-            sem = asyncio.Semaphore(self.config.concurrency)
+        async with self._session(timeout=5) as client:
+            end_ns = self._end_ns
             # Use a large pool of unique IPs
             ip_pool_size = max(500, self.config.source_ips * 50)
 
             async def send():
-                async with sem:
-                    if time.time() > end_time:
-                        return
-                    # Each request from a different IP
-                    ip = self._random_ip(pool_size=ip_pool_size)
-                    path = random.choice(_ATTACK_PATHS)
-                    # Mix: 60% bot-like UA, 40% real-looking UA
-                    if random.random() < 0.6:
-                        ua = random.choice(_BOT_UAS)
-                    else:
-                        ua = random.choice(_REAL_UAS)
-
-                    headers = {
-                        "X-Forwarded-For": ip,
-                        "User-Agent": ua,
-                    }
-                    # Some requests include accept-language (look more human)
-                    if random.random() < 0.3:
-                        headers["Accept-Language"] = "en-US,en;q=0.9"
+                start = time.monotonic_ns()
+                if start > end_ns:
+                    return
+                # Each request from a different IP
+                ip = self._random_ip(pool_size=ip_pool_size)
+                i = self._idx & _POOL_MASK
+                url = self._attack_url_pool[i]
+
+                headers = self._acquire_headers()
+                headers["X-Forwarded-For"] = ip
+                headers["User-Agent"] = self._mixed_ua_pool[i]
+                # Some requests include accept-language (look more human)
+                if self._accept_lang_pool[i]:
+                    headers["Accept-Language"] = "en-US,en;q=0.9"
+                else:
+                    headers.pop("Accept-Language", None)
 
-                    start = time.monotonic()
-                    try:
-                        resp = await client.get(
-                            f"{self.config.target_url}{path}",
-                            headers=headers,
-                        )
-                        latency = (time.monotonic() - start) * 1000
-                        self._record_response(resp.status_code, latency)
-                    except Exception:
-                        self.report.errors += 1
-                        self.report.total_requests += 1
+                try:
+                    async with client.get(
+                        url,
+                        headers=headers,
+                    ) as resp:
+                        status = resp.status
+                except _NETWORK_ERRORS:
+                    self._record_error()
+                else:
+                    self._record_response(status, (time.monotonic_ns() - start) * 1e-6)
+                finally:
+                    self._release_headers(headers)
 
             logger.info(
                 "Distributed DDoS: ~%d unique IPs, %d RPS for %ds",
                 ip_pool_size, self.config.rps, self.config.duration_sec,
             )
-            while time.time() < end_time:
-                tasks = [asyncio.create_task(send()) for _ in range(self.config.rps)]
-                await asyncio.gather(*tasks)
-                await asyncio.sleep(1)
+            await self._pace(send, self.config.rps)
 
     # ── Scenario 4: Mixed Traffic ────────────────────────
 
@@ -353,87 +507,84 @@ class AttackSimulator:
         This tests false-positive rates — legitimate traffic should pass
         while attack traffic gets blocked.
         """
-        end_time = time.time() + self.config.duration_sec
+        end_ns = self._end_ns
         # Split: 30% legitimate, 70% attack
         legit_rps = max(5, self.config.rps // 3)
         attack_rps = self.config.rps - legit_rps
 
         legit_report = {"total": 0, "passed": 0, "blocked": 0}
 
-        async def legit_user(user_id: int):
+        async def legit_user(user_id: int, client: aiohttp.ClientSession):
             """Simulate a single human user browsing the site."""
-            async with httpx.AsyncClient(timeout=10) as client:
-                ip = f"192.168.{user_id // 256}.{user_id % 256 + 1}"
-                self._ips_used.add(ip)
-                ua = random.choice(_REAL_UAS)
-                pages = list(_LEGIT_PATHS)
-                random.shuffle(pages)
-                referer = None
-
-                for path in pages:
-                    if time.time() > end_time:
-                        return
-                    headers = {
-                        "X-Forwarded-For": ip,
-                        "User-Agent": ua,
-                        "Accept-Language": "en-US,en;q=0.9,ru;q=0.8",
-                        "Accept": "text/html,application/xhtml+xml",
-                    }
-                    if referer:
-                        headers["Referer"] = f"{self.config.target_url}{referer}"
-                    headers["Cookie"] = f"session=usr{user_id}"
-
-                    start = time.monotonic()
-                    try:
-                        resp = await client.get(
-                            f"{self.config.target_url}{path}",
-                            headers=headers,
-                        )
-                        latency = (time.monotonic() - start) * 1000
-                        self._record_response(resp.status_code, latency)
-                        legit_report["total"] += 1
-                        if resp.status_code == 200:
-                            legit_report["passed"] += 1
-                        elif resp.status_code in (403, 429):
-                            legit_report["blocked"] += 1
-                    except Exception:
-                        self.report.errors += 1
-                        self.report.total_requests += 1
-
-                    referer = path
-                    # Human-like timing: 1-5 second pauses
-                    await asyncio.sleep(random.uniform(1.0, 5.0))
+            ip = f"192.168.{user_id // 256}.{user_id % 256 + 1}"
+            self._ips_used.add(ip)
+            ua = random.choice(_REAL_UAS)
+            pages = list(self._legit_urls)
+            random.shuffle(pages)
+            referer = None
+
+            for url in pages:
+                if time.monotonic_ns() > end_ns:
+                    return
+                headers = {
+                    "X-Forwarded-For": ip,
+                    "User-Agent": ua,
+                    "Accept-Language": "en-US,en;q=0.9,ru;q=0.8",
+                    "Accept": "text/html,application/xhtml+xml",
+                }
+                if referer:
+                    headers["Referer"] = referer
+                headers["Cookie"] = f"session=usr{user_id}"
+
+                start = time.monotonic_ns()
+                try:
+                    async with client.get(
+                        url,
+                        headers=headers,
+                    ) as resp:
+                        status = resp.status
+                except _NETWORK_ERRORS:
+                    self._record_error()
+                else:
+                    self._record_response(status, (time.monotonic_ns() - start) * 1e-6)
+                    legit_report["total"] += 1
+                    if status == 200:
+                        legit_report["passed"] += 1
+                    elif status in (403, 429):
+                        legit_report["blocked"] += 1
+
+                referer = url
+                # Human-like timing: 1-5 second pauses
+                await asyncio.sleep(random.uniform(1.0, 5.0))
 
         async def attack_stream():
             """Concurrent attack traffic (HTTP Flood)."""
-            async with httpx.AsyncClient(timeout=5) as client:
-                sem = asyncio.Semaphore(self.config.concurrency)
+            async with self._session(timeout=5) as client:
 
                 async def send():
-                    async with sem:
-                        if time.time() > end_time:
-                            return
-                        ip = self._random_ip()
-                        path = random.choice(_ATTACK_PATHS[:4])
-                        start = time.monotonic()
-                        try:
-                            resp = await client.get(
-                                f"{self.config.target_url}{path}",
-                                headers={
-                                    "X-Forwarded-For": ip,
-                                    "User-Agent": random.choice(_BOT_UAS),
-                                },
-                            )
-                            latency = (time.monotonic() - start) * 1000
-                            self._record_response(resp.status_code, latency)
-                        except Exception:
-                            self.report.errors += 1
-                            self.report.total_requests += 1
-
-                while time.time() < end_time:
-                    tasks = [asyncio.create_task(send()) for _ in range(attack_rps)]
-                    await asyncio.gather(*tasks)
-                    await asyncio.sleep(1)
+                    start = time.monotonic_ns()
+                    if start > end_ns:
+                        return
+                    ip = self._random_ip()
+                    i = self._idx & _POOL_MASK
+                    url = self._flood_url_pool[i]
+                    headers = self._acquire_headers()
+                    headers["X-Forwarded-For"] = ip
+                    headers["User-Agent"] = self._bot_ua_pool[i]
+                    try:
+                        async with client.get(
+                            url,
+                            headers=headers,
+                        ) as resp:
+                            status = resp.status
+                    except _NETWORK_ERRORS:
+                        self._record_error()
+                    else:
+                        self._record_response(status, (time.monotonic_ns() - start) * 1e-6)
+                    finally:
+                        self._release_headers(headers)
+
+                await self._pace(send, attack_rps)
 
         # Launch legitimate users and attack stream concurrently
         n_users = max(5, legit_rps)
@@ -441,10 +592,15 @@ class AttackSimulator:
             "Mixed: %d legit users + %d attack RPS for %ds",
             n_users, attack_rps, self.config.duration_sec,
         )
-        user_tasks = [asyncio.create_task(legit_user(i)) for i in range(n_users)]
-        attack_task = asyncio.create_task(attack_stream())
+        # Each user has at most one request in flight
+        async with self._session(timeout=10, limit=n_users * 2) as legit_client:
+            user_tasks = [
+                asyncio.create_task(legit_user(i, legit_client))
+                for i in range(n_users)
+            ]
+            attack_task = asyncio.create_task(attack_stream())
 
-        await asyncio.gather(attack_task, *user_tasks)
+            await asyncio.gather(attack_task, *user_tasks)
 
         # Append false-positive stats to report summary
         fp_rate = (
@@ -492,6 +648,14 @@ if __name__ == "__main__":
     parser.add_argument("--source-ips", type=int, default=10)
     args = parser.parse_args()
 
+    # uvloop (shipped with uvicorn[standard]) is a faster event loop for
+    # this socket-heavy workload; stock asyncio is used where unavailable
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
     asyncio.run(run_simulation(
         scenario=args.scenario,
         target=args.target,
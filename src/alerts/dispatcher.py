@@ -6,6 +6,7 @@ Sends notifications via Telegram and Webhooks.
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
@@ -17,8 +18,14 @@ from src.config import settings
 
 logger = logging.getLogger("sentinel.alerts")
 
+_TG_ICONS = {"info": "ℹ️", "warning": "⚠️", "critical": "🚨"}
+_TG_DEFAULT_ICON = "📢"
+# Characters that must be backslash-escaped in Telegram's legacy
+# "Markdown" parse mode (MarkdownV2 has a longer list)
+_TG_MD_ESCAPE = str.maketrans({c: "\\" + c for c in "_*`["})
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class AlertEvent:
     """Represents a single alert event."""
     level: str          # info | warning | critical
@@ -30,7 +37,31 @@ class AlertEvent:
 
 
 class AlertDispatcher(ABC):
-    """Base class for alert dispatchers."""
+    """
+    Base class for alert dispatchers.
+
+    Holds one long-lived httpx client so alert bursts reuse
+    connections instead of paying a new handshake per alert.
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        """Open the dispatcher's HTTP client."""
+        self._get_client()
+
+    async def aclose(self) -> None:
+        """Close the dispatcher's HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Lazily initialise the shared httpx client."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=10)
+        return self._client
 
     @abstractmethod
     async def send(self, event: AlertEvent) -> bool:
@@ -45,36 +76,37 @@ class TelegramAlert(AlertDispatcher):
         bot_token: Optional[str] = None,
         chat_id: Optional[str] = None,
     ) -> None:
+        super().__init__()
         self.bot_token = bot_token or settings.telegram_bot_token
         self.chat_id = chat_id or settings.telegram_chat_id
+        self._url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
 
     async def send(self, event: AlertEvent) -> bool:
         if not self.bot_token or not self.chat_id:
             logger.debug("Telegram not configured, skipping alert")
             return False
 
-        icon = {"info": "ℹ️", "warning": "⚠️", "critical": "🚨"}.get(event.level, "📢")
-        text = (
-            f"{icon} *Sentinel DDoS Alert*\n\n"
-            f"*{event.title}*\n"
-            f"{event.message}\n"
-        )
+        icon = _TG_ICONS.get(event.level, _TG_DEFAULT_ICON)
+        title = event.title.translate(_TG_MD_ESCAPE)
+        message = event.message.translate(_TG_MD_ESCAPE)
+        parts = [
+            f"{icon} *Sentinel DDoS Alert*\n\n*{title}*\n{message}\n",
+        ]
         if event.source_ip:
-            text += f"\n🌐 Source IP: `{event.source_ip}`"
+            parts.append(f"\n🌐 Source IP: `{event.source_ip}`")
         if event.attack_type:
-            text += f"\n🎯 Attack type: `{event.attack_type}`"
+            parts.append(f"\n🎯 Attack type: `{event.attack_type}`")
+        text = "".join(parts)
 
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(url, json={
-                    "chat_id": self.chat_id,
-                    "text": text,
-                    "parse_mode": "Markdown",
-                })
-                resp.raise_for_status()
-                logger.info("Telegram alert sent: %s", event.title)
-                return True
+            resp = await self._get_client().post(self._url, json={
+                "chat_id": self.chat_id,
+                "text": text,
+                "parse_mode": "Markdown",
+            })
+            resp.raise_for_status()
+            logger.info("Telegram alert sent: %s", event.title)
+            return True
         except Exception:
             logger.exception("Failed to send Telegram alert")
             return False
@@ -84,6 +116,7 @@ class WebhookAlert(AlertDispatcher):
     """Send alerts via configurable webhook URL."""
 
     def __init__(self, url: Optional[str] = None) -> None:
+        super().__init__()
         self.url = url or settings.webhook_url
 
     async def send(self, event: AlertEvent) -> bool:
@@ -100,11 +133,10 @@ class WebhookAlert(AlertDispatcher):
             "metadata": event.metadata,
         }
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(self.url, json=payload, timeout=10)
-                resp.raise_for_status()
-                logger.info("Webhook alert sent: %s", event.title)
-                return True
+            resp = await self._get_client().post(self.url, json=payload)
+            resp.raise_for_status()
+            logger.info("Webhook alert sent: %s", event.title)
+            return True
         except Exception:
             logger.exception("Failed to send webhook alert")
             return False
@@ -119,12 +151,30 @@ class AlertManager:
             WebhookAlert(),
         ]
 
-    async def alert(self, event: AlertEvent) -> None:
+    async def start(self) -> None:
+        """Open HTTP clients for all dispatchers."""
+        for dispatcher in self.dispatchers:
+            await dispatcher.start()
+
+    async def aclose(self) -> None:
+        """Close HTTP clients for all dispatchers."""
         for dispatcher in self.dispatchers:
             try:
-                await dispatcher.send(event)
+                await dispatcher.aclose()
             except Exception:
-                logger.exception("Dispatcher %s failed", type(dispatcher).__name__)
+                logger.exception("Failed to close %s", type(dispatcher).__name__)
+
+    async def alert(self, event: AlertEvent) -> None:
+        """Send to all dispatchers concurrently — a slow one doesn't delay the rest."""
+        await asyncio.gather(*(self._safe_send(d, event) for d in self.dispatchers))
+
+    @staticmethod
+    async def _safe_send(dispatcher: AlertDispatcher, event: AlertEvent) -> bool:
+        try:
+            return await dispatcher.send(event)
+        except Exception:
+            logger.exception("Dispatcher %s failed", type(dispatcher).__name__)
+            return False
 
 
 alert_manager = AlertManager()
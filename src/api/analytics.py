@@ -7,50 +7,97 @@ and aggregated statistics from the database.
 
 from __future__ import annotations
 
+import base64
+import binascii
 import time
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Query
-from sqlalchemy import func, select, and_, desc, text
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy import func, lambda_stmt, null, select, and_, desc, text, tuple_, union_all
 
-from src.storage.database import async_session, AttackLog, TrafficSnapshot
+from src.storage.cache import cached
+from src.storage.database import async_session, utc_now, AttackLog, TrafficSnapshot
+from src.storage.rollup import EPOCH, attack_rows, attack_source, to_epoch
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+# Responses are cached in Redis; dashboards poll far more often than this
+CACHE_NAMESPACE = "analytics"
+
+# Actions broken out as separate counters in timeline buckets
+_TIMELINE_ACTIONS = frozenset({"blocked", "rate_limited", "challenged", "monitored"})
+
+
+def _encode_cursor(ts: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for the row at (timestamp, id)."""
+    micros = (ts - EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{row_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        micros, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return EPOCH + timedelta(microseconds=int(micros)), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 
 @router.get("/attacks")
+@cached(CACHE_NAMESPACE, expire=15)
 async def get_attack_history(
     hours: int = Query(24, ge=1, le=720, description="Hours of history"),
     limit: int = Query(100, ge=1, le=1000),
     attack_type: Optional[str] = Query(None),
     action: Optional[str] = Query(None),
     ip: Optional[str] = Query(None),
+    before: Optional[str] = Query(None, description="next_cursor from the previous page"),
 ):
     """
-    Return recent attack events from the database.
+    Return recent attack events from the database, newest first.
     Supports filtering by time window, attack type, action, and IP.
+    Pages with a keyset cursor: pass ``next_cursor`` back as ``before``.
     """
-    since = datetime.utcnow() - timedelta(hours=hours)
+    since = utc_now() - timedelta(hours=hours)
+    cursor = _decode_cursor(before) if before else None
     async with async_session() as session:
-        stmt = select(AttackLog).where(AttackLog.timestamp >= since)
+        # Plain column rows — no ORM instances or identity map. Built as
+        # a lambda statement so the construct is cached per filter combo
+        # and only the bound values change between requests.
+        stmt = lambda_stmt(lambda: select(
+            AttackLog.id,
+            AttackLog.timestamp,
+            AttackLog.source_ip,
+            AttackLog.attack_type,
+            AttackLog.threat_score,
+            AttackLog.action_taken,
+            AttackLog.path,
+            AttackLog.method,
+            AttackLog.user_agent,
+        ).where(AttackLog.timestamp >= since))
 
         if attack_type:
-            stmt = stmt.where(AttackLog.attack_type == attack_type)
+            stmt += lambda s: s.where(AttackLog.attack_type == attack_type)
         if action:
-            stmt = stmt.where(AttackLog.action_taken == action)
+            stmt += lambda s: s.where(AttackLog.action_taken == action)
         if ip:
-            stmt = stmt.where(AttackLog.source_ip == ip)
-
-        stmt = stmt.order_by(desc(AttackLog.timestamp)).limit(limit)
-        result = await session.execute(stmt)
-        rows = result.scalars().all()
+            stmt += lambda s: s.where(AttackLog.source_ip == ip)
+        if cursor:
+            cursor_ts, cursor_id = cursor
+            stmt += lambda s: s.where(
+                tuple_(AttackLog.timestamp, AttackLog.id) < tuple_(cursor_ts, cursor_id)
+            )
 
-    return {
-        "attacks": [
-            {
+        stmt += lambda s: s.order_by(desc(AttackLog.timestamp), desc(AttackLog.id)).limit(limit)
+        # Stream in chunks and serialise as rows arrive, rather than
+        # holding every fetched row and the output list at once
+        result = await session.stream(stmt, execution_options={"yield_per": 200})
+        attacks = []
+        last = None
+        async for r in result:
+            attacks.append({
                 "id": r.id,
-                "timestamp": r.timestamp.isoformat() if r.timestamp is not None else None,
+                "timestamp": to_epoch(r.timestamp) if r.timestamp is not None else None,
                 "source_ip": r.source_ip,
                 "attack_type": r.attack_type,
                 "threat_score": r.threat_score,
@@ -58,15 +105,21 @@ async def get_attack_history(
                 "path": r.path,
                 "method": r.method,
                 "user_agent": r.user_agent,
-            }
-            for r in rows
-        ],
-        "count": len(rows),
+            })
+            last = r
+
+    return {
+        "attacks": attacks,
+        "count": len(attacks),
+        "next_cursor": (
+            _encode_cursor(last.timestamp, last.id) if len(attacks) == limit else None
+        ),
         "window_hours": hours,
     }
 
 
 @router.get("/attacks/timeline")
+@cached(CACHE_NAMESPACE, expire=30)
 async def get_attack_timeline(
     hours: int = Query(24, ge=1, le=720),
     bucket_minutes: int = Query(5, ge=1, le=60),
@@ -75,29 +128,28 @@ async def get_attack_timeline(
     Return attack counts bucketed by time intervals.
     Useful for time-series charts.
     """
-    since = datetime.utcnow() - timedelta(hours=hours)
+    since = utc_now() - timedelta(hours=hours)
+    bucket_sec = bucket_minutes * 60
     async with async_session() as session:
-        # Fetch all attacks in the time window
+        # Aggregate in the database — only one row per
+        # (bucket, action, attack type) comes back
+        src = attack_source(session, since)
+        bucket = ((src.c.bucket_ts // bucket_sec) * bucket_sec).label("bucket")
         stmt = (
-            select(AttackLog.timestamp, AttackLog.attack_type, AttackLog.action_taken)
-            .where(AttackLog.timestamp >= since)
-            .order_by(AttackLog.timestamp)
+            select(bucket, src.c.action_taken, src.c.attack_type, func.sum(src.c.count))
+            .group_by(bucket, src.c.action_taken, src.c.attack_type)
         )
         result = await session.execute(stmt)
         rows = result.all()
 
-    # Bucket into time intervals
-    bucket_sec = bucket_minutes * 60
     buckets: dict[int, dict] = {}
 
-    for ts, attack_type, action in rows:
-        if ts is None:
+    for bucket_key, action, attack_type, count in rows:
+        if bucket_key is None:
             continue
-        epoch = int(ts.timestamp())
-        bucket_key = (epoch // bucket_sec) * bucket_sec
-
-        if bucket_key not in buckets:
-            buckets[bucket_key] = {
+        b = buckets.get(bucket_key)
+        if b is None:
+            b = buckets[bucket_key] = {
                 "timestamp": bucket_key,
                 "total": 0,
                 "blocked": 0,
@@ -106,20 +158,11 @@ async def get_attack_timeline(
                 "monitored": 0,
                 "by_type": {},
             }
-        b = buckets[bucket_key]
-        b["total"] += 1
-
-        if action == "blocked":
-            b["blocked"] += 1
-        elif action == "rate_limited":
-            b["rate_limited"] += 1
-        elif action == "challenged":
-            b["challenged"] += 1
-        elif action == "monitored":
-            b["monitored"] += 1
-
+        b["total"] += count
+        if action in _TIMELINE_ACTIONS:
+            b[action] += count
         if attack_type:
-            b["by_type"][attack_type] = b["by_type"].get(attack_type, 0) + 1
+            b["by_type"][attack_type] = b["by_type"].get(attack_type, 0) + count
 
     # Sort by time
     timeline = sorted(buckets.values(), key=lambda x: x["timestamp"])
@@ -132,6 +175,7 @@ async def get_attack_timeline(
 
 
 @router.get("/attacks/top-ips")
+@cached(CACHE_NAMESPACE, expire=30)
 async def get_top_attacking_ips(
     hours: int = Query(24, ge=1, le=720),
     limit: int = Query(20, ge=1, le=100),
@@ -139,17 +183,17 @@ async def get_top_attacking_ips(
     """
     Return the top attacking IPs by event count.
     """
-    since = datetime.utcnow() - timedelta(hours=hours)
+    since = utc_now() - timedelta(hours=hours)
     async with async_session() as session:
+        src = attack_source(session, since)
         stmt = (
             select(
-                AttackLog.source_ip,
-                func.count().label("event_count"),
-                func.avg(AttackLog.threat_score).label("avg_score"),
-                func.max(AttackLog.timestamp).label("last_seen"),
+                src.c.source_ip,
+                func.sum(src.c.count).label("event_count"),
+                (func.sum(src.c.sum_score) / func.sum(src.c.count)).label("avg_score"),
+                func.max(src.c.last_seen).label("last_seen"),
             )
-            .where(AttackLog.timestamp >= since)
-            .group_by(AttackLog.source_ip)
+            .group_by(src.c.source_ip)
             .order_by(desc("event_count"))
             .limit(limit)
         )
@@ -162,7 +206,7 @@ async def get_top_attacking_ips(
                 "ip": r.source_ip,
                 "event_count": r.event_count,
                 "avg_score": round(float(r.avg_score or 0), 3),
-                "last_seen": r.last_seen.isoformat() if r.last_seen else None,
+                "last_seen": to_epoch(r.last_seen) if r.last_seen else None,
             }
             for r in rows
         ],
@@ -171,22 +215,23 @@ async def get_top_attacking_ips(
 
 
 @router.get("/attacks/by-type")
+@cached(CACHE_NAMESPACE, expire=30)
 async def get_attacks_by_type(
     hours: int = Query(24, ge=1, le=720),
 ):
     """
     Aggregate attack counts by attack_type.
     """
-    since = datetime.utcnow() - timedelta(hours=hours)
+    since = utc_now() - timedelta(hours=hours)
     async with async_session() as session:
+        src = attack_source(session, since)
         stmt = (
             select(
-                AttackLog.attack_type,
-                func.count().label("count"),
-                func.avg(AttackLog.threat_score).label("avg_score"),
+                src.c.attack_type,
+                func.sum(src.c.count).label("count"),
+                (func.sum(src.c.sum_score) / func.sum(src.c.count)).label("avg_score"),
             )
-            .where(AttackLog.timestamp >= since)
-            .group_by(AttackLog.attack_type)
+            .group_by(src.c.attack_type)
             .order_by(desc("count"))
         )
         result = await session.execute(stmt)
@@ -206,41 +251,40 @@ async def get_attacks_by_type(
 
 
 @router.get("/summary")
+@cached(CACHE_NAMESPACE, expire=30)
 async def get_analytics_summary(
     hours: int = Query(24, ge=1, le=720),
 ):
     """
     High-level summary of attack activity.
     """
-    since = datetime.utcnow() - timedelta(hours=hours)
+    since = utc_now() - timedelta(hours=hours)
     async with async_session() as session:
-        # Total events
-        total_q = await session.execute(
-            select(func.count()).select_from(AttackLog).where(AttackLog.timestamp >= since)
-        )
-        total = total_q.scalar() or 0
-
-        # Unique IPs
-        ips_q = await session.execute(
-            select(func.count(func.distinct(AttackLog.source_ip))).where(
-                AttackLog.timestamp >= since
-            )
-        )
-        unique_ips = ips_q.scalar() or 0
-
-        # Average score
-        score_q = await session.execute(
-            select(func.avg(AttackLog.threat_score)).where(AttackLog.timestamp >= since)
+        # One round trip: a totals row (action NULL) plus one row per
+        # action, both read from the same CTE
+        src = attack_rows(session, since).cte("attacks")
+        stmt = union_all(
+            select(
+                null().label("action_taken"),
+                func.sum(src.c.count),
+                func.count(func.distinct(src.c.source_ip)),
+                func.sum(src.c.sum_score),
+            ),
+            select(src.c.action_taken, func.sum(src.c.count), null(), null())
+            .group_by(src.c.action_taken),
         )
-        avg_score = score_q.scalar() or 0
+        result = await session.execute(stmt)
+        rows = result.all()
 
-        # Action distribution
-        action_q = await session.execute(
-            select(AttackLog.action_taken, func.count().label("cnt"))
-            .where(AttackLog.timestamp >= since)
-            .group_by(AttackLog.action_taken)
-        )
-        actions = {r.action_taken: r.cnt for r in action_q.all()}
+    total = unique_ips = 0
+    score_sum = 0.0
+    actions = {}
+    for action, count, ips, scores in rows:
+        if action is None:
+            total, unique_ips, score_sum = count or 0, ips or 0, scores or 0
+        else:
+            actions[action] = count
+    avg_score = score_sum / total if total else 0
 
     return {
         "window_hours": hours,
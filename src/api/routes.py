@@ -6,17 +6,19 @@ Dashboard API: stats, traffic, blocking, settings, events.
 
 from __future__ import annotations
 
+import asyncio
 import time
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 from src.config import settings, ProtectionLevel
 from src.mitigation.blocker import ip_blocker
 from src.detection.engine import detection_engine
 from src.proxy.handler import traffic
-from src.geoip.lookup import lookup as geoip_lookup
+from src.geoip.lookup import lookup as geoip_lookup, lookup_batch as geoip_lookup_batch
 
 router = APIRouter(tags=["Dashboard API"])
 
@@ -66,25 +68,27 @@ _start_time = time.time()
 # ── Endpoints ────────────────────────────────────────────
 
 
-@router.get("/stats", response_model=StatsResponse)
+# StatsResponse documents the shape; the dict is sent as-is, skipping
+# per-request model validation on this 1 Hz dashboard poll
+@router.get("/stats", responses={200: {"model": StatsResponse}})
 async def get_stats():
     """Return current system stats for dashboard."""
     blocked = await ip_blocker.get_blocked_ips()
-    return StatsResponse(
-        uptime=time.time() - _start_time,
-        protection_level=settings.protection_level.value,
-        under_attack_mode=settings.under_attack_mode,
-        baseline_ready=detection_engine.baseline.is_ready,
-        observation_count=detection_engine.baseline.observation_count,
-        blocked_ips_count=len(blocked),
-        target_url=settings.target_url,
-        total_requests=traffic.total_requests,
-        forwarded_requests=traffic.forwarded_requests,
-        blocked_requests=traffic.blocked_requests,
-        rate_limited_requests=traffic.rate_limited_requests,
-        requests_per_second=round(traffic.requests_per_second, 2),
-        active_ips_count=len(traffic.active_ips),
-    )
+    return ORJSONResponse({
+        "uptime": time.time() - _start_time,
+        "protection_level": settings.protection_level.value,
+        "under_attack_mode": settings.under_attack_mode,
+        "baseline_ready": detection_engine.baseline.is_ready,
+        "observation_count": detection_engine.baseline.observation_count,
+        "blocked_ips_count": len(blocked),
+        "target_url": settings.target_url,
+        "total_requests": traffic.total_requests,
+        "forwarded_requests": traffic.forwarded_requests,
+        "blocked_requests": traffic.blocked_requests,
+        "rate_limited_requests": traffic.rate_limited_requests,
+        "requests_per_second": round(traffic.requests_per_second, 2),
+        "active_ips_count": len(traffic.active_ips),
+    })
 
 
 @router.get("/blocked")
@@ -132,8 +136,7 @@ async def toggle_under_attack(req: UnderAttackRequest):
 @router.get("/events")
 async def get_recent_events():
     """Return recent security events for the threat feed."""
-    events = list(traffic.recent_events)
-    events.reverse()  # newest first
+    events = traffic.recent()
     return {"events": events, "count": len(events)}
 
 
@@ -174,27 +177,24 @@ async def get_attack_map():
     Return geo-aggregated attack data for the world map.
     Collects unique attacking IPs from recent events with GeoIP.
     """
-    # Aggregate by country from recent blocked/rate_limited events
-    geo_points: list[dict] = []
-    seen_ips: set[str] = set()
-
+    # Unique attacking IPs, keeping the first matching event for each
+    attack_events: dict[str, dict] = {}
     for ev in traffic.recent_events:
-        ip = ev.get("ip", "")
-        action = ev.get("action", "")
-        if action not in ("blocked", "rate_limited", "auto_blocked", "challenged"):
+        if ev.get("action", "") not in ("blocked", "rate_limited", "auto_blocked", "challenged"):
             continue
-        if ip in seen_ips:
-            continue
-        seen_ips.add(ip)
+        attack_events.setdefault(ev.get("ip", ""), ev)
 
-        geo = ev.get("geo")
-        if not geo:
-            geo_result = geoip_lookup(ip)
-            geo = geo_result.to_dict()
+    # Events only carry geo once a feed has read them; resolve the rest in one worker hop
+    missing = [ip for ip, ev in attack_events.items() if not ev.get("geo")]
+    looked_up = await asyncio.to_thread(geoip_lookup_batch, missing) if missing else []
+    geo_by_ip = {ip: geo.to_dict() for ip, geo in zip(missing, looked_up)}
 
+    geo_points: list[dict] = []
+    for ip, ev in attack_events.items():
+        geo = ev.get("geo") or geo_by_ip[ip]
         geo_points.append({
             "ip": ip,
-            "action": action,
+            "action": ev["action"],
             "latitude": geo["latitude"],
             "longitude": geo["longitude"],
             "country_code": geo["country_code"],
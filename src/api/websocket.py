@@ -7,11 +7,11 @@ Real-time traffic feed and attack events for the dashboard.
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import time
-from typing import Set
+from typing import Optional, Set
 
+import orjson
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 from src.detection.engine import detection_engine
@@ -25,6 +25,103 @@ router = APIRouter(tags=["WebSocket"])
 _connections: Set[WebSocket] = set()
 
 
+def _traffic_stats(new_events: list[dict]) -> str:
+    """Serialise the current traffic counters plus ``new_events``."""
+    return orjson.dumps({
+        "type": "traffic",
+        "timestamp": time.time(),
+        "rps": round(traffic.requests_per_second, 2),
+        "total_requests": traffic.total_requests,
+        "blocked_requests": traffic.blocked_requests,
+        "rate_limited_requests": traffic.rate_limited_requests,
+        "forwarded_requests": traffic.forwarded_requests,
+        "challenged_requests": traffic.challenged_requests,
+        "active_ips": len(traffic.active_ips),
+        "observation_count": detection_engine.baseline.observation_count,
+        "baseline_ready": detection_engine.baseline.is_ready,
+        "mean_rps": round(detection_engine.baseline.mean_rps, 2),
+        "new_events": new_events,
+    }).decode()
+
+
+class TrafficBroadcaster:
+    """
+    Builds the traffic stats once per tick and shares them with every feed.
+
+    Each tick's payload carries the events added since the previous
+    tick; feeds wait on ``next_payload`` instead of polling the
+    counters themselves. Every feed keeps its own event cursor, so one
+    that was still sending when a tick fired gets its own payload with
+    the events it missed rather than losing them.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        self.interval = interval
+        self.last_seq = 0
+        self._since = 0  # event seq the shared payload starts after
+        self._payload = ""
+        self._tick = asyncio.Event()
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Start the background tick loop."""
+        self._running = True
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background tick loop."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def next_payload(self, seq: int) -> tuple[str, int]:
+        """
+        Wait for the next tick and return its serialised stats with the
+        events after ``seq``, plus the feed's new cursor.
+        """
+        await self._tick.wait()
+        if seq == self._since:
+            return self._payload, self.last_seq
+        # Feed fell behind a tick: build its catch-up payload
+        return _traffic_stats(traffic.events_since(seq)), traffic.event_seq
+
+    def tick(self) -> None:
+        """Build this tick's payload and wake every waiting feed."""
+        self._since = self.last_seq
+        new_events = traffic.events_since(self._since)
+        self.last_seq = traffic.event_seq
+        self._payload = _traffic_stats(new_events)
+        self._tick.set()
+        self._tick.clear()
+
+    async def _loop(self) -> None:
+        # Fixed monotonic schedule: a slow tick doesn't push later ones back
+        next_tick = time.monotonic()
+        while self._running:
+            try:
+                if _connections:
+                    self.tick()
+                else:
+                    self.last_seq = traffic.event_seq
+                next_tick += self.interval
+                now = time.monotonic()
+                if next_tick < now:
+                    next_tick = now  # fell behind; skip missed ticks
+                await asyncio.sleep(next_tick - now)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in traffic broadcaster")
+
+
+traffic_broadcaster = TrafficBroadcaster()
+
+
 @router.websocket("/traffic")
 async def traffic_feed(websocket: WebSocket):
     """
@@ -41,32 +138,15 @@ async def traffic_feed(websocket: WebSocket):
     _connections.add(websocket)
     logger.info("Dashboard connected (total: %d)", len(_connections))
 
-    last_event_count = 0
-
     try:
+        # First push: the buffered backlog; later pushes carry the events
+        # after this feed's cursor
+        seq = traffic.event_seq
+        await websocket.send_text(_traffic_stats(traffic.events_since(0)))
+
         while True:
-            # Gather current events that are new since last push
-            all_events = list(traffic.recent_events)
-            new_events = all_events[last_event_count:] if last_event_count < len(all_events) else []
-            last_event_count = len(all_events)
-
-            stats = {
-                "type": "traffic",
-                "timestamp": time.time(),
-                "rps": round(traffic.requests_per_second, 2),
-                "total_requests": traffic.total_requests,
-                "blocked_requests": traffic.blocked_requests,
-                "rate_limited_requests": traffic.rate_limited_requests,
-                "forwarded_requests": traffic.forwarded_requests,
-                "challenged_requests": traffic.challenged_requests,
-                "active_ips": len(traffic.active_ips),
-                "observation_count": detection_engine.baseline.observation_count,
-                "baseline_ready": detection_engine.baseline.is_ready,
-                "mean_rps": round(detection_engine.baseline.mean_rps, 2),
-                "new_events": new_events,
-            }
-            await websocket.send_text(json.dumps(stats))
-            await asyncio.sleep(1)
+            payload, seq = await traffic_broadcaster.next_payload(seq)
+            await websocket.send_text(payload)
     except WebSocketDisconnect:
         pass
     except Exception:
@@ -80,12 +160,11 @@ async def broadcast_event(event: dict) -> None:
     """Broadcast an event to all connected dashboards."""
     if not _connections:
         return
-    message = json.dumps(event)
-    dead: list[WebSocket] = []
-    for ws in _connections:
-        try:
-            await ws.send_text(message)
-        except Exception:
-            dead.append(ws)
-    for ws in dead:
-        _connections.discard(ws)
+    message = orjson.dumps(event).decode()
+    targets = list(_connections)
+    results = await asyncio.gather(
+        *(ws.send_text(message) for ws in targets), return_exceptions=True,
+    )
+    for ws, result in zip(targets, results):
+        if isinstance(result, Exception):
+            _connections.discard(ws)
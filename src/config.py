@@ -54,6 +54,12 @@ class Settings(BaseSettings):
         default="sqlite+aiosqlite:///./sentinel.db",
         description="SQLAlchemy database URL for persistent storage",
     )
+    database_pool_size: int = Field(
+        default=20, description="Persistent connections kept in the DB pool",
+    )
+    database_max_overflow: int = Field(
+        default=30, description="Extra connections allowed above the pool size",
+    )
 
     # ── Protection ───────────────────────────────────────────
     protection_level: ProtectionLevel = ProtectionLevel.MONITOR
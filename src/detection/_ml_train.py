@@ -0,0 +1,32 @@
+"""
+Sentinel DDoS — ML training entry point.
+
+Runs in the spawned training process, which unpickles ``fit_model`` by
+reference and so imports this module. It must stay free of import-time
+side effects (no model singleton, no disk I/O) and only needs
+numpy/sklearn.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+
+def fit_model(
+    X: np.ndarray, n_estimators: int, contamination: float, max_samples: int,
+) -> tuple[IsolationForest, StandardScaler]:
+    """Fit scaler + IsolationForest (runs in the training process)."""
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    model = IsolationForest(
+        n_estimators=n_estimators,
+        contamination=contamination,
+        max_samples=min(len(X_scaled), max_samples),
+        random_state=42,
+        n_jobs=-1,
+    )
+    model.fit(X_scaled)
+    return model, scaler
@@ -8,10 +8,10 @@ and provides statistical baselines for anomaly detection.
 from __future__ import annotations
 
 import logging
+import math
 import time
-from collections import deque
 from dataclasses import dataclass, field
-from typing import Deque, Dict
+from typing import Dict
 
 import numpy as np
 
@@ -36,13 +36,31 @@ class BaselineModel:
     """
     Sliding-window baseline that keeps traffic observations
     and computes statistical summaries (mean, std) for scoring.
+
+    Observations are stored column-wise in numpy ring buffers, with
+    running sums of the header count and content length kept up to date
+    on insert/evict, so ``update_model`` does not rescan the window.
     """
 
+    INITIAL_CAPACITY = 4096
+
     def __init__(self, window_sec: int = DEFAULT_WINDOW_SEC) -> None:
         self.window_sec = window_sec
-        self._observations: Deque[dict] = deque()
         self._ips_seen: set = set()
 
+        # Ring buffers: oldest observation at _head, _size in use
+        self._ts = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._hc = np.empty(self.INITIAL_CAPACITY, dtype=np.int32)
+        self._cl = np.empty(self.INITIAL_CAPACITY, dtype=np.int64)
+        self._head = 0
+        self._size = 0
+
+        # Exact integer sums over the window
+        self._sum_hc = 0
+        self._sumsq_hc = 0
+        self._sum_cl = 0
+        self._sumsq_cl = 0
+
         # Computed baselines (updated periodically)
         self.mean_rps: float = 0.0
         self.std_rps: float = 1.0
@@ -54,39 +72,57 @@ class BaselineModel:
 
     @property
     def observation_count(self) -> int:
-        return len(self._observations)
+        return self._size
 
     def record_observation(self, features: dict) -> None:
         """Append a new observation and evict old ones outside the window."""
-        self._observations.append(features)
+        if self._size == len(self._ts):
+            self._grow()
+        i = (self._head + self._size) % len(self._ts)
+        hc = int(features.get("header_count", 0))
+        cl = int(features.get("content_length", 0))
+        self._ts[i] = features["timestamp"]
+        self._hc[i] = hc
+        self._cl[i] = cl
+        self._size += 1
+        self._sum_hc += hc
+        self._sumsq_hc += hc * hc
+        self._sum_cl += cl
+        self._sumsq_cl += cl * cl
+
         self._ips_seen.add(features.get("client_ip"))
         self._evict_old()
 
     def update_model(self) -> None:
         """Recompute baseline statistics from the observation window."""
         self._evict_old()
-        n = len(self._observations)
+        n = self._size
         if n < 100:
             logger.debug("Not enough observations for baseline (%d)", n)
             return
 
-        header_counts = np.array([o.get("header_count", 0) for o in self._observations])
-        content_lengths = np.array([o.get("content_length", 0) for o in self._observations])
-
-        # RPS: requests per second over window buckets
-        timestamps = np.array([o["timestamp"] for o in self._observations])
-        span = timestamps[-1] - timestamps[0]
+        # RPS: requests per second over ~1-minute buckets. The span is
+        # split into whole, equal-width bins (as np.histogram would), so
+        # no partial trailing bucket drags the mean down or inflates the
+        # std. The mean follows from n; only the std needs the
+        # per-bucket counts, binned straight from the ring buffer
+        # without unwrapping it.
+        oldest = self._ts[self._head]
+        newest = self._ts[(self._head + n - 1) % len(self._ts)]
+        span = newest - oldest
         if span > 0:
-            bucket_size = 60  # 1-minute buckets
+            bucket_size = 60
             n_buckets = max(1, int(span / bucket_size))
-            rps_values = np.histogram(timestamps, bins=n_buckets)[0] / bucket_size
-            self.mean_rps = float(np.mean(rps_values))
-            self.std_rps = float(np.std(rps_values)) or 1.0
-
-        self.mean_header_count = float(np.mean(header_counts))
-        self.std_header_count = float(np.std(header_counts)) or 1.0
-        self.mean_content_length = float(np.mean(content_lengths))
-        self.std_content_length = float(np.std(content_lengths)) or 1.0
+            counts = np.zeros(n_buckets, dtype=np.int64)
+            for seg in self._segments(self._ts):
+                ids = ((seg - oldest) * (n_buckets / span)).astype(np.intp)
+                np.clip(ids, 0, n_buckets - 1, out=ids)  # last edge, clock steps
+                counts += np.bincount(ids, minlength=n_buckets)
+            self.mean_rps = n / (n_buckets * bucket_size)
+            self.std_rps = float(counts.std()) / bucket_size or 1.0
+
+        self.mean_header_count, self.std_header_count = _mean_std(n, self._sum_hc, self._sumsq_hc)
+        self.mean_content_length, self.std_content_length = _mean_std(n, self._sum_cl, self._sumsq_cl)
         self.is_ready = True
 
         logger.info(
@@ -94,7 +130,38 @@ class BaselineModel:
             self.mean_rps, self.std_rps, n, len(self._ips_seen),
         )
 
+    def _segments(self, buf: np.ndarray) -> tuple[np.ndarray, ...]:
+        """Views of the observations in ``buf``, oldest first (two if wrapped)."""
+        end = self._head + self._size
+        if end <= len(buf):
+            return (buf[self._head:end],)
+        return buf[self._head:], buf[:end - len(buf)]
+
+    def _grow(self) -> None:
+        """Double the ring buffers, unwrapping them so the oldest is at 0."""
+        capacity = 2 * len(self._ts)
+        for name in ("_ts", "_hc", "_cl"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            np.concatenate(self._segments(old), out=new[:self._size])
+            setattr(self, name, new)
+        self._head = 0
+
     def _evict_old(self) -> None:
         cutoff = time.time() - self.window_sec
-        while self._observations and self._observations[0]["timestamp"] < cutoff:
-            self._observations.popleft()
+        while self._size and self._ts[self._head] < cutoff:
+            hc = int(self._hc[self._head])
+            cl = int(self._cl[self._head])
+            self._sum_hc -= hc
+            self._sumsq_hc -= hc * hc
+            self._sum_cl -= cl
+            self._sumsq_cl -= cl * cl
+            self._head = (self._head + 1) % len(self._ts)
+            self._size -= 1
+
+
+def _mean_std(n: int, total: int, total_sq: int) -> tuple[float, float]:
+    """Mean and population std from exact sums; a zero std becomes 1.0."""
+    mean = total / n
+    variance = (n * total_sq - total * total) / (n * n)
+    return mean, math.sqrt(variance) or 1.0
@@ -13,9 +13,9 @@ from __future__ import annotations
 import logging
 import math
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass, field
-from typing import Deque
+from typing import Deque, Dict
 from collections import deque
 
 logger = logging.getLogger("sentinel.detection.behavior")
@@ -25,20 +25,46 @@ SESSION_TTL = 600
 # Maximum number of IPs to track concurrently
 MAX_TRACKED = 50_000
 
+# Bit per HTTP method for IPSession.methods_used
+_METHOD_BITS = {
+    m: 1 << i
+    for i, m in enumerate(("GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"))
+}
+_OTHER_METHOD_BIT = 1 << len(_METHOD_BITS)
 
-@dataclass
+# Scoring only asks whether a session has seen more than 1 UA, or more
+# than 2 languages / header orders, so stop collecting past that
+_MAX_USER_AGENTS = 2
+_MAX_ACCEPT_LANGUAGES = 3
+_MAX_HEADER_ORDERS = 3
+
+# Inter-arrival stats cover the current bucket plus the previous full
+# one, i.e. the last 100–200 intervals
+IAT_BUCKET = 100
+
+# Session timing is internal only, so use a clock that NTP can't step back
+_now = time.monotonic
+
+
+@dataclass(slots=True)
 class IPSession:
     """Accumulated behavior signals for a single client IP."""
     first_seen: float = 0.0
     last_seen: float = 0.0
     request_count: int = 0
 
-    # Timing
-    inter_arrival_times: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+    # Timing: Welford accumulators (count, mean, M2) for two buckets
+    iat_n: int = 0
+    iat_mean: float = 0.0
+    iat_m2: float = 0.0
+    prev_iat_n: int = 0
+    prev_iat_mean: float = 0.0
+    prev_iat_m2: float = 0.0
 
     # Navigation
     paths_visited: Deque[str] = field(default_factory=lambda: deque(maxlen=100))
-    methods_used: set = field(default_factory=set)
+    path_counts: Dict[str, int] = field(default_factory=dict)  # over paths_visited
+    methods_used: int = 0  # bitmask of _METHOD_BITS
     has_referer: bool = False
     has_cookies: bool = False
 
@@ -58,26 +84,57 @@ class IPSession:
         cookie: str | None,
         header_order_hash: str,
     ) -> None:
-        if self.first_seen == 0:
+        if self.request_count:
+            self._add_interval(now - self.last_seen)
+        else:
             self.first_seen = now
-        if self.last_seen > 0:
-            delta = now - self.last_seen
-            self.inter_arrival_times.append(delta)
         self.last_seen = now
         self.request_count += 1
 
-        self.paths_visited.append(path)
-        self.methods_used.add(method)
-        if user_agent:
+        paths = self.paths_visited
+        if len(paths) == paths.maxlen:
+            # The append below pushes the oldest path out of the window
+            dropped = paths[0]
+            left = self.path_counts[dropped] - 1
+            if left:
+                self.path_counts[dropped] = left
+            else:
+                del self.path_counts[dropped]
+        paths.append(path)
+        self.path_counts[path] = self.path_counts.get(path, 0) + 1
+        self.methods_used |= _METHOD_BITS.get(method, _OTHER_METHOD_BIT)
+        if user_agent and len(self.user_agents) < _MAX_USER_AGENTS:
             self.user_agents.add(user_agent)
-        if accept_language:
+        if accept_language and len(self.accept_languages) < _MAX_ACCEPT_LANGUAGES:
             self.accept_languages.add(accept_language)
-        self.header_order_hashes.add(header_order_hash)
+        if len(self.header_order_hashes) < _MAX_HEADER_ORDERS:
+            self.header_order_hashes.add(header_order_hash)
         if referer:
             self.has_referer = True
         if cookie:
             self.has_cookies = True
 
+    def _add_interval(self, delta: float) -> None:
+        self.iat_n += 1
+        d = delta - self.iat_mean
+        self.iat_mean += d / self.iat_n
+        self.iat_m2 += d * (delta - self.iat_mean)
+        if self.iat_n == IAT_BUCKET:
+            self.prev_iat_n, self.prev_iat_mean, self.prev_iat_m2 = self.iat_n, self.iat_mean, self.iat_m2
+            self.iat_n, self.iat_mean, self.iat_m2 = 0, 0.0, 0.0
+
+    def interval_stats(self) -> tuple[int, float, float]:
+        """(count, mean, population variance) of recent inter-arrival times."""
+        n_a, n_b = self.prev_iat_n, self.iat_n
+        n = n_a + n_b
+        if n == 0:
+            return 0, 0.0, 0.0
+        # Chan et al. merge of the two buckets
+        d = self.iat_mean - self.prev_iat_mean
+        mean = self.prev_iat_mean + d * n_b / n
+        m2 = self.prev_iat_m2 + self.iat_m2 + d * d * n_a * n_b / n
+        return n, mean, m2 / n
+
 
 class BehaviorAnalyzer:
     """
@@ -89,7 +146,8 @@ class BehaviorAnalyzer:
     """
 
     def __init__(self) -> None:
-        self._sessions: dict[str, IPSession] = {}
+        # Least recently seen first: every request moves its IP to the end
+        self._sessions: OrderedDict[str, IPSession] = OrderedDict()
         self._last_cleanup: float = 0.0
 
     def record_and_score(
@@ -104,17 +162,18 @@ class BehaviorAnalyzer:
         header_order_hash: str,
     ) -> float:
         """Record the request to the IP's session and return a bot score."""
-        now = time.time()
+        now = _now()
         self._maybe_cleanup(now)
 
         session = self._sessions.get(client_ip)
         if session is None:
             session = IPSession()
-            # Evict oldest if at capacity
+            # Evict least recently seen if at capacity
             if len(self._sessions) >= MAX_TRACKED:
-                oldest_ip = min(self._sessions, key=lambda k: self._sessions[k].last_seen)
-                del self._sessions[oldest_ip]
+                self._sessions.popitem(last=False)
             self._sessions[client_ip] = session
+        else:
+            self._sessions.move_to_end(client_ip)
 
         session.record(
             now=now,
@@ -127,14 +186,14 @@ class BehaviorAnalyzer:
             header_order_hash=header_order_hash,
         )
 
-        return self._compute_score(session)
+        return self.compute_score(session)
 
     def get_session(self, client_ip: str) -> IPSession | None:
         return self._sessions.get(client_ip)
 
     # ── Scoring ──────────────────────────────────────────
 
-    def _compute_score(self, s: IPSession) -> float:
+    def compute_score(self, s: IPSession) -> float:
         """Combine multiple behavioral signals into [0, 1]."""
         signals: list[tuple[float, float]] = []  # (value, weight)
 
@@ -172,16 +231,14 @@ class BehaviorAnalyzer:
         Humans are irregular (high CV).
         Returns 0.0 for human-like timing, up to 1.0 for bot-like.
         """
-        intervals = list(s.inter_arrival_times)
-        if len(intervals) < 5:
+        n, mean_iat, variance = s.interval_stats()
+        if n < 5:
             return 0.0
 
-        mean_iat = sum(intervals) / len(intervals)
         if mean_iat == 0:
             return 1.0  # zero-delay → definitely automated
 
-        variance = sum((x - mean_iat) ** 2 for x in intervals) / len(intervals)
-        std_iat = math.sqrt(variance)
+        std_iat = math.sqrt(max(variance, 0.0))
         cv = std_iat / mean_iat  # coefficient of variation
 
         # CV < 0.1 → extremely regular → bot-like
@@ -197,11 +254,9 @@ class BehaviorAnalyzer:
     @staticmethod
     def _path_diversity(s: IPSession) -> float:
         """Fraction of unique paths visited. Humans browse diversely."""
-        paths = list(s.paths_visited)
-        if not paths:
+        if not s.paths_visited:
             return 0.0
-        unique = len(set(paths))
-        return unique / len(paths)
+        return len(s.path_counts) / len(s.paths_visited)
 
     @staticmethod
     def _header_consistency(s: IPSession) -> float:
@@ -250,11 +305,16 @@ class BehaviorAnalyzer:
             return
         self._last_cleanup = now
         cutoff = now - SESSION_TTL
-        expired = [ip for ip, s in self._sessions.items() if s.last_seen < cutoff]
-        for ip in expired:
-            del self._sessions[ip]
+        # Sessions are in last-seen order, so expired ones are all at the front
+        expired = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_seen >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            expired += 1
         if expired:
-            logger.debug("Evicted %d expired sessions", len(expired))
+            logger.debug("Evicted %d expired sessions", expired)
 
 
 behavior_analyzer = BehaviorAnalyzer()
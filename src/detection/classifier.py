@@ -13,6 +13,11 @@ from typing import Optional
 
 logger = logging.getLogger("sentinel.detection.classifier")
 
+_LOGIN_PATHS: frozenset[str] = frozenset({
+    "/login", "/auth", "/api/login", "/api/auth", "/signin", "/api/signin",
+})
+_WRITE_METHODS: frozenset[str] = frozenset({"POST", "PUT", "DELETE"})
+
 
 class AttackType(str, Enum):
     HTTP_FLOOD = "http_flood"
@@ -31,7 +36,7 @@ class AttackClassifier:
     to classify attacks more accurately and reduce false positives.
     """
 
-    async def classify(
+    def classify(
         self,
         features: dict,
         rate_count: int = 0,
@@ -41,40 +46,42 @@ class AttackClassifier:
         """Return attack type string or None if benign."""
 
         method = features.get("method", "GET")
-        path = features.get("path", "/")
-        ua = features.get("user_agent", "")
-        content_length = features.get("content_length", 0)
         rate_ratio = rate_count / rate_limit if rate_limit > 0 else 0.0
 
         # ── HTTP Flood ───────────────────────────────────
-        # High rate + bot-like behavior + minimal/no UA
-        if rate_ratio > 0.6 and (not ua or behavior_score > 0.5):
-            return AttackType.HTTP_FLOOD
-
         # Very high rate alone is a strong flood signal
         if rate_ratio > 0.85:
             return AttackType.HTTP_FLOOD
 
-        # ── Slowloris ────────────────────────────────────
-        # Slow POST with no body — connection-exhaustion attack
-        if content_length == 0 and method == "POST" and behavior_score > 0.3:
-            return AttackType.SLOWLORIS
+        # High rate + bot-like behavior + minimal/no UA
+        if rate_ratio > 0.6 and (not features.get("user_agent", "") or behavior_score > 0.5):
+            return AttackType.HTTP_FLOOD
+
+        # The remaining checks are method-specific
+        if method == "GET":
+            # ── Scraping ─────────────────────────────────
+            # High rate GET with bot-like behavior
+            if behavior_score > 0.6 and rate_ratio > 0.4:
+                return AttackType.SCRAPING
+            return None
+
+        path = features.get("path", "/")
+
+        if method == "POST":
+            # ── Slowloris ────────────────────────────────
+            # Slow POST with no body — connection-exhaustion attack
+            if features.get("content_length", 0) == 0 and behavior_score > 0.3:
+                return AttackType.SLOWLORIS
 
-        # ── Credential Stuffing ──────────────────────────
-        # Repeated POSTs to login/auth paths at elevated rate
-        login_paths = {"/login", "/auth", "/api/login", "/api/auth", "/signin", "/api/signin"}
-        if path.lower() in login_paths and method == "POST" and rate_ratio > 0.3:
-            return AttackType.CREDENTIAL_STUFFING
+            # ── Credential Stuffing ──────────────────────
+            # Repeated POSTs to login/auth paths at elevated rate
+            if rate_ratio > 0.3 and (path in _LOGIN_PATHS or path.lower() in _LOGIN_PATHS):
+                return AttackType.CREDENTIAL_STUFFING
 
         # ── API Abuse ────────────────────────────────────
         # High rate on API endpoints with bot-like behavior
-        if "/api/" in path and method in ("POST", "PUT", "DELETE"):
+        if method in _WRITE_METHODS and "/api/" in path:
             if rate_ratio > 0.5 or behavior_score > 0.6:
                 return AttackType.API_ABUSE
 
-        # ── Scraping ─────────────────────────────────────
-        # High rate GET with bot-like behavior but not login paths
-        if method == "GET" and behavior_score > 0.6 and rate_ratio > 0.4:
-            return AttackType.SCRAPING
-
         return None
@@ -9,10 +9,13 @@ from __future__ import annotations
 import asyncio
 import logging
 import time
+from collections import OrderedDict
 from typing import Optional
 
+import numpy as np
 from fastapi import Request
 
+from src.config import settings
 from src.detection.baseline import BaselineModel
 from src.detection.scorer import AnomalyScorer
 from src.detection.classifier import AttackClassifier
@@ -25,6 +28,22 @@ logger = logging.getLogger("sentinel.detection")
 # How much weight the ML score gets vs the heuristic score (when ML is ready)
 ML_BLEND_WEIGHT = 0.4
 
+# Known-good IPs: after TRUST_STREAK consecutive scores below TRUST_SCORE_MAX,
+# reuse the last score for TRUST_TTL seconds instead of re-scoring (the
+# request is still recorded for behavior, baseline and ML learning)
+TRUST_STREAK = 5
+TRUST_SCORE_MAX = 0.1
+TRUST_TTL = 30.0
+TRUST_MAX_RATE_RATIO = 0.5  # always fully score IPs nearing their rate limit
+MAX_TRUSTED = 50_000
+
+# Burst dedupe: identical (ip, path, method, rate bucket) requests reuse a
+# score for SCORE_CACHE_TTL seconds (still recording the request for
+# learning); skipped in under-attack mode
+SCORE_CACHE_TTL = 1.0
+SCORE_CACHE_RATE_STEP = 8
+SCORE_CACHE_MAX = 10_000
+
 
 class DetectionEngine:
     """Central detection engine that composes baseline, scorer, ML model, classifier."""
@@ -36,6 +55,10 @@ class DetectionEngine:
         self.ml = ml_model
         self._running = False
         self._background_task: Optional[asyncio.Task] = None
+        # ip → [low-score streak, trusted until (monotonic), last score]
+        self._trust: OrderedDict[str, list] = OrderedDict()
+        # (ip, path, method, rate bucket) → (expires at (monotonic), score)
+        self._score_cache: OrderedDict[tuple, tuple[float, float]] = OrderedDict()
 
     async def start(self) -> None:
         """Start background baseline-learning loop."""
@@ -52,6 +75,7 @@ class DetectionEngine:
                 await self._background_task
             except asyncio.CancelledError:
                 pass
+        await self.ml.stop()
         logger.info("Detection engine stopped")
 
     async def score_request(
@@ -67,27 +91,32 @@ class DetectionEngine:
         Returns a float between 0.0 (safe) and 1.0 (malicious).
         Blends heuristic score with ML score when the model is trained.
         """
-        features = self._extract_features(request, client_ip)
-
         # Rate ratio: how close this IP is to exhausting its rate limit
         rate_ratio = (rate_count / rate_limit) if rate_limit > 0 else 0.0
 
-        # Behavioral analysis
-        headers = dict(request.headers)
-        header_order_hash = compute_header_order_hash(headers)
-        behavior_score = behavior_analyzer.record_and_score(
-            client_ip=client_ip,
-            path=features["path"],
-            method=features["method"],
-            user_agent=features["user_agent"],
-            accept_language=features.get("accept_language", ""),
-            referer=headers.get("referer"),
-            cookie=headers.get("cookie"),
-            header_order_hash=header_order_hash,
-        )
-
-        # Store raw headers for ML feature extraction
-        features["_raw_headers"] = headers
+        # Every request feeds behavior, baseline and ML learning; the trust
+        # and burst fast paths below only skip scoring
+        features, behavior_score, vec = self._record(request, client_ip, rate_ratio)
+
+        now = time.monotonic()
+        trust = self._trust.get(client_ip)
+        if (
+            trust is not None
+            and trust[1] > now
+            and rate_ratio < TRUST_MAX_RATE_RATIO
+            and not settings.under_attack_mode
+        ):
+            self._trust.move_to_end(client_ip)
+            return trust[2]
+
+        cache_key = None
+        if not settings.under_attack_mode:
+            cache_key = (client_ip, features["path"], features["method"], rate_count // SCORE_CACHE_RATE_STEP)
+            cached = self._score_cache.get(cache_key)
+            if cached is not None:
+                if cached[0] > now:
+                    return cached[1]
+                del self._score_cache[cache_key]
 
         # Heuristic score (baseline + signals)
         heuristic_score = await self.scorer.score(
@@ -98,7 +127,7 @@ class DetectionEngine:
         )
 
         # ML score (IsolationForest)
-        ml_score = self.ml.score(features, rate_ratio, behavior_score)
+        ml_score = await self.ml.score_vector_async(vec)
 
         # Blend: if ML is ready, combine; otherwise pure heuristic
         if self.ml.is_ready:
@@ -109,13 +138,75 @@ class DetectionEngine:
         else:
             score = heuristic_score
 
+        score = min(1.0, max(0.0, score))
+        self._update_trust(client_ip, score, now)
+        if cache_key is not None:
+            if len(self._score_cache) >= SCORE_CACHE_MAX:
+                self._score_cache.popitem(last=False)
+            self._score_cache[cache_key] = (now + SCORE_CACHE_TTL, score)
+        return score
+
+    def _record(
+        self, request: Request, client_ip: str, rate_ratio: float,
+    ) -> tuple[dict, float, np.ndarray]:
+        """
+        Record a request to its behavior session, the ML training buffer and
+        the baseline window.
+
+        Returns the features, behavior score and ML vector for scoring.
+        """
+        features = self._extract_features(request, client_ip)
+
+        # Behavioral analysis
+        headers = request.headers
+        referer = headers.get("referer")
+        cookie = headers.get("cookie")
+        header_order_hash = compute_header_order_hash(headers)
+        behavior_score = behavior_analyzer.record_and_score(
+            client_ip=client_ip,
+            path=features["path"],
+            method=features["method"],
+            user_agent=features["user_agent"],
+            accept_language=features.get("accept_language", ""),
+            referer=referer,
+            cookie=cookie,
+            header_order_hash=header_order_hash,
+        )
+
+        # Header presence flags for ML feature extraction
+        features["has_cookie"] = bool(cookie)
+        features["has_referer"] = bool(referer)
+
         # Feed sample to ML training buffer
-        self.ml.record_sample(features, rate_ratio, behavior_score)
+        vec = self.ml.extract_vector(features, rate_ratio, behavior_score)
+        self.ml.record_vector(vec)
 
         # Record observation for baseline learning
         self.baseline.record_observation(features)
-
-        return min(1.0, max(0.0, score))
+        return features, behavior_score, vec
+
+    def distrust(self, client_ip: str) -> None:
+        """Drop an IP's trust (e.g. after it tripped a mitigation rule)."""
+        self._trust.pop(client_ip, None)
+
+    def _update_trust(self, client_ip: str, score: float, now: float) -> None:
+        """Track low-score streaks and mark IPs known-good once one is long enough."""
+        trust = self._trust.get(client_ip)
+        if score >= TRUST_SCORE_MAX:
+            if trust is not None:
+                del self._trust[client_ip]
+            return
+        if trust is None:
+            if len(self._trust) >= MAX_TRUSTED:
+                self._trust.popitem(last=False)
+            trust = self._trust[client_ip] = [0, 0.0, score]
+        else:
+            self._trust.move_to_end(client_ip)
+        trust[0] += 1
+        trust[2] = score
+        if trust[0] >= TRUST_STREAK:
+            trust[0] = 0
+            trust[1] = now + TRUST_TTL
 
     async def classify_attack(
         self,
@@ -127,7 +218,7 @@ class DetectionEngine:
     ) -> Optional[str]:
         """Classify the type of attack if threat score is high."""
         features = self._extract_features(request, client_ip)
-        return await self.classifier.classify(
+        return self.classifier.classify(
             features,
             rate_count=rate_count,
             rate_limit=rate_limit,
@@ -135,8 +226,11 @@ class DetectionEngine:
         )
 
     def _extract_features(self, request: Request, client_ip: str) -> dict:
-        """Extract raw feature dict from a request."""
-        return {
+        """Extract raw feature dict from a request (cached on request.state)."""
+        features = getattr(request.state, "sentinel_features", None)
+        if features is not None:
+            return features
+        features = {
             "timestamp": time.time(),
             "client_ip": client_ip,
             "method": request.method,
@@ -147,6 +241,8 @@ class DetectionEngine:
             "header_count": len(request.headers),
             "accept_language": request.headers.get("accept-language", ""),
         }
+        request.state.sentinel_features = features
+        return features
 
     async def _learn_loop(self) -> None:
         """Periodically update the baseline model and retrain ML."""
@@ -8,23 +8,28 @@ normal vs anomalous. Works alongside the heuristic scorer.
 from __future__ import annotations
 
 import asyncio
+import functools
 import logging
 import math
+import multiprocessing
 import os
-import pickle
 import time
-from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Deque, Optional
+from typing import Optional
 
+import joblib
 import numpy as np
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
+from src.detection._ml_train import fit_model
+from src.detection.scorer import score_user_agent
+
 logger = logging.getLogger("sentinel.detection.ml")
 
-# Feature names in order — MUST match _extract_vector()
+# Feature names in order — MUST match extract_vector()
 FEATURE_NAMES = [
     "header_count",
     "content_length",
@@ -39,15 +44,28 @@ FEATURE_NAMES = [
     "behavior_score",
 ]
 
-_SUSPICIOUS_UA_TOKENS = frozenset([
-    "python-requests", "curl", "wget", "go-http-client",
-    "httpclient", "java/", "libwww", "okhttp",
-])
+
+def _unique_chars(path: str) -> int:
+    """Number of distinct characters in a request path."""
+    if len(path) > 512:
+        return len(set(path))
+    return _unique_chars_short(path)
+
+
+@functools.lru_cache(maxsize=4096)
+def _unique_chars_short(path: str) -> int:
+    # Only paths up to 512 chars are cached, bounding the cache's memory
+    return len(set(path))
+
 
 # Defaults
 DEFAULT_MIN_TRAIN_SAMPLES = 500
 DEFAULT_RETRAIN_INTERVAL = 300  # seconds
 DEFAULT_MODEL_DIR = "models"
+MODEL_COMPRESS = ("zlib", 3)
+
+# Micro-batching for score_async: max rows per decision_function call
+ML_BATCH_SIZE = 64
 
 
 @dataclass
@@ -59,6 +77,7 @@ class MLModelConfig:
     contamination: float = 0.05  # expected fraction of anomalies
     n_estimators: int = 200
     max_samples: int = 2048  # max training batch size
+    persist: bool = True  # save to / load from model_dir
 
 
 class MLAnomalyModel:
@@ -76,16 +95,28 @@ class MLAnomalyModel:
         self.config = config or MLModelConfig()
         self._model: Optional[IsolationForest] = None
         self._scaler: Optional[StandardScaler] = None
-        self._training_buffer: Deque[np.ndarray] = deque(
-            maxlen=self.config.max_samples * 4,
-        )
+        # Scaler parameters cached for an inline transform on the hot path
+        self._mean: Optional[np.ndarray] = None
+        self._inv_scale: Optional[np.ndarray] = None
+        # Ring buffer of training samples; _write is the next slot
+        self._buf_cap = self.config.max_samples * 4
+        self._buf = np.empty((self._buf_cap, len(FEATURE_NAMES)), dtype=np.float32)
+        self._write = 0
+        self._filled = 0
         self._is_trained = False
         self._last_train_time: float = 0.0
         self._train_count: int = 0
-        self._lock = asyncio.Lock()
+        self._training = False
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+        # Micro-batched scoring (started on first score_async call)
+        self._score_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._batch_buf = np.empty((ML_BATCH_SIZE, len(FEATURE_NAMES)), dtype=np.float32)
 
         # Try to load persisted model on init
-        self._load_model()
+        if self.config.persist:
+            self._load_model()
 
     @property
     def is_ready(self) -> bool:
@@ -93,45 +124,38 @@ class MLAnomalyModel:
 
     @property
     def sample_count(self) -> int:
-        return len(self._training_buffer)
+        return self._filled
 
     # ── Feature Extraction ───────────────────────────────
 
     @staticmethod
-    def extract_vector(features: dict, rate_ratio: float = 0.0, behavior_score: float = 0.0) -> np.ndarray:
+    def extract_vector(
+        features: dict,
+        rate_ratio: float = 0.0,
+        behavior_score: float = 0.0,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
         """
         Extract a fixed-length numeric vector from request features.
-        Returns shape (11,) numpy array.
+        Returns shape (11,) float32 array, written into ``out`` if given.
         """
-        ua = features.get("user_agent", "")
-        ua_lower = ua.lower() if ua else ""
-
-        # UA score: 0.0=normal, 0.5=suspicious lib, 0.9=empty
-        ua_score = 0.0
-        if not ua:
-            ua_score = 0.9
-        else:
-            for token in _SUSPICIOUS_UA_TOKENS:
-                if token in ua_lower:
-                    ua_score = 0.5
-                    break
+        if out is None:
+            out = np.empty(len(FEATURE_NAMES), dtype=np.float32)
 
         path = features.get("path", "/")
-        headers = features.get("_raw_headers", {})
-
-        return np.array([
-            features.get("header_count", 0),
-            features.get("content_length", 0),
-            ua_score,
-            len(path),
-            len(set(path)),
-            1.0 if features.get("method", "GET") == "POST" else 0.0,
-            1.0 if headers.get("cookie") else 0.0,
-            1.0 if headers.get("referer") else 0.0,
-            1.0 if features.get("accept_language") else 0.0,
-            rate_ratio,
-            behavior_score,
-        ], dtype=np.float64)
+
+        out[0] = features.get("header_count", 0)
+        out[1] = features.get("content_length", 0)
+        out[2] = score_user_agent(features.get("user_agent", ""))
+        out[3] = len(path)
+        out[4] = _unique_chars(path)
+        out[5] = 1.0 if features.get("method", "GET") == "POST" else 0.0
+        out[6] = 1.0 if features.get("has_cookie") else 0.0
+        out[7] = 1.0 if features.get("has_referer") else 0.0
+        out[8] = 1.0 if features.get("accept_language") else 0.0
+        out[9] = rate_ratio
+        out[10] = behavior_score
+        return out
 
     # ── Training ─────────────────────────────────────────
 
@@ -139,8 +163,18 @@ class MLAnomalyModel:
         self, features: dict, rate_ratio: float = 0.0, behavior_score: float = 0.0,
     ) -> None:
         """Add a sample to the training buffer."""
-        vec = self.extract_vector(features, rate_ratio, behavior_score)
-        self._training_buffer.append(vec)
+        self.extract_vector(features, rate_ratio, behavior_score, out=self._buf[self._write])
+        self._advance()
+
+    def record_vector(self, vec: np.ndarray) -> None:
+        """Add an already-extracted feature vector to the training buffer."""
+        self._buf[self._write] = vec
+        self._advance()
+
+    def _advance(self) -> None:
+        self._write = (self._write + 1) % self._buf_cap
+        if self._filled < self._buf_cap:
+            self._filled += 1
 
     async def maybe_train(self) -> bool:
         """Train or retrain if conditions are met. Returns True if trained."""
@@ -148,48 +182,35 @@ class MLAnomalyModel:
 
         # First train: need enough samples
         if not self._is_trained:
-            if len(self._training_buffer) < self.config.min_train_samples:
+            if self._filled < self.config.min_train_samples:
                 return False
         else:
             # Retrain: check interval
             if now - self._last_train_time < self.config.retrain_interval_sec:
                 return False
-            if len(self._training_buffer) < 100:
+            if self._filled < 100:
                 return False
 
-        async with self._lock:
-            await asyncio.to_thread(self._train_sync)
-        return True
-
-    def _train_sync(self) -> None:
-        """Synchronous training (runs in thread)."""
-        samples = list(self._training_buffer)
-        if not samples:
-            return
-
-        X = np.array(samples)
+        # A training run is already in progress — don't queue another
+        if self._training:
+            return False
+        X = self._training_matrix()
+        if X is None:
+            return False
 
-        # Cap training set size
-        if len(X) > self.config.max_samples:
-            indices = np.random.choice(len(X), self.config.max_samples, replace=False)
-            X = X[indices]
-
-        # Fit scaler
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-
-        # Fit IsolationForest
-        model = IsolationForest(
-            n_estimators=self.config.n_estimators,
-            contamination=self.config.contamination,
-            max_samples=min(len(X_scaled), self.config.max_samples),
-            random_state=42,
-            n_jobs=-1,
-        )
-        model.fit(X_scaled)
+        self._training = True
+        try:
+            # Fit in a worker process so the GIL-bound parts of sklearn
+            # never stall the event loop; the old model serves until the swap
+            model, scaler = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), fit_model, X,
+                self.config.n_estimators, self.config.contamination, self.config.max_samples,
+            )
+        finally:
+            self._training = False
 
         self._model = model
-        self._scaler = scaler
+        self._set_scaler(scaler)
         self._is_trained = True
         self._last_train_time = time.time()
         self._train_count += 1
@@ -199,7 +220,37 @@ class MLAnomalyModel:
             self._train_count, len(X), X.shape[1],
         )
 
-        self._save_model()
+        if self.config.persist:
+            await asyncio.to_thread(self._save_model)
+        return True
+
+    def _training_matrix(self) -> Optional[np.ndarray]:
+        """Copy (a random subsample of) the ring buffer for training."""
+        if not self._filled:
+            return None
+        X = self._buf[:self._filled]
+        if len(X) > self.config.max_samples:
+            indices = np.random.choice(len(X), self.config.max_samples, replace=False)
+            return X[indices]
+        # The executor pickles arguments later, from another thread
+        return X.copy()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _set_scaler(self, scaler: StandardScaler) -> None:
+        self._scaler = scaler
+        self._mean = scaler.mean_.astype(np.float32)
+        self._inv_scale = (1.0 / scaler.scale_).astype(np.float32)
+
+    def _transform(self, X: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """StandardScaler.transform without sklearn's input validation."""
+        X = np.subtract(X, self._mean, out=out)
+        return np.multiply(X, self._inv_scale, out=X)
 
     # ── Prediction ───────────────────────────────────────
 
@@ -217,12 +268,14 @@ class MLAnomalyModel:
             return 0.0
 
         vec = self.extract_vector(features, rate_ratio, behavior_score)
-        X = vec.reshape(1, -1)
-        X_scaled = self._scaler.transform(X)  # type: ignore[union-attr]
+        X_scaled = self._transform(vec).reshape(1, -1)
 
         # decision_function returns negative for anomalies
         raw_score = self._model.decision_function(X_scaled)[0]  # type: ignore[union-attr]
+        return self._normalize(raw_score)
 
+    @staticmethod
+    def _normalize(raw_score: float) -> float:
         # Convert to 0–1 range where 1.0 = most anomalous
         # IsolationForest: lower raw_score → more anomalous
         # Typical range: -0.5 (anomaly) to 0.5 (normal)
@@ -230,6 +283,72 @@ class MLAnomalyModel:
         normalized = 1.0 - (raw_score + 0.5)  # -0.5→1.0, 0.5→0.0
         return float(min(1.0, max(0.0, normalized)))
 
+    async def score_async(
+        self, features: dict, rate_ratio: float = 0.0, behavior_score: float = 0.0,
+    ) -> float:
+        """
+        Same as ``score``, but batched with other concurrent requests.
+
+        Vectors are queued and a worker scores everything pending in one
+        ``decision_function`` call, amortising sklearn's per-call overhead.
+        """
+        return await self.score_vector_async(
+            self.extract_vector(features, rate_ratio, behavior_score),
+        )
+
+    async def score_vector_async(self, vec: np.ndarray) -> float:
+        """Batched score of an already-extracted feature vector."""
+        if not self.is_ready:
+            return 0.0
+
+        if self._batch_task is None or self._batch_task.done():
+            self._score_queue = asyncio.Queue()
+            self._batch_task = asyncio.create_task(self._batch_loop(self._score_queue))
+
+        future = asyncio.get_running_loop().create_future()
+        self._score_queue.put_nowait((vec, future))  # type: ignore[union-attr]
+        return await future
+
+    async def stop(self) -> None:
+        """Stop the batch-scoring worker and the training process."""
+        if self._batch_task:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _batch_loop(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            # Let requests that are ready to run queue up behind this one
+            await asyncio.sleep(0)
+            while len(batch) < ML_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                scores = self._score_batch([vec for vec, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+
+    def _score_batch(self, vectors: list[np.ndarray]) -> list[float]:
+        """Score up to ``ML_BATCH_SIZE`` vectors with one model call."""
+        X = self._batch_buf[:len(vectors)]
+        np.stack(vectors, out=X, casting="same_kind")
+        X_scaled = self._transform(X, out=X)
+        raw_scores = self._model.decision_function(X_scaled)  # type: ignore[union-attr]
+        return [self._normalize(raw) for raw in raw_scores]
+
     def predict_label(
         self, features: dict, rate_ratio: float = 0.0, behavior_score: float = 0.0,
     ) -> int:
@@ -241,13 +360,15 @@ class MLAnomalyModel:
             return 1
 
         vec = self.extract_vector(features, rate_ratio, behavior_score)
-        X = vec.reshape(1, -1)
-        X_scaled = self._scaler.transform(X)  # type: ignore[union-attr]
+        X_scaled = self._transform(vec).reshape(1, -1)
         return int(self._model.predict(X_scaled)[0])  # type: ignore[union-attr]
 
     # ── Persistence ──────────────────────────────────────
 
     def _model_path(self) -> Path:
+        return Path(self.config.model_dir) / "isolation_forest.joblib"
+
+    def _legacy_model_path(self) -> Path:
         return Path(self.config.model_dir) / "isolation_forest.pkl"
 
     def _save_model(self) -> None:
@@ -255,30 +376,31 @@ class MLAnomalyModel:
         try:
             path = self._model_path()
             path.parent.mkdir(parents=True, exist_ok=True)
-            with open(path, "wb") as f:
-                pickle.dump(
-                    {
-                        "model": self._model,
-                        "scaler": self._scaler,
-                        "train_count": self._train_count,
-                        "timestamp": time.time(),
-                    },
-                    f,
-                )
+            joblib.dump(
+                {
+                    "model": self._model,
+                    "scaler": self._scaler,
+                    "train_count": self._train_count,
+                    "timestamp": time.time(),
+                },
+                path,
+                compress=MODEL_COMPRESS,
+            )
             logger.info("ML model saved to %s", path)
         except Exception:
             logger.exception("Failed to save ML model")
 
     def _load_model(self) -> None:
-        """Load persisted model from disk."""
+        """Load persisted model from disk (joblib, or a legacy pickle)."""
         path = self._model_path()
         if not path.exists():
-            return
+            path = self._legacy_model_path()
+            if not path.exists():
+                return
         try:
-            with open(path, "rb") as f:
-                data = pickle.load(f)
+            data = joblib.load(path)
             self._model = data["model"]
-            self._scaler = data["scaler"]
+            self._set_scaler(data["scaler"])
             self._train_count = data.get("train_count", 0)
             self._is_trained = True
             logger.info(
@@ -295,7 +417,7 @@ class MLAnomalyModel:
         return {
             "is_ready": self.is_ready,
             "train_count": self._train_count,
-            "buffer_size": len(self._training_buffer),
+            "buffer_size": self._filled,
             "min_train_samples": self.config.min_train_samples,
             "last_trained": self._last_train_time or None,
             "n_estimators": self.config.n_estimators,
@@ -8,13 +8,57 @@ to produce a threat level between 0.0 and 1.0.
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
 
 if TYPE_CHECKING:
     from src.detection.baseline import BaselineModel
 
 logger = logging.getLogger("sentinel.detection.scorer")
 
+SUSPICIOUS_UA_TOKENS = frozenset([
+    "python-requests", "curl", "wget", "go-http-client",
+    "httpclient", "java/", "libwww", "okhttp",
+])
+
+
+def score_user_agent(ua: str) -> float:
+    """Heuristic: missing (0.9) or suspicious (0.5) User-Agent, else 0.0."""
+    if len(ua) > 512:
+        return _match_user_agent(ua)
+    return _score_short_user_agent(ua)
+
+
+@lru_cache(maxsize=8192)
+def _score_short_user_agent(ua: str) -> float:
+    # Only UAs up to 512 chars are cached, bounding the cache's memory
+    return _match_user_agent(ua)
+
+
+def _match_user_agent(ua: str) -> float:
+    if not ua:
+        return 0.9
+    ua_lower = ua.lower()
+    for token in SUSPICIOUS_UA_TOKENS:
+        if token in ua_lower:
+            return 0.5
+    return 0.0
+
+
+def score_path(path: str) -> float:
+    """High entropy / unusually long paths are suspicious."""
+    if len(path) > 512:
+        return 0.8
+    return _score_short_path(path)
+
+
+@lru_cache(maxsize=8192)
+def _score_short_path(path: str) -> float:
+    # Only paths up to 512 chars are cached, bounding the cache's memory
+    return 0.5 if len(set(path)) > 40 else 0.0
+
 
 class AnomalyScorer:
     """
@@ -46,42 +90,88 @@ class AnomalyScorer:
             # Baseline not trained yet — allow everything (learning mode)
             return 0.0
 
-        signals: dict[str, float] = {}
+        w = self.WEIGHTS
 
         # ── Header-count deviation ────────────────────────
-        hc = features.get("header_count", 0)
-        signals["header_count"] = self._z_to_score(
-            hc, baseline.mean_header_count, baseline.std_header_count,
+        header_score = self._z_to_score(
+            features.get("header_count", 0),
+            baseline.mean_header_count, baseline.std_header_count,
         )
 
         # ── Content-length deviation ──────────────────────
-        cl = features.get("content_length", 0)
-        signals["content_length"] = self._z_to_score(
-            cl, baseline.mean_content_length, baseline.std_content_length,
+        length_score = self._z_to_score(
+            features.get("content_length", 0),
+            baseline.mean_content_length, baseline.std_content_length,
         )
 
         # ── User-Agent check ─────────────────────────────
-        ua = features.get("user_agent", "")
-        signals["user_agent"] = self._score_user_agent(ua)
+        ua_score = self._score_user_agent(features.get("user_agent", ""))
 
         # ── Path entropy ─────────────────────────────────
-        path = features.get("path", "/")
-        signals["path_entropy"] = self._score_path(path)
-
-        # ── Rate signal (fed from rate limiter) ─────────
-        signals["rate"] = min(1.0, max(0.0, rate_ratio))
-
-        # ── Behavioral analysis signal ─────────────────
-        signals["behavior"] = min(1.0, max(0.0, behavior_score))
+        path_score = self._score_path(features.get("path", "/"))
 
         # ── Weighted composite ───────────────────────────
-        composite = sum(
-            signals.get(k, 0) * w for k, w in self.WEIGHTS.items()
+        # Rate (fed from rate limiter) and behavior signals are clamped inline
+        composite = (
+            header_score * w["header_count"]
+            + length_score * w["content_length"]
+            + ua_score * w["user_agent"]
+            + path_score * w["path_entropy"]
+            + min(1.0, max(0.0, rate_ratio)) * w["rate"]
+            + min(1.0, max(0.0, behavior_score)) * w["behavior"]
         )
         return min(1.0, max(0.0, composite))
 
+    def score_batch(
+        self,
+        features_list: Sequence[dict],
+        baseline: "BaselineModel",
+        rate_ratios: Sequence[float] | None = None,
+        behavior_scores: Sequence[float] | None = None,
+    ) -> np.ndarray:
+        """
+        Vectorized ``score`` over many requests (e.g. replaying logged traffic).
+
+        Returns a float64 array with one composite score per request.
+        """
+        n = len(features_list)
+        if not baseline.is_ready or n == 0:
+            return np.zeros(n)
+
+        w = self.WEIGHTS
+        hc = np.fromiter((f.get("header_count", 0) for f in features_list), np.float64, n)
+        cl = np.fromiter((f.get("content_length", 0) for f in features_list), np.float64, n)
+        ua = np.fromiter(
+            (self._score_user_agent(f.get("user_agent", "")) for f in features_list), np.float64, n,
+        )
+        path = np.fromiter(
+            (self._score_path(f.get("path", "/")) for f in features_list), np.float64, n,
+        )
+        rate = np.zeros(n) if rate_ratios is None else np.asarray(rate_ratios, np.float64)
+        behavior = np.zeros(n) if behavior_scores is None else np.asarray(behavior_scores, np.float64)
+
+        composite = (
+            self._z_to_scores(hc, baseline.mean_header_count, baseline.std_header_count)
+            * w["header_count"]
+            + self._z_to_scores(cl, baseline.mean_content_length, baseline.std_content_length)
+            * w["content_length"]
+            + ua * w["user_agent"]
+            + path * w["path_entropy"]
+            + np.clip(rate, 0.0, 1.0) * w["rate"]
+            + np.clip(behavior, 0.0, 1.0) * w["behavior"]
+        )
+        return np.clip(composite, 0.0, 1.0)
+
     # ── Helpers ──────────────────────────────────────────
 
+    @staticmethod
+    def _z_to_scores(values: np.ndarray, mean: float, std: float) -> np.ndarray:
+        """Array form of ``_z_to_score``."""
+        if not std:
+            return np.zeros_like(values)
+        z = np.abs(values - mean) / std
+        return np.clip((z - 1.5) / 1.5, 0.0, 1.0)
+
     @staticmethod
     def _z_to_score(value: float, mean: float, std: float) -> float:
         """Convert a z-score to a 0–1 threat contribution."""
@@ -92,27 +182,6 @@ class AnomalyScorer:
             return (z - 1.5) / 1.5  # linear ramp 0→1
         return 1.0
 
-    @staticmethod
-    def _score_user_agent(ua: str) -> float:
-        """Heuristic: missing or suspicious User-Agent."""
-        if not ua:
-            return 0.9
-        suspicious = [
-            "python-requests", "curl", "wget", "go-http-client",
-            "httpclient", "java/", "libwww", "okhttp",
-        ]
-        ua_lower = ua.lower()
-        for s in suspicious:
-            if s in ua_lower:
-                return 0.5
-        return 0.0
+    _score_user_agent = staticmethod(score_user_agent)
 
-    @staticmethod
-    def _score_path(path: str) -> float:
-        """High entropy / unusually long paths are suspicious."""
-        if len(path) > 512:
-            return 0.8
-        unique_chars = len(set(path))
-        if unique_chars > 40:
-            return 0.5
-        return 0.0
+    _score_path = staticmethod(score_path)
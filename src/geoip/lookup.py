@@ -12,8 +12,9 @@ from __future__ import annotations
 
 import logging
 import random
+import socket
 from dataclasses import dataclass
-from ipaddress import IPv4Address, ip_address
+from functools import lru_cache
 from typing import Optional
 
 logger = logging.getLogger("sentinel.geoip")
@@ -21,8 +22,11 @@ logger = logging.getLogger("sentinel.geoip")
 _reader = None  # MaxMind database reader (lazy-loaded)
 _geoip_available = False
 
+# Distinct IPs remembered by ``lookup``
+LOOKUP_CACHE_SIZE = 65536
 
-@dataclass
+
+@dataclass(frozen=True)
 class GeoResult:
     """Geographic location result."""
     country_code: str  # ISO 3166-1 alpha-2= e.g. "US"
@@ -56,8 +60,12 @@ def init_geoip(db_path: str | None = None) -> bool:
         return False
     try:
         import geoip2.database  # type: ignore[import-untyped]
+        # MODE_AUTO (the default) memory-maps the file through libmaxminddb's
+        # C extension when installed; lookups never leave the process
         _reader = geoip2.database.Reader(db_path)
         _geoip_available = True
+        lookup.cache_clear()
+        lookup_dict.cache_clear()
         logger.info("GeoIP database loaded: %s", db_path)
         return True
     except Exception:
@@ -65,8 +73,9 @@ def init_geoip(db_path: str | None = None) -> bool:
         return False
 
 
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
 def lookup(ip: str) -> GeoResult:
-    """Look up geographic info for an IP address."""
+    """Look up geographic info for an IP address (results are cached)."""
     # Try MaxMind first
     if _geoip_available and _reader:
         try:
@@ -78,6 +87,17 @@ def lookup(ip: str) -> GeoResult:
     return _fallback_lookup(ip)
 
 
+@lru_cache(maxsize=LOOKUP_CACHE_SIZE)
+def lookup_dict(ip: str) -> dict:
+    """Cached ``lookup(ip).to_dict()``; the dict is shared, so don't mutate it."""
+    return lookup(ip).to_dict()
+
+
+def lookup_batch(ips: list[str]) -> list[GeoResult]:
+    """Look up many IPs in one call (e.g. from a single worker thread)."""
+    return [lookup(ip) for ip in ips]
+
+
 def _maxmind_lookup(ip: str) -> GeoResult:
     """Query MaxMind GeoLite2 database."""
     resp = _reader.city(ip)  # type: ignore[union-attr]
@@ -122,21 +142,21 @@ def _fallback_lookup(ip: str) -> GeoResult:
     Deterministic IP-to-country mapping for simulator/testing.
     Uses IP octets to pick a country consistently.
     """
+    h = hash(ip)
     try:
-        addr = ip_address(ip)
-        if isinstance(addr, IPv4Address):
-            octets = [int(o) for o in ip.split(".")]
-            # Use the sum of octets modulo country count for determinism
-            idx = (octets[0] * 7 + octets[1] * 3 + octets[2]) % len(_COUNTRIES)
-        else:
-            idx = hash(ip) % len(_COUNTRIES)
-    except Exception:
-        idx = 0
+        # inet_aton is C-level; the dot count rejects its shorthand forms
+        if ip.count(".") != 3:
+            raise OSError
+        b = socket.inet_aton(ip)
+        # Use the leading octets for determinism
+        idx = (b[0] * 7 + b[1] * 3 + b[2]) % len(_COUNTRIES)
+    except OSError:
+        idx = h % len(_COUNTRIES)
 
     code, name, lat, lon = _COUNTRIES[idx]
-    # Add small jitter so pins don't stack
-    lat += (hash(ip + "lat") % 100 - 50) * 0.05
-    lon += (hash(ip + "lon") % 100 - 50) * 0.05
+    # Add small jitter so pins don't stack (two digits of one hash)
+    lat += (h % 100 - 50) * 0.05
+    lon += (h // 100 % 100 - 50) * 0.05
 
     return GeoResult(
         country_code=code,
@@ -156,3 +176,5 @@ def close() -> None:
             pass
         _reader = None
         _geoip_available = False
+        lookup.cache_clear()
+        lookup_dict.cache_clear()
@@ -13,17 +13,21 @@ from contextlib import asynccontextmanager
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from src.config import settings
 from src.api.routes import router as api_router
 from src.api.analytics import router as analytics_router
-from src.api.websocket import router as ws_router
-from src.proxy.handler import router as proxy_router
+from src.api.websocket import router as ws_router, traffic_broadcaster
+from src.proxy.handler import router as proxy_router, get_http_client, close_http_client
 from src.storage.redis_client import redis_manager
 from src.storage.database import init_db
+from src.storage.rollup import attack_rollup
+from src.storage.attack_writer import attack_log_writer
 from src.detection.engine import detection_engine
 from src.rules.engine import rules_engine
 from src.geoip.lookup import init_geoip
+from src.alerts.dispatcher import alert_manager
 
 logger = logging.getLogger("sentinel")
 
@@ -54,6 +58,12 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("✅ Database initialised")
 
+    # Start batched attack-log writer
+    await attack_log_writer.start()
+
+    # Start attack-log rollup for analytics
+    await attack_rollup.start()
+
     # Start detection engine
     await detection_engine.start()
     logger.info("✅ Detection engine started")
@@ -66,6 +76,15 @@ async def lifespan(app: FastAPI):
     geoip_ok = init_geoip(settings.geoip_db_path)
     logger.info("✅ GeoIP: %s", "MaxMind DB loaded" if geoip_ok else "fallback mode")
 
+    # Open long-lived alert HTTP clients
+    await alert_manager.start()
+
+    # Shared 1 Hz stats tick for dashboard WebSockets
+    await traffic_broadcaster.start()
+
+    # Warm the pooled upstream client so the first request doesn't build it
+    await get_http_client()
+
     logger.info(
         "🚀 Proxying traffic to %s | Protection: %s",
         settings.target_url,
@@ -77,7 +96,12 @@ async def lifespan(app: FastAPI):
     yield
 
     # ── Shutdown ─────────────────────────────────────────
+    await traffic_broadcaster.stop()
     await detection_engine.stop()
+    await attack_rollup.stop()
+    await attack_log_writer.stop()
+    await alert_manager.aclose()
+    await close_http_client()
     await redis_manager.disconnect()
     logger.info("🛡️  Sentinel DDoS stopped.")
 
@@ -91,6 +115,7 @@ def create_app() -> FastAPI:
         docs_url="/api/docs",
         redoc_url="/api/redoc",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     # CORS (for dashboard)
@@ -9,12 +9,18 @@ from __future__ import annotations
 
 import logging
 import time
+from collections import OrderedDict
 from typing import Optional
 
 from src.storage.redis_client import redis_manager
 
 logger = logging.getLogger("sentinel.mitigation.blocker")
 
+# Per-process cache of is_blocked() results. Changes made through this
+# process apply immediately; changes from other workers within CACHE_TTL.
+CACHE_TTL = 5.0
+CACHE_MAX = 50_000
+
 
 class IPBlocker:
     """Manages IP and subnet blocking via Redis."""
@@ -22,22 +28,36 @@ class IPBlocker:
     BLOCKLIST_KEY = "sentinel:blocklist"
     ALLOWLIST_KEY = "sentinel:allowlist"
 
+    def __init__(self) -> None:
+        # ip → (expires at (monotonic), blocked)
+        self._cache: OrderedDict[str, tuple[float, bool]] = OrderedDict()
+
     async def is_blocked(self, ip: str) -> bool:
         """Check if IP is currently blocked."""
         redis = redis_manager.client
         if redis is None:
             return False
 
-        # Allowlist takes priority
-        if await redis.sismember(self.ALLOWLIST_KEY, ip):
-            return False
+        now = time.monotonic()
+        cached = self._cache.get(ip)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        # One round trip for all three checks
+        pipe = redis.pipeline(transaction=False)
+        pipe.sismember(self.ALLOWLIST_KEY, ip)
+        pipe.exists(f"block:{ip}")
+        pipe.sismember(self.BLOCKLIST_KEY, ip)
+        allowed, temp_block, perm_block = await pipe.execute()
 
-        # Check individual IP block
-        if await redis.exists(f"block:{ip}"):
-            return True
+        # Allowlist takes priority
+        blocked = not allowed and bool(temp_block or perm_block)
 
-        # Check set-based blocklist
-        return await redis.sismember(self.BLOCKLIST_KEY, ip)
+        if cached is None and len(self._cache) >= CACHE_MAX:
+            self._cache.popitem(last=False)
+        self._cache[ip] = (now + CACHE_TTL, blocked)
+        self._cache.move_to_end(ip)
+        return blocked
 
     async def block(
         self,
@@ -64,6 +84,7 @@ class IPBlocker:
         else:
             await redis.sadd(self.BLOCKLIST_KEY, ip)
             logger.info("Permanently blocked %s — reason: %s", ip, reason)
+        self._cache.pop(ip, None)
 
     async def unblock(self, ip: str) -> None:
         """Remove IP from all blocklists."""
@@ -72,6 +93,7 @@ class IPBlocker:
             return
         await redis.delete(f"block:{ip}")
         await redis.srem(self.BLOCKLIST_KEY, ip)
+        self._cache.pop(ip, None)
         logger.info("Unblocked %s", ip)
 
     async def allow(self, ip: str) -> None:
@@ -80,6 +102,7 @@ class IPBlocker:
         if redis is None:
             return
         await redis.sadd(self.ALLOWLIST_KEY, ip)
+        self._cache.pop(ip, None)
         logger.info("Allowlisted %s", ip)
 
     async def get_blocked_ips(self) -> list[str]:
@@ -24,12 +24,90 @@ logger = logging.getLogger("sentinel.mitigation.challenge")
 CHALLENGE_COOKIE = "sentinel_challenge"
 CHALLENGE_TTL = 3600  # 1 hour validity
 
+# Each challenge carries a fresh signed token; never let a proxy cache it
+_CHALLENGE_HEADERS = {"cache-control": "no-store"}
+
+# JS challenge page, pre-rendered once; only the token varies per response
+_CHALLENGE_PAGE = (
+    """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Checking your browser — Sentinel DDoS</title>
+    <style>
+        body {
+            background: #0d1117; color: #c9d1d9;
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
+            display: flex; align-items: center; justify-content: center;
+            height: 100vh; margin: 0;
+        }
+        .container { text-align: center; }
+        .spinner {
+            border: 4px solid #30363d; border-top: 4px solid #58a6ff;
+            border-radius: 50%; width: 48px; height: 48px;
+            animation: spin 1s linear infinite; margin: 20px auto;
+        }
+        @keyframes spin { 100% { transform: rotate(360deg); } }
+        h1 { font-size: 1.5rem; margin-bottom: 8px; }
+        p { color: #8b949e; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🛡️ Sentinel DDoS Protection</h1>
+        <div class="spinner"></div>
+        <p>Checking your browser before accessing the site…</p>
+        <p id="status">Solving challenge…</p>
+    </div>
+    <script>
+        // Simple proof-of-work: find a nonce that creates a hash starting with "00"
+        (async function() {
+            const token = "__TOKEN__";
+            let nonce = 0;
+            while (true) {
+                const data = token + ":" + nonce;
+                const hash = await crypto.subtle.digest(
+                    "SHA-256",
+                    new TextEncoder().encode(data)
+                );
+                const hex = Array.from(new Uint8Array(hash))
+                    .map(b => b.toString(16).padStart(2, '0')).join('');
+                if (hex.startsWith("00")) {
+                    document.cookie = "__COOKIE__=" + token
+                        + ":" + nonce
+                        + "; path=/; max-age=__TTL__; SameSite=Lax";
+                    document.getElementById("status").textContent = "Verified! Redirecting…";
+                    setTimeout(() => location.reload(), 500);
+                    return;
+                }
+                nonce++;
+                if (nonce % 10000 === 0) {
+                    document.getElementById("status").textContent =
+                        "Solving challenge… (" + nonce + " attempts)";
+                    await new Promise(r => setTimeout(r, 0));
+                }
+            }
+        })();
+    </script>
+</body>
+</html>"""
+    .replace("__COOKIE__", CHALLENGE_COOKIE)
+    .replace("__TTL__", str(CHALLENGE_TTL))
+    .encode()
+)
+
 
 class ChallengeManager:
     """JS challenge generation and verification."""
 
     def __init__(self) -> None:
-        self._secret = settings.jwt_secret.encode()
+        secret = settings.jwt_secret.encode()
+        # BLAKE2b keys are at most 64 bytes; condense longer secrets
+        self._secret = secret if len(secret) <= 64 else hashlib.blake2b(secret).digest()
+
+    def _sign(self, data: str) -> str:
+        """Keyed BLAKE2b MAC — one pass, unlike HMAC's inner/outer hashes."""
+        return hashlib.blake2b(data.encode(), key=self._secret, digest_size=16).hexdigest()
 
     async def maybe_challenge(
         self,
@@ -46,17 +124,19 @@ class ChallengeManager:
 
         # Serve JS challenge page
         token = self._generate_challenge(client_ip)
-        html = self._render_challenge_page(token)
-        response = Response(content=html, media_type="text/html", status_code=503)
-        return response
+        return Response(
+            content=self._render_challenge_page(token),
+            media_type="text/html",
+            status_code=503,
+            headers=_CHALLENGE_HEADERS,
+        )
 
     def _generate_challenge(self, client_ip: str) -> str:
         """Create a challenge token tied to the client IP."""
         nonce = secrets.token_hex(16)
         ts = str(int(time.time()))
         data = f"{client_ip}:{nonce}:{ts}"
-        sig = hmac.new(self._secret, data.encode(), hashlib.sha256).hexdigest()
-        return f"{data}:{sig}"
+        return f"{data}:{self._sign(data)}"
 
     def _verify_token(self, token: str, client_ip: str) -> bool:
         """Verify a solved challenge token (includes PoW nonce)."""
@@ -70,88 +150,21 @@ class ChallengeManager:
                 return False
             if time.time() - int(ts) > CHALLENGE_TTL:
                 return False
-            # Verify HMAC signature on original challenge
+            # Verify MAC on original challenge
             original = f"{ip}:{nonce}:{ts}"
-            expected = hmac.new(
-                self._secret,
-                original.encode(),
-                hashlib.sha256,
-            ).hexdigest()
-            if not hmac.compare_digest(sig, expected):
+            if not hmac.compare_digest(sig, self._sign(original)):
                 return False
-            # Verify proof-of-work: SHA256(original_token:pow_nonce) starts with "00"
-            full_token = f"{original}:{sig}"
-            pow_input = f"{full_token}:{pow_nonce}"
-            pow_hash = hashlib.sha256(pow_input.encode()).hexdigest()
-            return pow_hash.startswith("00")
+            # Verify proof-of-work: SHA256(original_token:pow_nonce) starts
+            # with hex "00", i.e. its first byte is zero
+            pow_input = f"{original}:{sig}:{pow_nonce}"
+            return hashlib.sha256(pow_input.encode()).digest()[0] == 0
         except Exception:
             return False
 
     @staticmethod
-    def _render_challenge_page(token: str) -> str:
+    def _render_challenge_page(token: str) -> bytes:
         """Render the JS challenge HTML page."""
-        return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <title>Checking your browser — Sentinel DDoS</title>
-    <style>
-        body {{
-            background: #0d1117; color: #c9d1d9;
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            display: flex; align-items: center; justify-content: center;
-            height: 100vh; margin: 0;
-        }}
-        .container {{ text-align: center; }}
-        .spinner {{
-            border: 4px solid #30363d; border-top: 4px solid #58a6ff;
-            border-radius: 50%; width: 48px; height: 48px;
-            animation: spin 1s linear infinite; margin: 20px auto;
-        }}
-        @keyframes spin {{ 100% {{ transform: rotate(360deg); }} }}
-        h1 {{ font-size: 1.5rem; margin-bottom: 8px; }}
-        p {{ color: #8b949e; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🛡️ Sentinel DDoS Protection</h1>
-        <div class="spinner"></div>
-        <p>Checking your browser before accessing the site…</p>
-        <p id="status">Solving challenge…</p>
-    </div>
-    <script>
-        // Simple proof-of-work: find a nonce that creates a hash starting with "00"
-        (async function() {{
-            const token = "{token}";
-            let nonce = 0;
-            while (true) {{
-                const data = token + ":" + nonce;
-                const hash = await crypto.subtle.digest(
-                    "SHA-256",
-                    new TextEncoder().encode(data)
-                );
-                const hex = Array.from(new Uint8Array(hash))
-                    .map(b => b.toString(16).padStart(2, '0')).join('');
-                if (hex.startsWith("00")) {{
-                    document.cookie = "{CHALLENGE_COOKIE}=" + token
-                        + ":" + nonce
-                        + "; path=/; max-age={CHALLENGE_TTL}; SameSite=Lax";
-                    document.getElementById("status").textContent = "Verified! Redirecting…";
-                    setTimeout(() => location.reload(), 500);
-                    return;
-                }}
-                nonce++;
-                if (nonce % 10000 === 0) {{
-                    document.getElementById("status").textContent =
-                        "Solving challenge… (" + nonce + " attempts)";
-                    await new Promise(r => setTimeout(r, 0));
-                }}
-            }}
-        }})();
-    </script>
-</body>
-</html>"""
+        return _CHALLENGE_PAGE.replace(b"__TOKEN__", token.encode())
 
 
 challenge_manager = ChallengeManager()
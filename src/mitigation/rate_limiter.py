@@ -7,16 +7,38 @@ Supports per-IP, per-subnet, and global limits.
 
 from __future__ import annotations
 
+import itertools
 import logging
 import time
 import uuid
+from functools import lru_cache
 from ipaddress import IPv4Address, IPv4Network
+from typing import Sequence
 
 from src.config import settings
 from src.storage.redis_client import redis_manager
 
 logger = logging.getLogger("sentinel.mitigation.rate_limiter")
 
+# Sliding-window check over one or more keys in a single round trip.
+# KEYS: sorted sets to check in order; ARGV: now, member, then a
+# (window_start, ttl, limit) triple per key. Stops at the first key over
+# its limit (later keys are left untouched). Returns {failed key index
+# or 0, counts of the keys checked}.
+_LIMIT_SCRIPT = """
+local counts = {}
+for i, key in ipairs(KEYS) do
+    local base = 3 * i
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', ARGV[base])
+    redis.call('ZADD', key, ARGV[1], ARGV[2])
+    local count = redis.call('ZCARD', key)
+    redis.call('EXPIRE', key, ARGV[base + 1])
+    counts[i] = count
+    if count > tonumber(ARGV[base + 2]) then return {i, counts} end
+end
+return {0, counts}
+"""
+
 
 class RateLimiter:
     """
@@ -28,63 +50,22 @@ class RateLimiter:
 
     WINDOW_SEC = 60  # 1-minute sliding window
 
+    def __init__(self) -> None:
+        self._script = None  # AsyncScript, registered on first use
+        # Sorted-set members only need to be unique: a per-process random
+        # prefix (other workers share the keys) plus a counter
+        self._member_prefix = uuid.uuid4().hex[:8]
+        self._counter = itertools.count()
+
     async def allow(self, client_ip: str) -> bool:
         """Return True if the request is within rate limits."""
-        redis = redis_manager.client
-        if redis is None:
-            return True  # No Redis → fail-open
-
-        now = time.time()
-        window_start = now - self.WINDOW_SEC
-        # Unique member per request so zadd doesn't deduplicate
-        member = f"{now}:{uuid.uuid4().hex[:8]}"
-
-        # ── Per-IP limit ─────────────────────────────────
-        ip_key = f"rl:ip:{client_ip}"
-        if not await self._check_key(ip_key, now, window_start, member, settings.rate_limit_per_ip):
-            return False
-
-        # ── Per-Subnet (/24) limit ───────────────────────
-        subnet = self._ip_to_subnet(client_ip)
-        sub_key = f"rl:sub:{subnet}"
-        if not await self._check_key(sub_key, now, window_start, member, settings.rate_limit_per_subnet):
-            return False
-
-        # ── Global limit ─────────────────────────────────
-        global_key = "rl:global"
-        if not await self._check_key(global_key, now, window_start, member, settings.rate_limit_global):
-            return False
-
-        return True
+        allowed, _ = await self.allow_with_count(client_ip)
+        return allowed
 
     async def allow_with_count(self, client_ip: str) -> tuple[bool, int]:
         """Like allow(), but also returns the current per-IP request count."""
-        redis = redis_manager.client
-        if redis is None:
-            return True, 0
-
-        now = time.time()
-        window_start = now - self.WINDOW_SEC
-        member = f"{now}:{uuid.uuid4().hex[:8]}"
-
-        ip_key = f"rl:ip:{client_ip}"
-        if not await self._check_key(ip_key, now, window_start, member, settings.rate_limit_per_ip):
-            count = await self._get_count(ip_key, window_start)
-            return False, count
-
-        subnet = self._ip_to_subnet(client_ip)
-        sub_key = f"rl:sub:{subnet}"
-        if not await self._check_key(sub_key, now, window_start, member, settings.rate_limit_per_subnet):
-            count = await self._get_count(ip_key, window_start)
-            return False, count
-
-        global_key = "rl:global"
-        if not await self._check_key(global_key, now, window_start, member, settings.rate_limit_global):
-            count = await self._get_count(ip_key, window_start)
-            return False, count
-
-        count = await self._get_count(ip_key, window_start)
-        return True, count
+        failed, counts = await self.check_request(client_ip)
+        return failed == 0, counts[0] if counts else 0
 
     async def check_rule_limit(
         self, client_ip: str, rule_name: str, limit: int, window_sec: int,
@@ -97,19 +78,40 @@ class RateLimiter:
         if redis is None:
             return True, 0
 
-        now = time.time()
-        window_start = now - window_sec
-        member = f"{now}:{uuid.uuid4().hex[:8]}"
-        key = f"rl:rule:{rule_name}:{client_ip}"
-
-        pipe = redis.pipeline()
-        pipe.zremrangebyscore(key, "-inf", window_start)
-        pipe.zadd(key, {member: now})
-        pipe.zcard(key)
-        pipe.expire(key, window_sec + 10)
-        results = await pipe.execute()
-        count = results[2]
-        return count <= limit, count
+        failed, counts = await self._run_limits(
+            redis, ((f"rl:rule:{rule_name}:{client_ip}", limit, window_sec),),
+        )
+        return failed == 0, counts[0]
+
+    async def check_request(
+        self,
+        client_ip: str,
+        rule_limits: tuple[tuple[str, int, int], ...] = (),
+    ) -> tuple[int, list[int]]:
+        """
+        Record one request against its rule limits, then the per-IP,
+        per-subnet (/24) and global limits, in a single round trip.
+
+        ``rule_limits`` holds (rule_name, limit, window_sec) per matched rule.
+        Returns (failed, counts): ``failed`` is the 1-based position of the
+        first limit exceeded (rules first) or 0, and ``counts`` holds the
+        counts of the limits checked up to and including that one.
+        """
+        redis = redis_manager.client
+        if redis is None:
+            return 0, []  # No Redis → fail-open
+
+        window = self.WINDOW_SEC
+        limits = [
+            (f"rl:rule:{name}:{client_ip}", limit, window_sec)
+            for name, limit, window_sec in rule_limits
+        ]
+        limits += (
+            (f"rl:ip:{client_ip}", settings.rate_limit_per_ip, window),
+            (f"rl:sub:{self._ip_to_subnet(client_ip)}", settings.rate_limit_per_subnet, window),
+            ("rl:global", settings.rate_limit_global, window),
+        )
+        return await self._run_limits(redis, limits)
 
     async def get_ip_count(self, client_ip: str) -> int:
         """Current request count for an IP in the window."""
@@ -127,24 +129,27 @@ class RateLimiter:
             return 0
         return await redis.zcount(key, window_start, "+inf")
 
-    async def _check_key(
-        self, key: str, now: float, window_start: float, member: str, limit: int,
-    ) -> bool:
-        redis = redis_manager.client
-        if redis is None:
-            return True
-        pipe = redis.pipeline()
-        pipe.zremrangebyscore(key, "-inf", window_start)
-        pipe.zadd(key, {member: now})
-        pipe.zcard(key)
-        pipe.expire(key, self.WINDOW_SEC + 10)
-        results = await pipe.execute()
-        count = results[2]  # zcard result
-        return count <= limit
+    async def _run_limits(
+        self, redis, limits: Sequence[tuple[str, int, int]],
+    ) -> tuple[int, list[int]]:
+        """Record this request against (key, limit, window_sec) entries via the Lua script (EVALSHA)."""
+        if self._script is None:
+            self._script = redis.register_script(_LIMIT_SCRIPT)
+        now = time.time()
+        # Unique member per request so zadd doesn't deduplicate
+        member = f"{now}:{self._member_prefix}{next(self._counter):x}"
+        args: list = [now, member]
+        for _, limit, window_sec in limits:
+            args += (now - window_sec, window_sec + 10, limit)
+        failed, counts = await self._script(
+            keys=[key for key, _, _ in limits], args=args, client=redis,
+        )
+        return int(failed), [int(c) for c in counts]
 
     @staticmethod
+    @lru_cache(maxsize=65_536)
     def _ip_to_subnet(ip: str) -> str:
-        """Convert an IP address to its /24 subnet."""
+        """Convert an IP address to its /24 subnet (memoized)."""
         try:
             addr = IPv4Address(ip)
             network = IPv4Network(f"{addr}/24", strict=False)
@@ -8,10 +8,9 @@ behavioral signals to identify clients beyond IP address.
 from __future__ import annotations
 
 import hashlib
-import json
 import logging
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Iterable, Mapping, Optional
 
 from fastapi import Request
 
@@ -40,30 +39,45 @@ class RequestFingerprint:
             self.user_agent or "",
             self.accept_language or "",
         ]
-        digest = hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+        digest = hashlib.blake2b("|".join(parts).encode(), digest_size=8).hexdigest()
         return f"{self.client_ip}:{digest}"
 
 
-def compute_header_order_hash(headers: dict) -> str:
+_FINGERPRINT_HEADERS = ("user-agent", "accept-language", "accept-encoding", "connection")
+
+
+def compute_header_order_hash(headers: Mapping[str, str]) -> str:
     """Hash of header keys in received order — unique per HTTP stack."""
-    keys = list(headers.keys())
-    return hashlib.md5(json.dumps(keys).encode()).hexdigest()
+    return _order_hash(headers.keys())
+
+
+def _order_hash(keys: Iterable[str]) -> str:
+    # Header names are HTTP tokens and can't contain a tab, so the join is
+    # unambiguous; a fingerprint needs no cryptographic hash
+    return hashlib.blake2b("\t".join(keys).encode(), digest_size=8).hexdigest()
 
 
 async def fingerprint_request(
     request: Request,
     client_ip: str,
     ja3_hash: Optional[str] = None,
+    include_raw_headers: bool = False,
 ) -> RequestFingerprint:
     """Build a RequestFingerprint from a FastAPI Request."""
-    headers = dict(request.headers)
+    # One pass over the headers instead of copying them into a dict
+    wanted: dict[str, Optional[str]] = dict.fromkeys(_FINGERPRINT_HEADERS)
+    keys = []
+    for key, value in request.headers.items():
+        keys.append(key)
+        if key in wanted and wanted[key] is None:
+            wanted[key] = value
     return RequestFingerprint(
         client_ip=client_ip,
         ja3_hash=ja3_hash,
-        header_order_hash=compute_header_order_hash(headers),
-        user_agent=headers.get("user-agent"),
-        accept_language=headers.get("accept-language"),
-        accept_encoding=headers.get("accept-encoding"),
-        connection_type=headers.get("connection"),
-        raw_headers=headers,
+        header_order_hash=_order_hash(keys),
+        user_agent=wanted["user-agent"],
+        accept_language=wanted["accept-language"],
+        accept_encoding=wanted["accept-encoding"],
+        connection_type=wanted["connection"],
+        raw_headers=dict(request.headers) if include_raw_headers else {},
     )
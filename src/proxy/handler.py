@@ -8,15 +8,21 @@ and forwards legitimate traffic to the upstream target.
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
+import math
+import sys
 import time
 from collections import deque
 from dataclasses import dataclass, field
+from itertools import islice
 from typing import Optional
 
 import httpx
+import numpy as np
+import orjson
 from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 
 from src.config import settings, ProtectionLevel
 from src.detection.engine import detection_engine
@@ -26,19 +32,71 @@ from src.mitigation.blocker import ip_blocker
 from src.mitigation.challenge import challenge_manager
 from src.rules.engine import rules_engine
 from src.alerts.dispatcher import alert_manager, AlertEvent
-from src.storage.database import async_session, AttackLog
-from src.geoip.lookup import lookup as geoip_lookup
+from src.storage.attack_writer import attack_log_writer
+from src.geoip.lookup import lookup_dict as geoip_lookup_dict
 
 logger = logging.getLogger("sentinel.proxy")
 
 router = APIRouter()
 
+# Hop-by-hop headers are not forwarded in either direction; "host" is
+# rewritten by the upstream client
+_HOP_HEADERS = frozenset({
+    "host", "connection", "keep-alive", "transfer-encoding",
+    "upgrade", "proxy-connection", "te", "trailer",
+})
+_HOP_HEADERS_RAW = frozenset(h.encode("latin-1") for h in _HOP_HEADERS)
+
 # Persistent async HTTP client (connection-pooled)
 _http_client: Optional[httpx.AsyncClient] = None
 
+try:
+    import h2  # noqa: F401
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
 
 # ── Real-time traffic counters ──────────────────────────────
 
+RPS_WINDOW = 10  # seconds averaged by requests_per_second
+EVENT_PATH_MAX = 256  # longer paths are truncated in recent_events
+HLL_PRECISION = 14  # 2**14 one-byte registers, ~0.8% standard error
+
+
+class HyperLogLog:
+    """Approximate distinct counter in constant memory (16 KiB by default).
+
+    Set-like ``add`` / ``len`` so it can stand in for a set of IPs when only
+    the count is needed. Uses the process-local ``hash()``, so registers
+    are not comparable across processes.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION) -> None:
+        self._p = precision
+        self._m = 1 << precision
+        self._rest_bits = 64 - precision
+        self._rest_mask = (1 << self._rest_bits) - 1
+        self._registers = bytearray(self._m)
+
+    def add(self, item: str) -> None:
+        h = hash(item) & 0xFFFF_FFFF_FFFF_FFFF
+        idx = h >> self._rest_bits
+        # Position of the leftmost 1-bit in the remaining bits
+        rank = self._rest_bits - (h & self._rest_mask).bit_length() + 1
+        if rank > self._registers[idx]:
+            self._registers[idx] = rank
+
+    def __len__(self) -> int:
+        m = self._m
+        regs = np.frombuffer(self._registers, dtype=np.uint8)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / float(np.ldexp(1.0, -regs.astype(np.int32)).sum())
+        zeros = m - int(np.count_nonzero(regs))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
 
 @dataclass
 class TrafficCounters:
@@ -48,54 +106,113 @@ class TrafficCounters:
     rate_limited_requests: int = 0
     forwarded_requests: int = 0
     challenged_requests: int = 0
-    active_ips: set = field(default_factory=set)
+    active_ips: HyperLogLog = field(default_factory=HyperLogLog)
     recent_events: deque = field(default_factory=lambda: deque(maxlen=200))
-    # Per-second request timestamps for RPS calculation
-    _request_times: deque = field(default_factory=lambda: deque(maxlen=10000))
+    # Total events ever added; lets readers fetch only what is new
+    event_seq: int = 0
+    # Per-second request counts for RPS: ring of RPS_WINDOW buckets,
+    # a running total, and the second the newest bucket belongs to
+    _buckets: list = field(default_factory=lambda: [0] * RPS_WINDOW)
+    _bucket_sec: int = 0
+    _bucket_total: int = 0
 
     @property
     def requests_per_second(self) -> float:
         """Calculate RPS from last 10 seconds."""
-        now = time.time()
-        cutoff = now - 10
-        count = sum(1 for t in self._request_times if t > cutoff)
-        return count / 10.0
+        self._advance(time.monotonic_ns() // 1_000_000_000)
+        return self._bucket_total / RPS_WINDOW
 
     def record_request(self) -> None:
         self.total_requests += 1
-        self._request_times.append(time.time())
+        sec = time.monotonic_ns() // 1_000_000_000
+        self._advance(sec)
+        self._buckets[sec % RPS_WINDOW] += 1
+        self._bucket_total += 1
+
+    def _advance(self, sec: int) -> None:
+        """Zero the buckets of seconds that have left the window."""
+        if sec == self._bucket_sec:
+            return
+        for s in range(self._bucket_sec + 1, min(sec, self._bucket_sec + RPS_WINDOW) + 1):
+            self._bucket_total -= self._buckets[s % RPS_WINDOW]
+            self._buckets[s % RPS_WINDOW] = 0
+        self._bucket_sec = sec
+
+    def add_event(self, event: dict) -> None:
+        self.recent_events.append(event)
+        self.event_seq += 1
+
+    def events_since(self, seq: int) -> list[dict]:
+        """Events added after sequence number ``seq`` (oldest first)."""
+        new = min(self.event_seq - seq, len(self.recent_events))
+        if new <= 0:
+            return []
+        events = list(islice(reversed(self.recent_events), new))
+        events.reverse()
+        return _with_geo(events)
+
+    def recent(self) -> list[dict]:
+        """All buffered events, newest first."""
+        return _with_geo(list(reversed(self.recent_events)))
+
+
+def _with_geo(events: list[dict]) -> list[dict]:
+    """Attach GeoIP data to events on read.
+
+    Events are recorded without it because most are evicted from the
+    ring before anyone looks; the dict is filled in once and kept.
+    """
+    for event in events:
+        if "geo" not in event and "ip" in event:
+            event["geo"] = geoip_lookup_dict(event["ip"])
+    return events
 
 
 traffic = TrafficCounters()
 
 
 async def get_http_client() -> httpx.AsyncClient:
-    """Lazily initialise the shared httpx async client."""
+    """Return the shared httpx async client (opened at startup, or lazily)."""
     global _http_client
     if _http_client is None or _http_client.is_closed:
+        # Redirects are passed back to the client untouched; HTTP/2 is
+        # used when h2 is installed and the upstream negotiates it
         _http_client = httpx.AsyncClient(
             base_url=settings.target_url,
             timeout=httpx.Timeout(settings.proxy_timeout),
-            follow_redirects=True,
+            http2=_HTTP2_AVAILABLE,
             limits=httpx.Limits(
-                max_connections=200,
-                max_keepalive_connections=50,
+                max_connections=1000,
+                max_keepalive_connections=200,
+                keepalive_expiry=30,
             ),
         )
     return _http_client
 
 
+async def close_http_client() -> None:
+    """Close the shared upstream client on shutdown."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 def get_client_ip(request: Request) -> str:
-    """Extract the real client IP, respecting X-Forwarded-For."""
+    """Extract the real client IP, respecting X-Forwarded-For.
+
+    Interned: a few IPs dominate under attack and are held by events,
+    sessions and cache keys, so they share one string each.
+    """
     forwarded = request.headers.get("x-forwarded-for")
     if forwarded:
-        return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "0.0.0.0"
+        return sys.intern(forwarded.split(",", 1)[0].strip())
+    return sys.intern(request.client.host) if request.client else "0.0.0.0"
 
 
-# ── DB logging helper (fire-and-forget) ─────────────────────
+# ── DB logging helper (batched, non-blocking) ───────────────
 
-async def _log_attack(
+def _log_attack(
     source_ip: str,
     action: str,
     threat_score: float,
@@ -105,23 +222,17 @@ async def _log_attack(
     attack_type: str | None = None,
     metadata: dict | None = None,
 ) -> None:
-    """Persist an attack event to the database (best-effort)."""
-    try:
-        async with async_session() as session:
-            log = AttackLog(
-                source_ip=source_ip,
-                attack_type=attack_type,
-                threat_score=threat_score,
-                action_taken=action,
-                path=path,
-                method=method,
-                user_agent=user_agent,
-                metadata_json=json.dumps(metadata) if metadata else None,
-            )
-            session.add(log)
-            await session.commit()
-    except Exception:
-        logger.debug("Failed to write attack log", exc_info=True)
+    """Queue an attack event for the batched DB writer (best-effort)."""
+    attack_log_writer.enqueue(
+        source_ip,
+        action,
+        threat_score,
+        path=path,
+        method=method,
+        user_agent=user_agent,
+        attack_type=attack_type,
+        metadata_json=orjson.dumps(metadata).decode() if metadata else None,
+    )
 
 
 # ── Alert helper (fire-and-forget) ──────────────────────────
@@ -150,18 +261,15 @@ async def _send_alert(
 def _make_event(
     client_ip: str, action: str, path: str, method: str, **extra
 ) -> dict:
-    """Build an event dict with GeoIP data."""
-    geo = geoip_lookup(client_ip)
-    event = {
+    """Build an event dict; GeoIP data is attached when it is read."""
+    return {
         "time": time.time(),
         "ip": client_ip,
         "action": action,
-        "path": path,
+        "path": path[:EVENT_PATH_MAX],
         "method": method,
-        "geo": geo.to_dict(),
         **extra,
     }
-    return event
 
 
 @router.api_route(
@@ -198,75 +306,81 @@ async def reverse_proxy(request: Request, path: str = "") -> Response:
     # ── 1. Blocklist check ───────────────────────────────
     if await ip_blocker.is_blocked(client_ip):
         traffic.blocked_requests += 1
-        traffic.recent_events.append(
+        traffic.add_event(
             _make_event(client_ip, "blocked", url_path, request.method)
         )
         logger.debug("Blocked IP tried to connect: %s", client_ip)
         return Response(status_code=403, content="Forbidden")
 
-    # ── 2. Per-rule rate limits (YAML rules) ─────────────
+    # ── 2–3. Rule + global rate limits ───────────────────
+    # One Redis round trip: YAML rule limits first, then per-IP / subnet / global
     matched_rules = rules_engine.match_request(url_path, request.method)
-    for rule in matched_rules:
-        if rule.limits and rule.limits.per_ip:
-            limit_count, limit_window = rules_engine.parse_rate_string(rule.limits.per_ip)
-            allowed, count = await rate_limiter.check_rule_limit(
-                client_ip, rule.name, limit_count, limit_window,
+    limited_rules = [rule for rule in matched_rules if rule.limits and rule.limits.per_ip]
+    failed, counts = await rate_limiter.check_request(
+        client_ip,
+        tuple((rule.name, rule.limits.per_ip_count, rule.limits.per_ip_window) for rule in limited_rules),
+    )
+    n_rules = len(limited_rules)
+
+    if 0 < failed <= n_rules:
+        rule = limited_rules[failed - 1]
+        count = counts[failed - 1]
+        limit_count, limit_window = rule.limits.per_ip_count, rule.limits.per_ip_window
+        detection_engine.distrust(client_ip)
+        traffic.rate_limited_requests += 1
+        traffic.add_event(
+            _make_event(client_ip, "rate_limited", url_path, request.method, rule=rule.name)
+        )
+        logger.info(
+            "Rule '%s' rate limit exceeded for %s (%d/%d)",
+            rule.name, client_ip, count, limit_count,
+        )
+        # Check escalation steps for this rule
+        usage_pct = (count / limit_count * 100) if limit_count else 0
+        escalation_action = _resolve_escalation(rule.escalation, usage_pct)
+
+        if escalation_action == "block":
+            duration = _parse_duration(rule.escalation)
+            await ip_blocker.block(
+                client_ip,
+                reason=f"Rule escalation: {rule.name}",
+                duration_sec=duration,
             )
-            if not allowed:
-                traffic.rate_limited_requests += 1
-                traffic.recent_events.append(
-                    _make_event(client_ip, "rate_limited", url_path, request.method, rule=rule.name)
-                )
-                logger.info(
-                    "Rule '%s' rate limit exceeded for %s (%d/%d)",
-                    rule.name, client_ip, count, limit_count,
-                )
-                # Check escalation steps for this rule
-                usage_pct = (count / limit_count * 100) if limit_count else 0
-                escalation_action = _resolve_escalation(rule.escalation, usage_pct)
-
-                if escalation_action == "block":
-                    duration = _parse_duration(rule.escalation)
-                    await ip_blocker.block(
-                        client_ip,
-                        reason=f"Rule escalation: {rule.name}",
-                        duration_sec=duration,
-                    )
-                    traffic.blocked_requests += 1
-                    asyncio.create_task(_log_attack(
-                        client_ip, "rule_blocked", 0.0, url_path,
-                        request.method, ua, attack_type="rule_violation",
-                        metadata={"rule": rule.name, "count": count},
-                    ))
-                    asyncio.create_task(_send_alert(
-                        "warning",
-                        f"Rule escalation: {rule.name}",
-                        f"IP {client_ip} blocked — {count} requests in {limit_window}s",
-                        source_ip=client_ip,
-                    ))
-                    return Response(status_code=403, content="Forbidden")
-
-                if escalation_action == "js_challenge":
-                    challenge_resp = await challenge_manager.maybe_challenge(request, client_ip)
-                    if challenge_resp is not None:
-                        traffic.challenged_requests += 1
-                        return challenge_resp
-
-                return Response(status_code=429, content="Too Many Requests")
-
-    # ── 3. Global rate limiting ──────────────────────────
-    rate_allowed, rate_count = await rate_limiter.allow_with_count(client_ip)
-    if not rate_allowed:
+            traffic.blocked_requests += 1
+            _log_attack(
+                client_ip, "rule_blocked", 0.0, url_path,
+                request.method, ua, attack_type="rule_violation",
+                metadata={"rule": rule.name, "count": count},
+            )
+            asyncio.create_task(_send_alert(
+                "warning",
+                f"Rule escalation: {rule.name}",
+                f"IP {client_ip} blocked — {count} requests in {limit_window}s",
+                source_ip=client_ip,
+            ))
+            return Response(status_code=403, content="Forbidden")
+
+        if escalation_action == "js_challenge":
+            challenge_resp = await challenge_manager.maybe_challenge(request, client_ip)
+            if challenge_resp is not None:
+                traffic.challenged_requests += 1
+                return challenge_resp
+
+        return Response(status_code=429, content="Too Many Requests")
+
+    # Per-IP count (the first key after the rule keys)
+    rate_count = counts[n_rules] if len(counts) > n_rules else 0
+    if failed:
         traffic.rate_limited_requests += 1
-        traffic.recent_events.append(
+        traffic.add_event(
             _make_event(client_ip, "rate_limited", url_path, request.method)
         )
         logger.info("Global rate limit exceeded: %s (%d reqs)", client_ip, rate_count)
-        asyncio.create_task(_log_attack(
+        _log_attack(
             client_ip, "rate_limited", 0.0, url_path,
             request.method, ua,
             metadata={"rate_count": rate_count},
-        ))
+        )
         return Response(status_code=429, content="Too Many Requests")
 
     # ── 4. AI detection scoring ──────────────────────────
@@ -283,11 +397,8 @@ async def reverse_proxy(request: Request, path: str = "") -> Response:
 
     if threat_score >= settings.anomaly_threshold:
         # Classify the attack for logging/alerts
-        bscore = behavior_analyzer.get_session(client_ip)
-        bscore_val = 0.0
-        if bscore and bscore.request_count >= 3:
-            from src.detection.behavior import BehaviorAnalyzer
-            bscore_val = BehaviorAnalyzer._compute_score(BehaviorAnalyzer(), bscore)
+        session = behavior_analyzer.get_session(client_ip)
+        bscore_val = behavior_analyzer.compute_score(session) if session else 0.0
 
         attack_type = await detection_engine.classify_attack(
             request, client_ip,
@@ -305,43 +416,43 @@ async def reverse_proxy(request: Request, path: str = "") -> Response:
         if level == ProtectionLevel.MONITOR:
             # Just log, don't act
             event_data["action"] = "monitored"
-            traffic.recent_events.append(event_data)
-            asyncio.create_task(_log_attack(
+            traffic.add_event(event_data)
+            _log_attack(
                 client_ip, "monitored", threat_score, url_path,
                 request.method, ua, attack_type=attack_type,
-            ))
+            )
 
         elif level == ProtectionLevel.JS_CHALLENGE:
             challenge_resp = await challenge_manager.maybe_challenge(request, client_ip)
             if challenge_resp is not None:
                 event_data["action"] = "challenged"
-                traffic.recent_events.append(event_data)
+                traffic.add_event(event_data)
                 traffic.challenged_requests += 1
-                asyncio.create_task(_log_attack(
+                _log_attack(
                     client_ip, "challenged", threat_score, url_path,
                     request.method, ua, attack_type=attack_type,
-                ))
+                )
                 return challenge_resp
 
         elif level == ProtectionLevel.RATE_LIMIT:
             event_data["action"] = "rate_limited"
-            traffic.recent_events.append(event_data)
+            traffic.add_event(event_data)
             traffic.rate_limited_requests += 1
-            asyncio.create_task(_log_attack(
+            _log_attack(
                 client_ip, "rate_limited", threat_score, url_path,
                 request.method, ua, attack_type=attack_type,
-            ))
+            )
             return Response(status_code=429, content="Too Many Requests")
 
         elif level in (ProtectionLevel.BLOCK, ProtectionLevel.BLACKHOLE):
             await ip_blocker.block(client_ip, reason=f"threat score {threat_score:.2f}")
             event_data["action"] = "auto_blocked"
-            traffic.recent_events.append(event_data)
+            traffic.add_event(event_data)
             traffic.blocked_requests += 1
-            asyncio.create_task(_log_attack(
+            _log_attack(
                 client_ip, "blocked", threat_score, url_path,
                 request.method, ua, attack_type=attack_type,
-            ))
+            )
             asyncio.create_task(_send_alert(
                 "critical",
                 f"Attack detected: {attack_type or 'unknown'}",
@@ -352,21 +463,29 @@ async def reverse_proxy(request: Request, path: str = "") -> Response:
             return Response(status_code=403, content="Forbidden")
 
     # ── 6. Forward to upstream ───────────────────────────
-    body = await request.body()
-    headers = dict(request.headers)
-    headers.pop("host", None)
+    # ASGI header names arrive lowercased, so filter on the raw bytes
+    headers = {
+        k.decode("latin-1"): v.decode("latin-1")
+        for k, v in request.headers.raw
+        if k not in _HOP_HEADERS_RAW
+    }
     headers["x-forwarded-for"] = client_ip
     headers["x-sentinel-score"] = str(round(threat_score, 4))
 
+    # Stream the client upload through rather than buffering it; requests
+    # without a body send none so upstreams don't see a chunked GET
+    has_body = "content-length" in headers or "transfer-encoding" in request.headers
+    query = request.url.query
     client = await get_http_client()
     try:
-        upstream_resp = await client.request(
+        upstream_req = client.build_request(
             method=request.method,
-            url=url_path,
+            # Raw query string keeps order and repeated keys (?a=1&a=2)
+            url=f"{url_path}?{query}" if query else url_path,
             headers=headers,
-            content=body,
-            params=dict(request.query_params),
+            content=request.stream() if has_body else None,
         )
+        upstream_resp = await client.send(upstream_req, stream=True)
     except httpx.RequestError as exc:
         logger.error("Upstream error: %s", exc)
         return Response(status_code=502, content="Bad Gateway")
@@ -379,48 +498,36 @@ async def reverse_proxy(request: Request, path: str = "") -> Response:
         elapsed * 1000, threat_score,
     )
 
-    # Filter hop-by-hop headers from upstream response
-    resp_headers = {}
-    skip_headers = {"transfer-encoding", "connection", "keep-alive"}
-    for k, v in upstream_resp.headers.items():
-        if k.lower() not in skip_headers:
-            resp_headers[k] = v
+    # Filter hop-by-hop headers from upstream response (httpx yields lowercased keys)
+    resp_headers = {k: v for k, v in upstream_resp.headers.items() if k not in _HOP_HEADERS}
 
-    return Response(
-        content=upstream_resp.content,
+    # Raw (still content-encoded) bytes, so upstream framing headers stay valid
+    return StreamingResponse(
+        upstream_resp.aiter_raw(),
         status_code=upstream_resp.status_code,
         headers=resp_headers,
+        background=BackgroundTask(upstream_resp.aclose),
     )
 
 
 # ── Helpers ──────────────────────────────────────────────
 
 def _resolve_escalation(steps: list, usage_pct: float) -> str:
-    """Given usage percentage, return the highest matching escalation action."""
+    """Given usage percentage, return the highest matching escalation action.
+
+    ``steps`` is sorted by threshold when the rule is loaded.
+    """
     action = "rate_limit"
-    for step in sorted(steps, key=lambda s: s.threshold):
-        if usage_pct >= step.threshold:
-            action = step.action
+    for step in steps:
+        if usage_pct < step.threshold:
+            break
+        action = step.action
     return action
 
 
 def _parse_duration(steps: list) -> int | None:
-    """Extract block duration from the highest escalation step that has one."""
-    for step in reversed(sorted(steps, key=lambda s: s.threshold)):
-        if step.duration:
-            return _duration_to_seconds(step.duration)
+    """Return the block duration of the highest escalation step that has one."""
+    for step in reversed(steps):
+        if step.duration_sec is not None:
+            return step.duration_sec
     return None
-
-
-def _duration_to_seconds(dur: str) -> int:
-    """Parse '10m', '1h', '2d' into seconds."""
-    dur = dur.strip().lower()
-    if dur.endswith("m"):
-        return int(dur[:-1]) * 60
-    if dur.endswith("h"):
-        return int(dur[:-1]) * 3600
-    if dur.endswith("d"):
-        return int(dur[:-1]) * 86400
-    if dur.endswith("s"):
-        return int(dur[:-1])
-    return int(dur)
@@ -18,12 +18,18 @@ from src.config import settings
 
 logger = logging.getLogger("sentinel.rules")
 
+# libyaml's C loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 @dataclass
 class RateLimit:
     """Rate limit definition."""
     per_ip: Optional[str] = None        # e.g. "5/minute"
     per_subnet: Optional[str] = None    # e.g. "50/minute"
+    # per_ip parsed at load time so the proxy doesn't re-split it per request
+    per_ip_count: int = 0
+    per_ip_window: int = 0
 
 
 @dataclass
@@ -32,6 +38,7 @@ class EscalationStep:
     threshold: float = 0.0    # percentage (0–100)
     action: str = "monitor"   # monitor | js_challenge | rate_limit | block
     duration: Optional[str] = None  # e.g. "1h", "30m"
+    duration_sec: Optional[int] = None  # duration parsed at load time
 
 
 @dataclass
@@ -41,15 +48,34 @@ class Rule:
     match_path: Optional[str] = None
     match_method: Optional[str] = None
     limits: Optional[RateLimit] = None
-    escalation: list[EscalationStep] = field(default_factory=list)
+    escalation: list[EscalationStep] = field(default_factory=list)  # sorted by threshold
     enabled: bool = True
 
 
+def duration_to_seconds(dur: str) -> int:
+    """Parse '10m', '1h', '2d' into seconds."""
+    dur = str(dur).strip().lower()
+    if dur.endswith("m"):
+        return int(dur[:-1]) * 60
+    if dur.endswith("h"):
+        return int(dur[:-1]) * 3600
+    if dur.endswith("d"):
+        return int(dur[:-1]) * 86400
+    if dur.endswith("s"):
+        return int(dur[:-1])
+    return int(dur)
+
+
 class RulesEngine:
     """Loads and evaluates YAML-defined protection rules."""
 
     def __init__(self) -> None:
         self._rules: list[Rule] = []
+        # Path index over enabled rules, rebuilt on load; values are
+        # positions in _rules so matches keep file order
+        self._exact: dict[str, list[int]] = {}
+        self._prefixes: list[tuple[str, int]] = []
+        self._any_path: list[int] = []
 
     @property
     def rules(self) -> list[Rule]:
@@ -77,18 +103,30 @@ class RulesEngine:
             except Exception:
                 logger.exception("Failed to load rule file: %s", path)
 
+        self._build_index()
         logger.info("Loaded %d rule file(s) from %s", loaded, directory)
         return loaded
 
+    def load_from_string(self, text: str) -> int:
+        """Load rules from YAML text. Returns the number of rules added."""
+        added = self._load_text(text)
+        self._build_index()
+        return added
+
     def match_request(self, path: str, method: str) -> list[Rule]:
         """Return all rules matching the given path and method."""
+        indices = self._any_path + self._exact.get(path, [])
+        for prefix, i in self._prefixes:
+            if path.startswith(prefix):
+                indices.append(i)
+        if not indices:
+            return []
+
+        method = method.upper()
         matched: list[Rule] = []
-        for rule in self._rules:
-            if not rule.enabled:
-                continue
-            if rule.match_path and not self._path_matches(path, rule.match_path):
-                continue
-            if rule.match_method and rule.match_method.upper() != method.upper():
+        for i in sorted(indices):
+            rule = self._rules[i]
+            if rule.match_method and rule.match_method != method:
                 continue
             matched.append(rule)
         return matched
@@ -106,52 +144,68 @@ class RulesEngine:
 
     # ── Internal ─────────────────────────────────────────
 
+    def _build_index(self) -> None:
+        """Bucket enabled rules by exact path, path prefix, or no path."""
+        self._exact, self._prefixes, self._any_path = {}, [], []
+        for i, rule in enumerate(self._rules):
+            if not rule.enabled:
+                continue
+            if not rule.match_path:
+                self._any_path.append(i)
+            elif rule.match_path.endswith("*"):
+                self._prefixes.append((rule.match_path[:-1], i))
+            else:
+                self._exact.setdefault(rule.match_path, []).append(i)
+
     def _load_file(self, path: Path) -> None:
-        with open(path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        self._load_text(path.read_text(encoding="utf-8"))
 
+    def _load_text(self, text: str) -> int:
+        data = yaml.load(text, Loader=_YamlLoader)
         if not data or "rules" not in data:
-            return
+            return 0
 
         for raw in data["rules"]:
             rule = self._parse_rule(raw)
             self._rules.append(rule)
             logger.debug("Loaded rule: %s", rule.name)
+        return len(data["rules"])
 
     def _parse_rule(self, raw: dict[str, Any]) -> Rule:
         match = raw.get("match", {})
         limits_raw = raw.get("limits", {})
         escalation_raw = raw.get("escalation", [])
 
-        limits = RateLimit(
-            per_ip=limits_raw.get("per_ip"),
-            per_subnet=limits_raw.get("per_subnet"),
-        ) if limits_raw else None
-
-        escalation = [
-            EscalationStep(
-                threshold=step.get("threshold", 0),
-                action=step.get("action", "monitor"),
-                duration=step.get("duration"),
+        limits = None
+        if limits_raw:
+            limits = RateLimit(
+                per_ip=limits_raw.get("per_ip"),
+                per_subnet=limits_raw.get("per_subnet"),
             )
-            for step in escalation_raw
-        ]
+            if limits.per_ip:
+                limits.per_ip_count, limits.per_ip_window = self.parse_rate_string(limits.per_ip)
+
+        escalation = sorted(
+            (
+                EscalationStep(
+                    threshold=step.get("threshold", 0),
+                    action=step.get("action", "monitor"),
+                    duration=step.get("duration"),
+                    duration_sec=duration_to_seconds(step["duration"]) if step.get("duration") else None,
+                )
+                for step in escalation_raw
+            ),
+            key=lambda s: s.threshold,
+        )
 
         return Rule(
             name=raw.get("name", "unnamed"),
             match_path=match.get("path"),
-            match_method=match.get("method"),
+            match_method=(match.get("method") or "").upper() or None,
             limits=limits,
             escalation=escalation,
             enabled=raw.get("enabled", True),
         )
 
-    @staticmethod
-    def _path_matches(request_path: str, rule_path: str) -> bool:
-        """Simple prefix / exact path matching."""
-        if rule_path.endswith("*"):
-            return request_path.startswith(rule_path[:-1])
-        return request_path == rule_path
-
 
 rules_engine = RulesEngine()
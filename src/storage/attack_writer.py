@@ -0,0 +1,146 @@
+"""
+Sentinel DDoS — Batched Attack Log Writer.
+
+The proxy enqueues attack events without waiting on the database; a
+background task drains the queue in batches (up to ``BATCH_SIZE`` rows
+or every ``FLUSH_INTERVAL_SEC``) and writes each batch in a single
+transaction. Large batches on PostgreSQL go through asyncpg's binary
+COPY instead of INSERT.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy import insert
+
+from src.storage.database import async_session, engine, utc_now, AttackLog
+
+logger = logging.getLogger("sentinel.storage.attack_writer")
+
+QUEUE_SIZE = 10_000
+BATCH_SIZE = 500
+FLUSH_INTERVAL_SEC = 1.0
+COPY_THRESHOLD = 100  # below this, COPY setup costs more than it saves
+
+COLUMNS = (
+    "timestamp", "source_ip", "attack_type", "threat_score",
+    "action_taken", "path", "method", "user_agent", "metadata_json",
+)
+
+
+class AttackLogWriter:
+    """Queues attack log rows and flushes them to the database in batches."""
+
+    def __init__(
+        self,
+        batch_size: int = BATCH_SIZE,
+        interval: float = FLUSH_INTERVAL_SEC,
+        maxsize: int = QUEUE_SIZE,
+    ) -> None:
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: asyncio.Queue[tuple] = asyncio.Queue(maxsize=maxsize)
+        self._running = False
+        self._pending: list[tuple] = []
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def enqueue(
+        self,
+        source_ip: str,
+        action: str,
+        threat_score: float,
+        path: str = "",
+        method: str = "",
+        user_agent: str = "",
+        attack_type: str | None = None,
+        metadata_json: str | None = None,
+    ) -> None:
+        """Queue one attack event. Drops it if the queue is full."""
+        row = (
+            utc_now(), source_ip, attack_type, threat_score,
+            action, path, method, user_agent, metadata_json,
+        )
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def start(self) -> None:
+        """Start the background flush loop."""
+        self._running = True
+        self._task = asyncio.create_task(self._loop())
+        logger.info("Attack log writer started (batch=%d, every %.1fs)", self.batch_size, self.interval)
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still queued."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while self._pending or not self._queue.empty():
+            self._fill()
+            try:
+                await self._flush_pending()
+            except Exception:
+                logger.warning("Failed to write attack log batch on shutdown", exc_info=True)
+
+    def _fill(self) -> None:
+        """Move queued rows into the pending batch without waiting."""
+        while len(self._pending) < self.batch_size and not self._queue.empty():
+            self._pending.append(self._queue.get_nowait())
+
+    async def _collect(self) -> None:
+        """Wait for the first row, then keep collecting until the batch is full or the interval ends."""
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            self._pending.append(await self._queue.get())
+        deadline = loop.time() + self.interval
+        while True:
+            self._fill()
+            timeout = deadline - loop.time()
+            if len(self._pending) >= self.batch_size or timeout <= 0:
+                return
+            try:
+                self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                return
+
+    async def _flush_pending(self) -> None:
+        batch, self._pending = self._pending, []
+        await self.flush(batch)
+
+    async def flush(self, batch: list[tuple]) -> None:
+        """Write one batch in a single transaction."""
+        if not batch:
+            return
+        if engine.dialect.driver == "asyncpg" and len(batch) > COPY_THRESHOLD:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    AttackLog.__tablename__, records=batch, columns=COLUMNS,
+                )
+            return
+        async with async_session() as session:
+            await session.execute(insert(AttackLog), [dict(zip(COLUMNS, row)) for row in batch])
+            await session.commit()
+
+    async def _loop(self) -> None:
+        while self._running:
+            try:
+                await self._collect()
+                await self._flush_pending()
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.warning("Failed to write attack log batch", exc_info=True)
+
+
+# Singleton
+attack_log_writer = AttackLogWriter()
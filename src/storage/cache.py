@@ -0,0 +1,79 @@
+"""
+Sentinel DDoS — Redis Response Cache.
+
+Short-TTL caching for read-only API endpoints. Keys are built from the
+endpoint name and its query parameters only (no user identity).
+Nothing invalidates entries on write: a cached result may miss rows
+logged within its TTL (15-30s for analytics), which is the freshness the
+dashboards are built for. Use ``clear`` for an explicit reset.
+Fails open: without Redis, or on any Redis error, the endpoint runs
+uncached.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import logging
+from typing import Any, Awaitable, Callable
+
+from src.storage.redis_client import redis_manager
+
+logger = logging.getLogger("sentinel.storage.cache")
+
+CACHE_PREFIX = "sentinel:cache"
+
+
+def _cache_key(namespace: str, name: str, params: dict[str, Any]) -> str:
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return f"{CACHE_PREFIX}:{namespace}:{name}:{query}"
+
+
+def cached(namespace: str, expire: int = 30):
+    """Cache a JSON-serialisable async endpoint result in Redis for ``expire`` seconds."""
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @functools.wraps(func)
+        async def wrapper(**params: Any) -> Any:
+            redis = redis_manager.client
+            if redis is None:
+                return await func(**params)
+
+            key = _cache_key(namespace, func.__name__, params)
+            try:
+                hit = await redis.get(key)
+            except Exception:
+                logger.debug("Cache read failed for %s", key, exc_info=True)
+                return await func(**params)
+            if hit is not None:
+                return json.loads(hit)
+
+            result = await func(**params)
+            try:
+                await redis.set(key, json.dumps(result), ex=expire)
+            except Exception:
+                logger.debug("Cache write failed for %s", key, exc_info=True)
+            return result
+
+        # Resolve string annotations against the endpoint's own module,
+        # FastAPI would otherwise look them up in this one
+        wrapper.__signature__ = inspect.signature(func, eval_str=True)
+        return wrapper
+
+    return decorator
+
+
+async def clear(namespace: str) -> int:
+    """Drop every cached entry in ``namespace``. Returns the number of keys removed."""
+    redis = redis_manager.client
+    if redis is None:
+        return 0
+    try:
+        keys = [k async for k in redis.scan_iter(match=f"{CACHE_PREFIX}:{namespace}:*")]
+        if keys:
+            await redis.delete(*keys)
+        return len(keys)
+    except Exception:
+        logger.warning("Failed to clear %s cache", namespace, exc_info=True)
+        return 0
@@ -7,11 +7,13 @@ Stores configuration, rules history, attack logs, and session data.
 from __future__ import annotations
 
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Optional
 
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text, Boolean, func
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text, Boolean, event, func
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import DeclarativeBase
 
 from src.config import settings
@@ -35,7 +37,7 @@ class AttackLog(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     timestamp = Column(DateTime, default=func.now(), nullable=False)
-    source_ip = Column(String(45), nullable=False, index=True)
+    source_ip = Column(String(45), nullable=False)
     attack_type = Column(String(50), nullable=True)
     threat_score = Column(Float, nullable=False)
     action_taken = Column(String(50), nullable=False)  # blocked / challenged / monitored
@@ -44,6 +46,44 @@ class AttackLog(Base):
     user_agent = Column(Text, nullable=True)
     metadata_json = Column(Text, nullable=True)
 
+    # Analytics filter on a time window, then group/filter by one column
+    __table_args__ = (
+        Index("ix_attack_logs_ts", timestamp.desc()),
+        Index("ix_attack_logs_ip_ts", source_ip, timestamp.desc()),
+        Index("ix_attack_logs_type_ts", attack_type, timestamp.desc()),
+        Index("ix_attack_logs_action_ts", action_taken, timestamp.desc()),
+        # Append-only, time-ordered: a BRIN index is tiny on PostgreSQL
+        Index("ix_attack_logs_ts_brin", timestamp, postgresql_using="brin").ddl_if(dialect="postgresql"),
+        # Covers the live-window aggregates (rollup / summary) so
+        # PostgreSQL can answer them with an index-only scan
+        Index(
+            "ix_attack_logs_ts_cov", timestamp,
+            postgresql_include=["attack_type", "action_taken", "source_ip", "threat_score"],
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+class AttackRollup(Base):
+    """1-minute aggregates of ``AttackLog`` (filled by ``src.storage.rollup``)."""
+    __tablename__ = "attack_rollup_1m"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bucket_ts = Column(Integer, nullable=False, index=True)  # epoch seconds, minute-aligned
+    attack_type = Column(String(50), nullable=True)
+    action_taken = Column(String(50), nullable=False)
+    source_ip = Column(String(45), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    sum_score = Column(Float, nullable=False, default=0.0)
+    last_seen = Column(DateTime, nullable=True)
+
+
+class AttackRollupState(Base):
+    """Rollup watermark shared by every worker process (a single row)."""
+    __tablename__ = "attack_rollup_state"
+
+    id = Column(Integer, primary_key=True)
+    watermark = Column(Integer, nullable=False)  # epoch seconds, minute-aligned
+
 
 class BlockedIP(Base):
     """Persistent IP blocklist (supplements Redis)."""
@@ -69,16 +109,75 @@ class TrafficSnapshot(Base):
     avg_threat_score = Column(Float, default=0.0)
 
 
+def utc_now() -> datetime:
+    """Current time as the naive UTC datetime the tables store."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # ── Engine & Session ─────────────────────────────────────
 
-engine = create_async_engine(settings.database_url, echo=False)
+
+def _engine_options(database_url: str) -> dict:
+    """Pooling options for ``create_async_engine`` based on the backend."""
+    url = make_url(database_url)
+    pool = {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": 30,
+    }
+
+    if url.get_backend_name() == "sqlite":
+        if url.database in (None, "", ":memory:"):
+            return {}  # in-memory DBs keep SQLAlchemy's single static connection
+        # aiosqlite defaults to NullPool — a fresh connection per session.
+        # Wait out a concurrent writer's lock rather than failing after 5s
+        return {"poolclass": AsyncAdaptedQueuePool, "connect_args": {"timeout": 30}, **pool}
+
+    options = {**pool, "pool_pre_ping": True, "pool_recycle": 1800}
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "server_settings": {"jit": "off"},
+            "command_timeout": 60,
+        }
+    return options
+
+
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    """WAL lets dashboard reads run alongside attack-log writes.
+
+    Analytics GROUP BY / ORDER BY temp tables stay in memory, and reads
+    go through a 256 MiB memory map instead of read() calls.
+    """
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
+engine = create_async_engine(
+    settings.database_url,
+    echo=False,
+    query_cache_size=1200,  # analytics has many filter/window variants
+    **_engine_options(settings.database_url),
+)
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
+def _create_missing_indexes(sync_conn) -> None:
+    """``create_all`` skips existing tables; add indexes introduced since."""
+    for index in AttackLog.__table__.indexes:
+        index.create(sync_conn, checkfirst=True)
+
+
 async def init_db() -> None:
     """Create all tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
     logger.info("Database tables created / verified")
 
 
@@ -10,6 +10,7 @@ import logging
 from typing import Optional
 
 import redis.asyncio as aioredis
+from redis.utils import HIREDIS_AVAILABLE
 
 from src.config import settings
 
@@ -27,12 +28,16 @@ class RedisManager:
         client = aioredis.from_url(
             settings.redis_url,
             decode_responses=True,
-            max_connections=50,
+            max_connections=500,  # one rate-limit call per in-flight request
+            health_check_interval=30,
+            socket_keepalive=True,
         )
         # Test connection — if this fails, self.client stays None
         await client.ping()
         self.client = client
         logger.info("Redis connected: %s", settings.redis_url)
+        if not HIREDIS_AVAILABLE:
+            logger.warning("hiredis not installed — Redis replies use the pure-Python parser")
 
     async def disconnect(self) -> None:
         """Close Redis connection."""
@@ -0,0 +1,225 @@
+"""
+Sentinel DDoS — Attack Log Rollup.
+
+Background task that folds raw attack logs into 1-minute aggregates
+(``attack_rollup_1m``) so analytics queries scan a handful of
+pre-aggregated rows instead of the full log over long windows.
+
+Everything before the *watermark* lives in the rollup table; anything
+newer is still read from the raw log (see ``attack_source``). The
+watermark is stored in ``attack_rollup_state`` and advanced with a
+compare-and-set in the same transaction as the insert, so when several
+processes run the worker each minute is rolled up exactly once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Integer, and_, cast, func, or_, select, union_all, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.storage.attack_writer import FLUSH_INTERVAL_SEC
+from src.storage.database import async_session, utc_now, AttackLog, AttackRollup, AttackRollupState
+
+logger = logging.getLogger("sentinel.storage.rollup")
+
+ROLLUP_BUCKET_SEC = 60
+ROLLUP_INTERVAL_SEC = 30.0
+# Rows are stamped when queued but committed by the batched writer up to a
+# flush interval later (more when its queue is backed up). Only minutes
+# that ended at least this long ago are rolled up, so late rows are still
+# in the live part of the window when they land.
+ROLLUP_LAG_SEC = FLUSH_INTERVAL_SEC + 60
+
+EPOCH = datetime(1970, 1, 1)
+
+
+# ── SQL helpers ──────────────────────────────────────────
+
+
+def epoch_seconds(session: AsyncSession, column):
+    """SQL expression converting a naive UTC timestamp column to epoch seconds."""
+    if session.get_bind().dialect.name == "sqlite":
+        return cast(func.strftime("%s", column), Integer)
+    return cast(func.floor(func.extract("epoch", column)), Integer)
+
+
+def to_epoch(ts: datetime) -> int:
+    """Python-side counterpart of ``epoch_seconds``."""
+    return int((ts - EPOCH).total_seconds())
+
+
+def ceil_minute(ts: datetime) -> datetime:
+    """``ts`` rounded up to the next rollup bucket boundary."""
+    floor = ts.replace(second=0, microsecond=0)
+    return floor if floor == ts else floor + timedelta(seconds=ROLLUP_BUCKET_SEC)
+
+
+def _raw_minutes(session: AsyncSession, *where):
+    """Aggregate raw attack logs into minute rows shaped like ``AttackRollup``."""
+    minute = (epoch_seconds(session, AttackLog.timestamp) // ROLLUP_BUCKET_SEC) * ROLLUP_BUCKET_SEC
+    minute = minute.label("bucket_ts")
+    return (
+        select(
+            minute,
+            AttackLog.attack_type.label("attack_type"),
+            AttackLog.action_taken.label("action_taken"),
+            AttackLog.source_ip.label("source_ip"),
+            func.count().label("count"),
+            func.sum(AttackLog.threat_score).label("sum_score"),
+            func.max(AttackLog.timestamp).label("last_seen"),
+        )
+        .where(*where)
+        .group_by(minute, AttackLog.attack_type, AttackLog.action_taken, AttackLog.source_ip)
+    )
+
+
+def attack_rows(session: AsyncSession, since: datetime):
+    """
+    Minute-aggregated attack rows from ``since`` onwards.
+
+    Returns a select with the ``AttackRollup`` columns: rolled-up
+    buckets below the watermark plus a live aggregate of the raw log
+    above it. The minute ``since`` falls inside only partly belongs to
+    the window, so it is read from the raw log too. Without a watermark
+    (rollup not run yet) the whole window comes from the raw log.
+    """
+    watermark = attack_rollup.watermark
+    start = ceil_minute(since)
+    if watermark is None or watermark <= start:
+        return _raw_minutes(session, AttackLog.timestamp >= since)
+
+    rolled = select(
+        AttackRollup.bucket_ts,
+        AttackRollup.attack_type,
+        AttackRollup.action_taken,
+        AttackRollup.source_ip,
+        AttackRollup.count,
+        AttackRollup.sum_score,
+        AttackRollup.last_seen,
+    ).where(
+        AttackRollup.bucket_ts >= to_epoch(start),
+        AttackRollup.bucket_ts < to_epoch(watermark),
+    )
+    live = _raw_minutes(session, or_(
+        and_(AttackLog.timestamp >= since, AttackLog.timestamp < start),
+        AttackLog.timestamp >= watermark,
+    ))
+    return union_all(rolled, live)
+
+
+def attack_source(session: AsyncSession, since: datetime):
+    """``attack_rows`` as a subquery, for selecting aggregates from."""
+    return attack_rows(session, since).subquery()
+
+
+# ── Rollup worker ────────────────────────────────────────
+
+
+class AttackRollupWorker:
+    """Periodically aggregates complete minutes of the attack log."""
+
+    def __init__(self, interval: float = ROLLUP_INTERVAL_SEC) -> None:
+        self.interval = interval
+        self._watermark: Optional[datetime] = None
+        self._running = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Start of the first minute not yet in the rollup table."""
+        return self._watermark
+
+    async def start(self) -> None:
+        """Start the background rollup loop."""
+        self._running = True
+        self._task = asyncio.create_task(self._loop())
+        logger.info("Attack rollup started (every %.0fs)", self.interval)
+
+    async def stop(self) -> None:
+        """Stop the background rollup loop."""
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def roll_up(self, now: Optional[datetime] = None) -> int:
+        """
+        Aggregate every complete minute since the watermark that ended
+        at least ``ROLLUP_LAG_SEC`` ago.
+
+        Returns the number of rollup rows written (0 if another worker
+        rolled the same minutes first).
+        """
+        now = now or utc_now()
+        cutoff = (now - timedelta(seconds=ROLLUP_LAG_SEC)).replace(second=0, microsecond=0)
+
+        async with async_session() as session:
+            stored = (await session.execute(
+                select(AttackRollupState.watermark).where(AttackRollupState.id == 1)
+            )).scalar()
+            if stored is None:
+                # No state row yet: resume after any buckets already rolled up
+                last = (await session.execute(select(func.max(AttackRollup.bucket_ts)))).scalar()
+                if last is not None:
+                    self._watermark = EPOCH + timedelta(seconds=last + ROLLUP_BUCKET_SEC)
+            else:
+                self._watermark = EPOCH + timedelta(seconds=stored)
+
+            if self._watermark is not None and cutoff <= self._watermark:
+                await session.rollback()
+                return 0
+
+            where = [AttackLog.timestamp < cutoff]
+            if self._watermark is not None:
+                where.append(AttackLog.timestamp >= self._watermark)
+            rows = (await session.execute(_raw_minutes(session, *where))).all()
+
+            if rows:
+                session.add_all([AttackRollup(**r._asdict()) for r in rows])
+            try:
+                if stored is None:
+                    session.add(AttackRollupState(id=1, watermark=to_epoch(cutoff)))
+                else:
+                    # Compare-and-set: a worker that moved the watermark first
+                    # already wrote these minutes
+                    moved = await session.execute(
+                        update(AttackRollupState)
+                        .where(AttackRollupState.id == 1, AttackRollupState.watermark == stored)
+                        .values(watermark=to_epoch(cutoff))
+                    )
+                    if moved.rowcount != 1:
+                        await session.rollback()
+                        return 0
+                await session.commit()
+            except IntegrityError:
+                # Another worker created the state row first
+                await session.rollback()
+                return 0
+
+        self._watermark = cutoff
+        return len(rows)
+
+    async def _loop(self) -> None:
+        while self._running:
+            try:
+                await asyncio.sleep(self.interval)
+                written = await self.roll_up()
+                if written:
+                    logger.debug("Rolled up %d attack bucket row(s)", written)
+            except asyncio.CancelledError:
+                break
+            except Exception:
+                logger.exception("Error in rollup loop")
+
+
+# Singleton
+attack_rollup = AttackRollupWorker()
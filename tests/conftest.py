@@ -0,0 +1,10 @@
+"""
+Shared test setup.
+"""
+
+import os
+
+# Keep OpenMP/BLAS to one thread per process before numpy/sklearn load, so
+# parallel (pytest-xdist) workers don't oversubscribe the CPU
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
@@ -0,0 +1,311 @@
+"""
+Tests for the analytics API queries.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from unittest.mock import patch
+
+from src.api import analytics
+from src.storage import rollup
+from src.storage.database import Base, AttackLog, utc_now
+
+
+@pytest.fixture
+async def session_factory():
+    """In-memory SQLite database patched into the analytics and rollup modules."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    with patch.object(analytics, "async_session", factory), \
+         patch.object(rollup, "async_session", factory), \
+         patch.object(rollup, "attack_rollup", rollup.AttackRollupWorker()):
+        yield factory
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_attack_timeline_buckets_in_sql(session_factory):
+    now = utc_now().replace(microsecond=0)
+    base = now - timedelta(minutes=30)
+    base -= timedelta(seconds=int((base - datetime(1970, 1, 1)).total_seconds()) % 300)
+    rows = [
+        (base, "blocked", "http_flood"),
+        (base + timedelta(seconds=10), "blocked", "http_flood"),
+        (base + timedelta(seconds=20), "rate_limited", None),
+        (base + timedelta(minutes=5), "challenged", "slowloris"),
+        (base + timedelta(minutes=5, seconds=1), "logged", "slowloris"),
+    ]
+    async with session_factory() as session:
+        session.add_all([
+            AttackLog(timestamp=ts, source_ip="10.0.0.1", threat_score=0.9,
+                      action_taken=action, attack_type=attack_type)
+            for ts, action, attack_type in rows
+        ])
+        await session.commit()
+
+    data = await analytics.get_attack_timeline(hours=1, bucket_minutes=5)
+    timeline = data["timeline"]
+    assert len(timeline) == 2
+
+    first, second = timeline
+    epoch = int((base - datetime(1970, 1, 1)).total_seconds())
+    assert first["timestamp"] == epoch
+    assert first["total"] == 3
+    assert first["blocked"] == 2
+    assert first["rate_limited"] == 1
+    assert first["by_type"] == {"http_flood": 2}
+
+    assert second["timestamp"] == epoch + 300
+    assert second["total"] == 2
+    assert second["challenged"] == 1
+    assert second["monitored"] == 0
+    assert second["by_type"] == {"slowloris": 2}
+
+
+async def _add_attacks(factory, rows):
+    async with factory() as session:
+        session.add_all([
+            AttackLog(timestamp=ts, source_ip=ip, threat_score=score,
+                      action_taken=action, attack_type=attack_type)
+            for ts, ip, score, action, attack_type in rows
+        ])
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_rollup_combines_with_live_log(session_factory):
+    now = utc_now().replace(second=30, microsecond=0)
+    old = now - timedelta(minutes=10)
+    await _add_attacks(session_factory, [
+        (old, "10.0.0.1", 0.8, "blocked", "http_flood"),
+        (old + timedelta(seconds=5), "10.0.0.1", 0.6, "blocked", "http_flood"),
+        (old + timedelta(seconds=10), "10.0.0.2", 0.4, "monitored", None),
+    ])
+
+    worker = rollup.attack_rollup
+    assert await worker.roll_up(now) == 2
+    assert worker.watermark == (now - timedelta(seconds=rollup.ROLLUP_LAG_SEC)).replace(second=0)
+    # Nothing new to roll up within the same minute
+    assert await worker.roll_up(now) == 0
+
+    # Live rows above the watermark are still counted
+    await _add_attacks(session_factory, [
+        (now, "10.0.0.1", 1.0, "blocked", "http_flood"),
+    ])
+
+    summary = await analytics.get_analytics_summary(hours=1)
+    assert summary["total_events"] == 4
+    assert summary["unique_attacking_ips"] == 2
+    assert summary["avg_threat_score"] == 0.7
+    assert summary["actions"] == {"blocked": 3, "monitored": 1}
+
+    top = (await analytics.get_top_attacking_ips(hours=1, limit=20))["top_ips"]
+    assert top[0]["ip"] == "10.0.0.1"
+    assert top[0]["event_count"] == 3
+    assert top[0]["avg_score"] == 0.8
+    assert top[0]["last_seen"] == rollup.to_epoch(now)
+
+    by_type = (await analytics.get_attacks_by_type(hours=1))["by_type"]
+    assert by_type[0] == {"attack_type": "http_flood", "count": 3, "avg_score": 0.8}
+    assert by_type[1]["attack_type"] == "unknown"
+
+    timeline = (await analytics.get_attack_timeline(hours=1, bucket_minutes=60))["timeline"]
+    assert sum(b["total"] for b in timeline) == 4
+
+
+@pytest.mark.asyncio
+async def test_rollup_counts_rows_committed_late(session_factory):
+    """A row committed after roll_up, stamped before that minute ended, is still counted."""
+    now = utc_now().replace(second=30, microsecond=0)
+    worker = rollup.attack_rollup
+    await worker.roll_up(now)
+
+    # Queued just before the minute boundary, flushed after the roll-up ran
+    late = now.replace(second=0) - timedelta(seconds=1)
+    await _add_attacks(session_factory, [(late, "10.0.0.9", 0.5, "blocked", "http_flood")])
+    assert (await analytics.get_analytics_summary(hours=1))["total_events"] == 1
+
+    # ...and it lands in the rollup table once its minute is old enough
+    assert await worker.roll_up(now + timedelta(minutes=5)) == 1
+    assert worker.watermark > late
+    assert (await analytics.get_analytics_summary(hours=1))["total_events"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rollup_shared_between_workers(session_factory):
+    """Workers in separate processes share the watermark, so no minute is rolled up twice."""
+    now = utc_now().replace(second=30, microsecond=0)
+    first, second = rollup.attack_rollup, rollup.AttackRollupWorker()
+    await _add_attacks(session_factory, [
+        (now - timedelta(minutes=10), "10.0.0.1", 0.5, "blocked", "http_flood"),
+    ])
+    assert await first.roll_up(now) == 1
+    assert await second.roll_up(now) == 0
+    assert second.watermark == first.watermark
+
+    later = now + timedelta(minutes=5)
+    await _add_attacks(session_factory, [
+        (now, "10.0.0.2", 0.5, "blocked", "http_flood"),
+    ])
+    assert await second.roll_up(later) == 1
+    assert await first.roll_up(later) == 0
+
+    with patch.object(analytics, "utc_now", lambda: later):
+        summary = await analytics.get_analytics_summary(hours=1)
+    assert summary["total_events"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rollup_keeps_minute_straddling_window_start(session_factory):
+    """Rows in the part of a rolled-up minute that lies inside the window are counted."""
+    now = utc_now().replace(second=30, microsecond=0)
+    since = now - timedelta(hours=1)
+    await _add_attacks(session_factory, [
+        (since - timedelta(seconds=5), "10.0.0.1", 0.5, "blocked", "http_flood"),
+        (since + timedelta(seconds=5), "10.0.0.2", 0.5, "blocked", "http_flood"),
+        (since + timedelta(minutes=5), "10.0.0.3", 0.5, "blocked", "http_flood"),
+    ])
+
+    with patch.object(analytics, "utc_now", lambda: now):
+        before = (await analytics.get_analytics_summary(hours=1))["total_events"]
+        assert await rollup.attack_rollup.roll_up(now) == 3
+        after = await analytics.get_analytics_summary(hours=1)
+
+    assert before == after["total_events"] == 2
+    assert after["unique_attacking_ips"] == 2
+
+
+class _FakeRedis:
+    """Just enough of redis.asyncio for the response cache."""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+    async def scan_iter(self, match):
+        prefix = match.rstrip("*")
+        for k in list(self.data):
+            if k.startswith(prefix):
+                yield k
+
+
+@pytest.mark.asyncio
+async def test_analytics_response_cache(session_factory):
+    from src.storage import cache
+
+    fake = _FakeRedis()
+    with patch("src.storage.redis_client.redis_manager.client", fake):
+        first = await analytics.get_analytics_summary(hours=1)
+        assert first["total_events"] == 0
+        assert len(fake.data) == 1
+
+        await _add_attacks(session_factory, [
+            (utc_now(), "10.0.0.1", 0.9, "blocked", "http_flood"),
+        ])
+        # Served from cache until invalidated
+        assert await analytics.get_analytics_summary(hours=1) == first
+        # Different query params get their own entry
+        assert (await analytics.get_analytics_summary(hours=2))["total_events"] == 1
+
+        assert await cache.clear(analytics.CACHE_NAMESPACE) == 2
+        assert (await analytics.get_analytics_summary(hours=1))["total_events"] == 1
+
+
+@pytest.mark.asyncio
+async def test_attack_log_writer_batches(session_factory):
+    from src.storage import attack_writer
+
+    writer = attack_writer.AttackLogWriter(batch_size=3, interval=0.05)
+    with patch.object(attack_writer, "async_session", session_factory):
+        await writer.start()
+        for i in range(5):
+            writer.enqueue(f"10.0.0.{i}", "blocked", 0.9, path="/", method="GET",
+                           attack_type="http_flood")
+        writer.enqueue("10.0.0.9", "monitored", 0.5, metadata_json='{"rule": "x"}')
+        await writer.stop()
+
+    summary = await analytics.get_analytics_summary(hours=1)
+    assert summary["total_events"] == 6
+    assert summary["actions"] == {"blocked": 5, "monitored": 1}
+
+
+@pytest.mark.asyncio
+async def test_attack_history_filters_and_orders(session_factory):
+    now = utc_now().replace(microsecond=0)
+    await _add_attacks(session_factory, [
+        (now - timedelta(minutes=3), "10.0.0.1", 0.9, "blocked", "http_flood"),
+        (now - timedelta(minutes=2), "10.0.0.2", 0.5, "monitored", None),
+        (now - timedelta(minutes=1), "10.0.0.1", 0.7, "blocked", "http_flood"),
+        (now - timedelta(hours=3), "10.0.0.1", 0.7, "blocked", "http_flood"),
+    ])
+
+    data = await analytics.get_attack_history(hours=1, limit=100, attack_type=None,
+                                              action="blocked", ip=None, before=None)
+    assert data["count"] == 2
+    assert [a["timestamp"] for a in data["attacks"]] == [
+        rollup.to_epoch(now - timedelta(minutes=1)),
+        rollup.to_epoch(now - timedelta(minutes=3)),
+    ]
+    assert data["attacks"][0]["source_ip"] == "10.0.0.1"
+
+    data = await analytics.get_attack_history(hours=24, limit=1, attack_type=None,
+                                              action=None, ip="10.0.0.2", before=None)
+    assert [a["threat_score"] for a in data["attacks"]] == [0.5]
+
+
+@pytest.mark.asyncio
+async def test_attack_history_rebinds_cached_statement(session_factory):
+    """The lambda statement is cached; each call must still use its own values."""
+    now = utc_now()
+    await _add_attacks(session_factory, [
+        (now - timedelta(minutes=i), f"10.0.0.{i % 2}", float(i), "blocked", None)
+        for i in range(5)
+    ])
+
+    async def scores(limit, ip):
+        data = await analytics.get_attack_history(hours=1, limit=limit, attack_type=None,
+                                                  action=None, ip=ip, before=None)
+        return [a["threat_score"] for a in data["attacks"]]
+
+    assert await scores(1, None) == [0.0]
+    assert await scores(3, None) == [0.0, 1.0, 2.0]
+    assert await scores(5, "10.0.0.1") == [1.0, 3.0]
+    assert await scores(5, "10.0.0.0") == [0.0, 2.0, 4.0]
+
+
+@pytest.mark.asyncio
+async def test_attack_history_keyset_pages(session_factory):
+    now = utc_now()
+    # Two rows share a timestamp so paging must fall back to the id
+    await _add_attacks(session_factory, [
+        (now - timedelta(minutes=m), "10.0.0.1", float(i), "blocked", None)
+        for i, m in enumerate([1, 2, 2, 3, 4])
+    ])
+
+    seen, before = [], None
+    while True:
+        page = await analytics.get_attack_history(hours=1, limit=2, attack_type=None,
+                                                  action=None, ip=None, before=before)
+        seen += [a["threat_score"] for a in page["attacks"]]
+        before = page["next_cursor"]
+        if before is None:
+            break
+    assert sorted(seen) == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert seen[0] == 0.0 and seen[-1] == 4.0
+
+    with pytest.raises(analytics.HTTPException):
+        await analytics.get_attack_history(hours=1, limit=2, attack_type=None,
+                                           action=None, ip=None, before="not-a-cursor")
@@ -2,6 +2,8 @@
 Tests for the API endpoints.
 """
 
+from collections import deque
+
 import pytest
 from httpx import AsyncClient, ASGITransport
 from unittest.mock import AsyncMock, patch
@@ -38,3 +40,148 @@ async def test_get_stats(client):
     data = resp.json()
     assert "uptime" in data
     assert "protection_level" in data
+
+
+def test_traffic_events_since():
+    from src.proxy.handler import TrafficCounters
+
+    counters = TrafficCounters(recent_events=deque(maxlen=3))
+    for i in range(2):
+        counters.add_event({"n": i})
+    assert counters.events_since(0) == [{"n": 0}, {"n": 1}]
+    assert counters.events_since(2) == []
+
+    # Sequence keeps counting once the ring buffer is full
+    for i in range(2, 6):
+        counters.add_event({"n": i})
+    assert counters.event_seq == 6
+    assert counters.events_since(4) == [{"n": 4}, {"n": 5}]
+    assert counters.events_since(0) == [{"n": 3}, {"n": 4}, {"n": 5}]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_event_drops_dead_connections():
+    from src.api import websocket
+
+    alive, dead = AsyncMock(), AsyncMock()
+    dead.send_text.side_effect = RuntimeError("closed")
+    with patch.object(websocket, "_connections", {alive, dead}):
+        await websocket.broadcast_event({"type": "alert"})
+        assert websocket._connections == {alive}
+    alive.send_text.assert_awaited_once_with('{"type":"alert"}')
+
+
+@pytest.mark.asyncio
+async def test_traffic_broadcaster_shares_one_payload():
+    import asyncio
+    import json
+
+    from src.api import websocket
+    from src.proxy.handler import TrafficCounters
+
+    counters = TrafficCounters()
+    broadcaster = websocket.TrafficBroadcaster()
+    with patch.object(websocket, "traffic", counters):
+        counters.add_event({"n": 0})
+        waiters = [asyncio.create_task(broadcaster.next_payload(0)) for _ in range(3)]
+        await asyncio.sleep(0)
+        broadcaster.tick()
+        results = await asyncio.gather(*waiters)
+
+        assert len(set(results)) == 1
+        payload, seq = results[0]
+        assert json.loads(payload)["new_events"] == [{"n": 0}]
+        assert seq == broadcaster.last_seq == 1
+
+
+@pytest.mark.asyncio
+async def test_traffic_broadcaster_catches_up_busy_feed():
+    """A feed that wasn't waiting when a tick fired still gets that tick's events."""
+    import asyncio
+    import json
+
+    from src.api import websocket
+    from src.proxy.handler import TrafficCounters
+
+    counters = TrafficCounters()
+    broadcaster = websocket.TrafficBroadcaster()
+    with patch.object(websocket, "traffic", counters):
+        counters.add_event({"n": 0})
+        broadcaster.tick()  # no feed waiting: this tick is missed
+        counters.add_event({"n": 1})
+
+        waiter = asyncio.create_task(broadcaster.next_payload(0))
+        await asyncio.sleep(0)
+        broadcaster.tick()
+        payload, seq = await waiter
+
+        assert json.loads(payload)["new_events"] == [{"n": 0}, {"n": 1}]
+        assert seq == 2
+
+
+@pytest.mark.asyncio
+async def test_attack_map_dedupes_ips(client):
+    from src.proxy.handler import TrafficCounters
+
+    counters = TrafficCounters()
+    counters.add_event({"ip": "1.2.3.4", "action": "blocked", "score": 0.9})
+    counters.add_event({"ip": "1.2.3.4", "action": "rate_limited"})
+    counters.add_event({"ip": "5.6.7.8", "action": "forwarded"})
+    with patch("src.api.routes.traffic", counters):
+        resp = await client.get("/api/attack-map")
+    data = resp.json()
+    assert data["total_attacking_ips"] == 1
+    point = data["points"][0]
+    assert point["ip"] == "1.2.3.4"
+    assert point["action"] == "blocked"
+    assert point["country_code"]
+
+
+def test_requests_per_second_rolls_off_old_seconds(monkeypatch):
+    """RPS averages the last 10 one-second buckets and forgets older ones."""
+    from src.proxy.handler import TrafficCounters
+
+    sec = 1_000_000_000
+    clock = [1000 * sec]
+    monkeypatch.setattr("src.proxy.handler.time.monotonic_ns", lambda: clock[0])
+    counters = TrafficCounters()
+
+    for _ in range(30):
+        counters.record_request()
+    clock[0] += 5 * sec
+    for _ in range(10):
+        counters.record_request()
+    assert counters.requests_per_second == 4.0
+
+    clock[0] += 6 * sec  # the first second's 30 requests leave the window
+    assert counters.requests_per_second == 1.0
+    clock[0] += 60 * sec
+    assert counters.requests_per_second == 0.0
+    assert counters.total_requests == 40
+
+
+def test_events_get_geo_on_read():
+    """Events are stored without GeoIP data and gain it when read."""
+    from src.proxy.handler import TrafficCounters, _make_event
+
+    counters = TrafficCounters()
+    counters.add_event(_make_event("8.8.8.8", "blocked", "/", "GET"))
+    assert "geo" not in counters.recent_events[0]
+    assert counters.recent()[0]["geo"]["country_code"]
+    assert counters.events_since(0)[0]["geo"] is counters.recent_events[0]["geo"]
+
+
+def test_active_ips_counts_distinct_approximately():
+    """The HyperLogLog counter ignores repeats and stays within a few percent."""
+    from src.proxy.handler import HyperLogLog
+
+    hll = HyperLogLog()
+    assert len(hll) == 0
+    for _ in range(3):
+        for ip in ("1.1.1.1", "2.2.2.2", "3.3.3.3"):
+            hll.add(ip)
+    assert len(hll) == 3
+
+    for i in range(50_000):
+        hll.add(f"10.{i >> 16}.{(i >> 8) & 255}.{i & 255}")
+    assert abs(len(hll) - 50_003) / 50_003 < 0.03
@@ -105,3 +105,74 @@ def test_unknown_ip_returns_none(analyzer: BehaviorAnalyzer):
     """Unknown IP should return None for get_session."""
     session = analyzer.get_session("99.99.99.99")
     assert session is None
+
+
+def _hit(analyzer: BehaviorAnalyzer, ip: str) -> None:
+    analyzer.record_and_score(
+        client_ip=ip, path="/", method="GET", user_agent="Mozilla/5.0",
+        accept_language="en", referer=None, cookie=None, header_order_hash="h",
+    )
+
+
+def test_lru_eviction_at_capacity(analyzer: BehaviorAnalyzer, monkeypatch):
+    """At capacity, the least recently seen IP is evicted."""
+    from src.detection import behavior
+
+    monkeypatch.setattr(behavior, "MAX_TRACKED", 3)
+    for ip in ("1.1.1.1", "2.2.2.2", "3.3.3.3"):
+        _hit(analyzer, ip)
+    _hit(analyzer, "1.1.1.1")  # refresh: 2.2.2.2 is now the oldest
+    _hit(analyzer, "4.4.4.4")
+
+    assert analyzer.get_session("2.2.2.2") is None
+    assert analyzer.get_session("1.1.1.1") is not None
+    assert analyzer.get_session("4.4.4.4") is not None
+
+
+def test_cleanup_evicts_expired_sessions(analyzer: BehaviorAnalyzer):
+    """Expired sessions are dropped from the front of the LRU order."""
+    from src.detection.behavior import SESSION_TTL
+
+    _hit(analyzer, "1.1.1.1")
+    _hit(analyzer, "2.2.2.2")
+    analyzer.get_session("1.1.1.1").last_seen -= SESSION_TTL + 1
+    analyzer._last_cleanup = 0.0
+    _hit(analyzer, "3.3.3.3")
+
+    assert analyzer.get_session("1.1.1.1") is None
+    assert analyzer.get_session("2.2.2.2") is not None
+
+
+def test_interval_stats_cover_recent_buckets():
+    """Two-bucket Welford stats match the intervals they cover."""
+    import statistics
+
+    from src.detection.behavior import IAT_BUCKET
+
+    session = IPSession()
+    deltas = [0.1 + (i % 7) * 0.05 for i in range(IAT_BUCKET * 2 + 30)]
+    now = 1000.0
+    session.record(now, "/", "GET", "ua", "en", None, None, "h")
+    for d in deltas:
+        now += d
+        session.record(now, "/", "GET", "ua", "en", None, None, "h")
+
+    # Oldest full bucket has rotated out; the last 100 + 30 remain
+    recent = deltas[IAT_BUCKET:]
+    n, mean, variance = session.interval_stats()
+    assert n == len(recent)
+    assert mean == pytest.approx(statistics.fmean(recent))
+    assert variance == pytest.approx(statistics.pvariance(recent))
+
+
+def test_path_counts_follow_window():
+    """Path counts drop paths that slide out of the visited window."""
+    session = IPSession()
+    maxlen = session.paths_visited.maxlen
+    for i in range(maxlen + 10):
+        path = "/first" if i < 10 else f"/p{i % 5}"
+        session.record(float(i + 1), path, "GET", "ua", "en", None, None, "h")
+
+    assert "/first" not in session.path_counts
+    assert sum(session.path_counts.values()) == maxlen
+    assert BehaviorAnalyzer._path_diversity(session) == 5 / maxlen
@@ -0,0 +1,98 @@
+"""
+Tests for the detection engine.
+"""
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from starlette.requests import Request
+
+from src.config import settings
+from src.detection.behavior import behavior_analyzer
+from src.detection.engine import DetectionEngine, SCORE_CACHE_TTL, TRUST_STREAK, TRUST_TTL
+
+
+def _request(path: str = "/", method: str = "GET") -> Request:
+    return Request({
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"user-agent", b"Mozilla/5.0"), (b"accept", b"*/*")],
+    })
+
+
+def _skip_scoring(engine: DetectionEngine) -> None:
+    """Make the scorer and ML inference fail loudly if they are reached."""
+    engine.scorer.score = MagicMock(side_effect=AssertionError("scored"))
+    engine.ml = MagicMock(wraps=engine.ml)
+    engine.ml.score_vector_async = MagicMock(side_effect=AssertionError("ml scored"))
+
+
+@pytest.mark.asyncio
+async def test_trusted_ip_skips_scoring():
+    """After a streak of low scores the cached score is returned without re-scoring."""
+    engine = DetectionEngine()
+    now = time.monotonic()
+    for _ in range(TRUST_STREAK):
+        engine._update_trust("10.0.0.1", 0.02, now)
+    _skip_scoring(engine)
+
+    score = await engine.score_request(_request(), "10.0.0.1", rate_count=1, rate_limit=100)
+    assert score == 0.02
+    # ...but the request still feeds behavior, baseline and ML learning
+    assert behavior_analyzer.get_session("10.0.0.1").request_count == 1
+    assert engine.baseline.observation_count == 1
+    engine.ml.record_vector.assert_called_once()
+
+    # A high score drops the IP from the trusted set
+    engine._update_trust("10.0.0.1", 0.9, now)
+    assert "10.0.0.1" not in engine._trust
+
+
+def test_trust_needs_full_streak_and_expires():
+    """Trust is only granted after TRUST_STREAK low scores, for TRUST_TTL seconds."""
+    engine = DetectionEngine()
+    now = time.monotonic()
+    for _ in range(TRUST_STREAK - 1):
+        engine._update_trust("10.0.0.2", 0.02, now)
+    assert engine._trust["10.0.0.2"][1] == 0.0
+
+    engine._update_trust("10.0.0.2", 0.02, now)
+    assert engine._trust["10.0.0.2"][1] == now + TRUST_TTL
+
+
+@pytest.mark.asyncio
+async def test_burst_reuses_recent_score(monkeypatch):
+    """A repeat of the same ip/path/method/rate bucket reuses the score until it expires."""
+    engine = DetectionEngine()
+    engine._score_cache[("10.0.0.3", "/login", "POST", 0)] = (time.monotonic() + SCORE_CACHE_TTL, 0.7)
+    _skip_scoring(engine)
+
+    assert await engine.score_request(_request("/login", "POST"), "10.0.0.3", rate_count=3) == 0.7
+    assert behavior_analyzer.get_session("10.0.0.3").request_count == 1
+    assert engine.baseline.observation_count == 1
+    engine.ml.record_vector.assert_called_once()
+
+    # Under-attack mode always re-scores
+    monkeypatch.setattr(settings, "under_attack_mode", True)
+    with pytest.raises(AssertionError, match="scored"):
+        await engine.score_request(_request("/login", "POST"), "10.0.0.3", rate_count=3)
+
+
+@pytest.mark.asyncio
+async def test_trust_skipped_under_attack_and_on_distrust(monkeypatch):
+    """Under-attack mode re-scores trusted IPs, and distrust() drops them."""
+    engine = DetectionEngine()
+    now = time.monotonic()
+    for _ in range(TRUST_STREAK):
+        engine._update_trust("10.0.0.4", 0.02, now)
+    _skip_scoring(engine)
+
+    monkeypatch.setattr(settings, "under_attack_mode", True)
+    with pytest.raises(AssertionError, match="scored"):
+        await engine.score_request(_request(), "10.0.0.4", rate_count=1)
+
+    engine.distrust("10.0.0.4")
+    assert "10.0.0.4" not in engine._trust
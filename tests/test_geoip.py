@@ -4,7 +4,7 @@ Tests for the GeoIP lookup module.
 
 import pytest
 
-from src.geoip.lookup import GeoResult, lookup, _fallback_lookup
+from src.geoip.lookup import GeoResult, lookup, lookup_batch, lookup_dict, _fallback_lookup
 
 
 def test_fallback_returns_result():
@@ -57,3 +57,44 @@ def test_private_ip_works():
     assert result.country_code
     result = lookup("127.0.0.1")
     assert result.country_code
+
+
+def test_lookup_is_cached():
+    """Repeated lookups of one IP return the same cached result."""
+    lookup.cache_clear()
+    first = lookup("8.8.8.8")
+    assert lookup("8.8.8.8") is first
+    assert lookup.cache_info().hits == 1
+
+
+def test_lookup_batch_matches_lookup():
+    """lookup_batch returns the same results as individual lookups, in order."""
+    ips = ["8.8.8.8", "10.0.0.1", "::1", "8.8.8.8"]
+    assert lookup_batch(ips) == [lookup(ip) for ip in ips]
+
+
+def test_lookup_dict_matches_to_dict():
+    """lookup_dict returns the cached serialized form of lookup."""
+    assert lookup_dict("8.8.8.8") == lookup("8.8.8.8").to_dict()
+    assert lookup_dict("8.8.8.8") is lookup_dict("8.8.8.8")
+
+
+def test_maxmind_reader_hit_once_per_ip(monkeypatch):
+    """Repeated lookups of one IP walk the MaxMind tree only once."""
+    from unittest.mock import MagicMock
+
+    from src.geoip import lookup as geo
+
+    reader = MagicMock()
+    reader.city.return_value.country.iso_code = "DE"
+    reader.city.return_value.location.latitude = 52.5
+    reader.city.return_value.location.longitude = 13.4
+    monkeypatch.setattr(geo, "_reader", reader)
+    monkeypatch.setattr(geo, "_geoip_available", True)
+    lookup.cache_clear()
+    try:
+        for _ in range(100):
+            assert lookup("203.0.113.9").country_code == "DE"
+        reader.city.assert_called_once_with("203.0.113.9")
+    finally:
+        lookup.cache_clear()
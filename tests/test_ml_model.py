@@ -2,25 +2,70 @@
 Tests for the ML anomaly model (IsolationForest).
 """
 
+import asyncio
+
 import pytest
 import numpy as np
 import time
 import shutil
+import subprocess
+import sys
 import uuid
+from pathlib import Path
 
+from src.detection import ml_model
+from src.detection._ml_train import fit_model
 from src.detection.ml_model import MLAnomalyModel, MLModelConfig
 
+# One xdist worker runs this module, so the session-scoped fit happens once
+pytestmark = pytest.mark.xdist_group("ml")
 
-@pytest.fixture
-def model(tmp_path):
-    """ML model with low training threshold for testing, unique dir."""
-    config = MLModelConfig(
+
+def _test_config(tmp_path, persist: bool = False) -> MLModelConfig:
+    return MLModelConfig(
         min_train_samples=50,
         model_dir=str(tmp_path / f"test_models_{uuid.uuid4().hex[:8]}"),
         n_estimators=50,
         contamination=0.1,
+        persist=persist,
+    )
+
+
+@pytest.fixture
+async def model(tmp_path):
+    """ML model with low training threshold for testing; nothing is written to disk."""
+    model = MLAnomalyModel(_test_config(tmp_path))
+    yield model
+    await model.stop()
+
+
+def _install_fit(model: MLAnomalyModel, fit: tuple) -> None:
+    """Serve an already-fitted (forest, scaler) pair from ``model``."""
+    model._model, scaler = fit
+    model._set_scaler(scaler)
+    model._is_trained = True
+
+
+@pytest.fixture(scope="session")
+def trained_state(tmp_path_factory):
+    """Scaler + forest fitted once on 60 normal samples, in-process."""
+    config = _test_config(tmp_path_factory.mktemp("ml"))
+    source = MLAnomalyModel(config)
+    for i in range(60):
+        # Some spread in rate_ratio so the scaler has a non-trivial column
+        source.record_sample(_normal_features(), rate_ratio=0.1 * (i % 5), behavior_score=0.1)
+    return fit_model(
+        source._training_matrix(), config.n_estimators, config.contamination, config.max_samples,
     )
-    return MLAnomalyModel(config)
+
+
+@pytest.fixture
+async def trained_model(tmp_path, trained_state):
+    """A fresh model serving the shared fit, skipping training and persistence."""
+    model = MLAnomalyModel(_test_config(tmp_path))
+    _install_fit(model, trained_state)
+    yield model
+    await model.stop()
 
 
 def _normal_features() -> dict:
@@ -31,7 +76,8 @@ def _normal_features() -> dict:
         "path": "/",
         "method": "GET",
         "accept_language": "en-US",
-        "_raw_headers": {"cookie": "session=abc", "referer": "/"},
+        "has_cookie": True,
+        "has_referer": True,
     }
 
 
@@ -43,7 +89,8 @@ def _attack_features() -> dict:
         "path": "/",
         "method": "GET",
         "accept_language": "",
-        "_raw_headers": {},
+        "has_cookie": False,
+        "has_referer": False,
     }
 
 
@@ -84,36 +131,40 @@ async def test_training_insufficient_samples(model: MLAnomalyModel):
     assert model.is_ready is False
 
 
-@pytest.mark.asyncio
-async def test_normal_request_scores_low(model: MLAnomalyModel):
+def test_normal_request_scores_low(trained_model: MLAnomalyModel):
     """After training on normal data, normal requests should score low."""
-    for i in range(60):
-        model.record_sample(_normal_features(), rate_ratio=0.1, behavior_score=0.1)
-
-    await model.maybe_train()
-    score = model.score(_normal_features(), rate_ratio=0.1, behavior_score=0.1)
+    score = trained_model.score(_normal_features(), rate_ratio=0.1, behavior_score=0.1)
     assert score < 0.6, f"Normal request scored {score}"
 
 
-@pytest.mark.asyncio
-async def test_attack_request_scores_higher(model: MLAnomalyModel):
+def test_attack_request_scores_higher(model: MLAnomalyModel):
     """After training on normal data, attack requests should score higher."""
-    import random
-    random.seed(42)
-    # Add varied normal traffic
-    for i in range(80):
+    # Varied normal traffic, drawn in one go from a seeded generator
+    rng = np.random.default_rng(42)
+    n = 80
+    header_counts = rng.integers(6, 13, n)
+    content_lengths = rng.integers(0, 501, n)
+    paths = rng.choice(["/", "/about", "/contact", "/blog"], n)
+    rate_ratios = rng.uniform(0.01, 0.2, n)
+    behavior_scores = rng.uniform(0.0, 0.15, n)
+    for hc, cl, path, rr, bs in zip(header_counts, content_lengths, paths, rate_ratios, behavior_scores):
         features = {
-            "header_count": random.randint(6, 12),
-            "content_length": random.randint(0, 500),
+            "header_count": hc,
+            "content_length": cl,
             "user_agent": "Mozilla/5.0 Chrome/120.0",
-            "path": random.choice(["/", "/about", "/contact", "/blog"]),
+            "path": str(path),
             "method": "GET",
             "accept_language": "en-US",
-            "_raw_headers": {"cookie": "session=abc", "referer": "/"},
+            "has_cookie": True,
+            "has_referer": True,
         }
-        model.record_sample(features, rate_ratio=random.uniform(0.01, 0.2), behavior_score=random.uniform(0.0, 0.15))
+        model.record_sample(features, rate_ratio=rr, behavior_score=bs)
 
-    await model.maybe_train()
+    # Fit in-process; the worker-process path is covered by the training tests
+    config = model.config
+    _install_fit(model, fit_model(
+        model._training_matrix(), config.n_estimators, config.contamination, config.max_samples,
+    ))
 
     normal_score = model.score(_normal_features(), rate_ratio=0.1, behavior_score=0.1)
     attack_score = model.score(_attack_features(), rate_ratio=0.95, behavior_score=0.9)
@@ -128,7 +179,20 @@ def test_extract_vector_shape(model: MLAnomalyModel):
     """Feature vector should have correct shape."""
     vec = model.extract_vector(_normal_features(), 0.5, 0.3)
     assert vec.shape == (11,)
-    assert vec.dtype == np.float64
+    assert vec.dtype == np.float32
+
+    out = np.zeros((2, 11), dtype=np.float32)
+    model.extract_vector(_normal_features(), 0.5, 0.3, out=out[1])
+    np.testing.assert_array_equal(out[1], vec)
+    assert not out[0].any()
+
+
+def test_long_path_skips_unique_chars_cache(model: MLAnomalyModel):
+    """Oversized paths are counted without entering the per-path cache."""
+    before = ml_model._unique_chars_short.cache_info().currsize
+    features = {**_normal_features(), "path": "/" + "ab" * 400}
+    assert model.extract_vector(features)[4] == 3
+    assert ml_model._unique_chars_short.cache_info().currsize == before
 
 
 def test_info_dict(model: MLAnomalyModel):
@@ -140,16 +204,92 @@ def test_info_dict(model: MLAnomalyModel):
     assert "min_train_samples" in info
 
 
-@pytest.mark.asyncio
-async def test_predict_label(model: MLAnomalyModel):
+def test_predict_label(model: MLAnomalyModel, trained_model: MLAnomalyModel):
     """Predict label should return 1 for normal, -1 for anomaly."""
     # Before training, always returns 1
     assert model.predict_label(_normal_features()) == 1
 
+    # After training, normal should be 1
+    label = trained_model.predict_label(_normal_features(), rate_ratio=0.1, behavior_score=0.1)
+    assert label == 1
+
+
+@pytest.mark.asyncio
+async def test_score_async_matches_score(trained_model: MLAnomalyModel):
+    """Concurrent score_async calls are batched and match single scoring."""
+    model = trained_model
+    cases = [(0.1, 0.1), (5.0, 0.9), (0.5, 0.3)] * 10
+    scores = await asyncio.gather(*(
+        model.score_async(_normal_features(), rate_ratio=r, behavior_score=b)
+        for r, b in cases
+    ))
+    for (r, b), batched in zip(cases, scores):
+        single = model.score(_normal_features(), rate_ratio=r, behavior_score=b)
+        assert batched == pytest.approx(single, abs=1e-4)
+    await model.stop()
+
+
+@pytest.mark.asyncio
+async def test_model_persists_and_reloads(tmp_path):
+    """A trained model is saved with joblib and loaded by a fresh instance."""
+    model = MLAnomalyModel(_test_config(tmp_path, persist=True))
     for i in range(60):
         model.record_sample(_normal_features(), rate_ratio=0.1, behavior_score=0.1)
     await model.maybe_train()
 
-    # After training, normal should be 1
-    label = model.predict_label(_normal_features(), rate_ratio=0.1, behavior_score=0.1)
-    assert label == 1
+    assert model._model_path().exists()
+    reloaded = MLAnomalyModel(model.config)
+    assert reloaded.is_ready
+    assert reloaded.score(_normal_features(), 0.1, 0.1) == pytest.approx(
+        model.score(_normal_features(), 0.1, 0.1),
+    )
+    await model.stop()
+
+
+@pytest.mark.asyncio
+async def test_persist_disabled_skips_disk(model: MLAnomalyModel):
+    """With persist=False training leaves model_dir untouched."""
+    for i in range(60):
+        model.record_sample(_normal_features())
+    assert await model.maybe_train()
+    assert not model._model_path().exists()
+
+
+def test_inline_transform_matches_scaler(trained_model: MLAnomalyModel):
+    """The cached mean/inverse-scale transform matches StandardScaler."""
+    model = trained_model
+    vec = model.extract_vector(_normal_features(), rate_ratio=3.0, behavior_score=0.7)
+    expected = model._scaler.transform(vec.reshape(1, -1))[0]
+    np.testing.assert_allclose(model._transform(vec), expected, rtol=1e-5)
+
+
+def test_training_buffer_wraps(tmp_path):
+    """The sample ring buffer stops growing at capacity and overwrites the oldest."""
+    model = MLAnomalyModel(MLModelConfig(max_samples=4, model_dir=str(tmp_path)))
+    for i in range(20):
+        model.record_sample(_normal_features(), rate_ratio=float(i))
+
+    assert model.sample_count == 16
+    rate_col = 9  # FEATURE_NAMES.index("rate_ratio")
+    assert sorted(model._buf[:, rate_col]) == [float(i) for i in range(4, 20)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_train_runs_once(model: MLAnomalyModel):
+    """A second maybe_train while one is running returns False instead of queueing."""
+    for i in range(60):
+        model.record_sample(_normal_features())
+
+    results = await asyncio.gather(model.maybe_train(), model.maybe_train())
+    assert sorted(results) == [False, True]
+    assert model._train_count == 1
+
+
+def test_training_entry_point_skips_model_singleton():
+    """The spawned training process imports fit_model without building (and loading) ml_model."""
+    code = (
+        "import sys; import src.detection._ml_train; "
+        "assert 'src.detection.ml_model' not in sys.modules"
+    )
+    root = Path(__file__).resolve().parents[1]
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
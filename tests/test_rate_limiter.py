@@ -0,0 +1,66 @@
+"""
+Tests for the sliding-window rate limiter.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from src.config import settings
+from src.mitigation.rate_limiter import RateLimiter
+
+
+class _FakeScriptRedis:
+    """Runs the limit script's logic in Python over in-memory sorted sets."""
+
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.calls = 0
+
+    def register_script(self, _source: str):
+        async def script(keys, args, client=None):
+            self.calls += 1
+            now, member = float(args[0]), args[1]
+            counts = []
+            for i, key in enumerate(keys):
+                window_start, _ttl, limit = args[2 + 3 * i: 5 + 3 * i]
+                zset = self.zsets.setdefault(key, {})
+                for m in [m for m, score in zset.items() if score <= window_start]:
+                    del zset[m]
+                zset[member] = now
+                counts.append(len(zset))
+                if len(zset) > limit:
+                    return [i + 1, counts]
+            return [0, counts]
+        return script
+
+
+@pytest.fixture
+def fake_redis():
+    fake = _FakeScriptRedis()
+    with patch("src.mitigation.rate_limiter.redis_manager.client", fake):
+        yield fake
+
+
+async def test_check_request_reports_rule_then_global(fake_redis, monkeypatch):
+    """Rule limits are checked before the global ones, all in one script call."""
+    monkeypatch.setattr(settings, "rate_limit_per_ip", 3)
+    limiter = RateLimiter()
+    rules = (("login", 2, 60),)
+
+    assert await limiter.check_request("1.2.3.4", rules) == (0, [1, 1, 1, 1])
+    assert await limiter.check_request("1.2.3.4", rules) == (0, [2, 2, 2, 2])
+    # Third hit trips the rule; later keys are left untouched
+    assert await limiter.check_request("1.2.3.4", rules) == (1, [3])
+    assert fake_redis.calls == 3
+
+    # Without the rule the per-IP limit (3) trips next
+    assert await limiter.allow_with_count("1.2.3.4") == (True, 3)
+    assert await limiter.allow_with_count("1.2.3.4") == (False, 4)
+
+
+async def test_fail_open_without_redis():
+    with patch("src.mitigation.rate_limiter.redis_manager.client", None):
+        limiter = RateLimiter()
+        assert await limiter.check_request("1.2.3.4", (("login", 1, 60),)) == (0, [])
+        assert await limiter.allow_with_count("1.2.3.4") == (True, 0)
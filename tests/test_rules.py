@@ -8,11 +8,7 @@ from pathlib import Path
 from src.rules.engine import RulesEngine
 
 
-@pytest.fixture
-def rules_engine(tmp_path: Path):
-    """Rules engine loaded from test fixtures."""
-    rule_file = tmp_path / "test_rules.yml"
-    rule_file.write_text("""
+RULES_YAML = """
 rules:
   - name: "Login Protection"
     match:
@@ -33,9 +29,14 @@ rules:
       path: "/*"
     limits:
       per_ip: "100/minute"
-""")
+"""
+
+
+@pytest.fixture(scope="module")
+def rules_engine():
+    """Rules engine loaded from the YAML above (read-only, shared by this module)."""
     engine = RulesEngine()
-    engine.load_from_directory(str(tmp_path))
+    engine.load_from_string(RULES_YAML)
     return engine
 
 
@@ -73,3 +74,52 @@ def test_parse_rate_string(rules_engine):
     count, window = rules_engine.parse_rate_string("100/hour")
     assert count == 100
     assert window == 3600
+
+
+def test_match_keeps_file_order_and_skips_disabled(tmp_path: Path):
+    """Indexed matching returns rules in file order and ignores disabled ones."""
+    (tmp_path / "rules.yml").write_text("""
+rules:
+  - name: "Prefix"
+    match:
+      path: "/api/*"
+  - name: "Disabled"
+    enabled: false
+    match:
+      path: "/api/login"
+  - name: "Exact"
+    match:
+      path: "/api/login"
+      method: "post"
+  - name: "No Path"
+""")
+    engine = RulesEngine()
+    engine.load_from_directory(str(tmp_path))
+
+    assert [r.name for r in engine.match_request("/api/login", "POST")] == ["Prefix", "Exact", "No Path"]
+    assert [r.name for r in engine.match_request("/other", "GET")] == ["No Path"]
+
+
+def test_rate_and_escalation_parsed_at_load(tmp_path: Path):
+    """Rate strings, durations and escalation order are resolved when loading."""
+    (tmp_path / "rules.yml").write_text("""
+rules:
+  - name: "Login"
+    match:
+      path: "/login"
+    limits:
+      per_ip: "10/hour"
+    escalation:
+      - threshold: 200
+        action: "block"
+        duration: "30m"
+      - threshold: 100
+        action: "rate_limit"
+""")
+    engine = RulesEngine()
+    engine.load_from_directory(str(tmp_path))
+    rule = engine.rules[0]
+
+    assert (rule.limits.per_ip_count, rule.limits.per_ip_window) == (10, 3600)
+    assert [s.threshold for s in rule.escalation] == [100, 200]
+    assert rule.escalation[1].duration_sec == 1800
@@ -4,13 +4,14 @@ Tests for the anomaly scorer.
 
 import pytest
 
-from src.detection.scorer import AnomalyScorer
+from src.detection import scorer as scorer_module
+from src.detection.scorer import AnomalyScorer, score_user_agent
 from src.detection.baseline import BaselineModel
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def trained_baseline():
-    """Create a baseline with enough observations to be ready."""
+    """Create a baseline with enough observations to be ready (read-only, shared)."""
     baseline = BaselineModel(window_sec=3600)
     import time
     now = time.time()
@@ -90,3 +91,73 @@ async def test_suspicious_ua_moderate_score(scorer, trained_baseline):
     }
     score = await scorer.score(features, trained_baseline)
     assert 0.05 < score < 0.8, f"Suspicious UA got score {score}"
+
+
+def test_baseline_running_stats_match_window():
+    """Running sums track the window across evictions and buffer growth."""
+    import time
+    import numpy as np
+
+    baseline = BaselineModel(window_sec=60)
+    now = time.time()
+    kept = []
+    for i in range(8000):
+        # The first 2000 fall outside the window, the rest well inside it
+        ts = now - 100 + i * 0.01 if i < 2000 else now - 30 + (i - 2000) * 0.004
+        obs = {"timestamp": ts, "header_count": i % 13, "content_length": i * 7}
+        baseline.record_observation(obs)
+        if i >= 2000:
+            kept.append(obs)
+    baseline.update_model()
+
+    hc = np.array([o["header_count"] for o in kept])
+    cl = np.array([o["content_length"] for o in kept])
+    assert baseline.observation_count == len(kept)
+    assert baseline.mean_header_count == pytest.approx(hc.mean())
+    assert baseline.std_header_count == pytest.approx(hc.std())
+    assert baseline.mean_content_length == pytest.approx(cl.mean())
+    assert baseline.std_content_length == pytest.approx(cl.std())
+
+
+def test_baseline_rps_matches_histogram():
+    """RPS stats use whole equal-width buckets over the span, like np.histogram."""
+    import time
+    import numpy as np
+
+    baseline = BaselineModel(window_sec=7200)
+    now = time.time()
+    # ~10 rps for an hour and a bit (a partial trailing minute)
+    ts = np.sort(np.random.default_rng(0).uniform(now - 3630, now, 36300))
+    for t in ts:
+        baseline.record_observation({"timestamp": float(t), "header_count": 8, "content_length": 0})
+    baseline.update_model()
+
+    rps = np.histogram(ts, bins=int((ts[-1] - ts[0]) / 60))[0] / 60
+    assert baseline.mean_rps == pytest.approx(rps.mean())
+    assert baseline.std_rps == pytest.approx(rps.std())
+
+
+@pytest.mark.asyncio
+async def test_score_batch_matches_score(scorer, trained_baseline):
+    """Vectorized batch scoring agrees with per-request scoring."""
+    features_list = [
+        {"header_count": 8, "content_length": 0, "user_agent": "Mozilla/5.0", "path": "/"},
+        {"header_count": 2, "content_length": 9000, "user_agent": "", "path": "/x" * 300},
+        {"header_count": 30, "content_length": 10, "user_agent": "curl/8.0", "path": "/api"},
+    ]
+    rates = [0.1, 0.9, 1.5]
+    behaviors = [0.0, 0.7, 0.3]
+
+    batch = scorer.score_batch(features_list, trained_baseline, rates, behaviors)
+    for f, r, b, got in zip(features_list, rates, behaviors, batch):
+        expected = await scorer.score(f, trained_baseline, rate_ratio=r, behavior_score=b)
+        assert got == pytest.approx(expected)
+
+
+def test_long_user_agents_bypass_cache():
+    """Only short UAs are cached, so oversized ones can't bloat the cache."""
+    long_ua = "curl/8.0 " + "x" * 600
+    before = scorer_module._score_short_user_agent.cache_info().currsize
+    assert score_user_agent(long_ua) == 0.5
+    assert scorer_module._score_short_user_agent.cache_info().currsize == before
+    assert score_user_agent("curl/8.0") == 0.5
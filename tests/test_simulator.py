@@ -70,7 +70,15 @@ def test_random_ip(monkeypatch):
     sim = AttackSimulator(config)
     ip = sim._random_ip()
     assert ip.startswith("10.")
-    assert ip in sim._ips_used
+    assert sim._unique_ips() == 1
+
+
+def test_random_ip_walks_pool():
+    """Successive calls should step through the pre-generated pool."""
+    sim = AttackSimulator(SimulatorConfig(source_ips=5))
+    ips = [sim._random_ip() for _ in range(3)]
+    assert ips == list(sim._ip_pools[5][:3])
+    assert sim._unique_ips() == len(set(ips))
 
 
 def test_record_response():
@@ -95,3 +103,12 @@ def test_record_response():
     assert sim.report.errors == 1
 
     assert sim.report.total_requests == 5
+
+
+def test_record_error():
+    """Transport errors should count once toward total and errors."""
+    sim = AttackSimulator(SimulatorConfig())
+    sim._record_error()
+    assert sim.report.total_requests == 1
+    assert sim.report.errors == 1
+    assert sim._lat_n == 0